@@ -2,7 +2,10 @@
 import json
 from pathlib import Path
 
-# 音标数据 - 自然地理章节前50个单词的音标
+from chapter_store import chapter_lock, save_chapter
+from phonetics_store import get_phonetics_store
+
+# 音标数据 - 自然地理章节前50个单词的音标（phonetics_store --from-builtin 的导入来源之一）
 phonetics_data = {
     "atmosphere": "/ˈætməsfɪə(r)/",
     "hydrosphere": "/ˈhaɪdrəsfɪə(r)/",
@@ -236,34 +239,39 @@ phonetics_data = {
     "petroleum": "/pəˈtrəʊliəm/"
 }
 
+def add_phonetic(word_entry):
+    """为单个单词添加音标，找到音标时返回True"""
+    # 音标库同时处理组合词（如 jeopardise/jeopardize）和大小写，
+    # 找不到时回退到读音相同的英美拼写；复数等变化形式的原形读音不同，只作提示
+    match = get_phonetics_store().lookup_close(word_entry['word'])
+    if match:
+        word_entry['phonetic'] = match[0]
+        return True
+    return False
+
 def add_phonetics_to_json():
     """为自然地理章节添加音标"""
     file_path = Path('json_chapters/自然地理.json')
     
-    # 读取现有JSON
-    with open(file_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    # 为每个单词添加音标
-    updated_count = 0
-    for word_entry in data['words']:
-        word = word_entry['word']
-        # 处理组合词（如 jeopardise/jeopardize）
-        if '/' in word:
-            parts = word.split('/')
-            if parts[0] in phonetics_data:
-                word_entry['phonetic'] = phonetics_data[parts[0]]
+    # 从读取到保存持有章节锁，不与同时运行的增强任务互相覆盖
+    with chapter_lock(file_path):
+        # 读取现有JSON
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        
+        # 为每个单词添加音标
+        updated_count = 0
+        for word_entry in data['words']:
+            if add_phonetic(word_entry):
                 updated_count += 1
-        elif word in phonetics_data:
-            word_entry['phonetic'] = phonetics_data[word]
-            updated_count += 1
-        else:
-            # 对于没有音标数据的单词，暂时留空
-            print(f"Missing phonetic for: {word}")
-    
-    # 保存更新后的JSON
-    with open(file_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+            else:
+                # 对于没有音标数据的单词，暂时留空
+                suggestions = get_phonetics_store().suggestions(word_entry['word'])
+                hint = f" (did you mean: {', '.join(suggestions)})" if suggestions else ""
+                print(f"Missing phonetic for: {word_entry['word']}{hint}")
+        
+        # 保存更新后的JSON
+        save_chapter(file_path, data)
     
     print(f"成功为 {updated_count} 个单词添加了音标")
     print(f"文件已更新: {file_path}")
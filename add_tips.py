@@ -1,7 +1,12 @@
 #!/usr/bin/env python3
 import json
+from functools import lru_cache
 from pathlib import Path
 
+from chapter_store import chapter_lock, save_chapter
+from fuzzy_match import SymSpellIndex, spelling_variants
+from headword_index import headword_variants
+
 # 记忆技巧数据
 tips_data = {
     "atmosphere": "联想'atmo'像'atom'(原子)+'sphere'(球体)，原子组成的球体包围地球就是大气层",
@@ -233,28 +238,57 @@ tips_data = {
     "petroleum": "petr(石)+oleum(油)，石油"
 }
 
+@lru_cache(maxsize=None)
+def tips_variant_index():
+    """专属tips的规整词头（小写、/ 拼写变体）→ tip"""
+    index = {}
+    for word, tip in tips_data.items():
+        for variant in headword_variants(word):
+            index.setdefault(variant, tip)
+    return index
+
+@lru_cache(maxsize=None)
+def tips_fuzzy_index():
+    """专属tips的近似匹配索引，只用于"您是不是要找"的建议"""
+    index = SymSpellIndex()
+    for word, tip in tips_data.items():
+        index.add(word, tip)
+    return index
+
+def add_tip(word_entry):
+    """为单个单词添加记忆技巧，使用专属tips时返回True"""
+    word = word_entry['word']
+    if word in tips_data:
+        word_entry['tips'] = tips_data[word]
+        return True
+    # 大小写或英美拼写不同的同一个词；拼写相近的其他词（affect/effect）和原形不算
+    index = tips_variant_index()
+    for variant in spelling_variants(word):
+        if variant in index:
+            word_entry['tips'] = index[variant]
+            return True
+    # 对于没有特定tips的单词，生成通用提示
+    word_entry['tips'] = f"将'{word}'与相关场景联想，结合例句反复练习"
+    return False
+
 def add_tips_to_json():
     """为自然地理章节添加记忆技巧"""
     file_path = Path('json_chapters/自然地理.json')
     
-    # 读取现有JSON
-    with open(file_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    # 为每个单词添加tips
-    updated_count = 0
-    for word_entry in data['words']:
-        word = word_entry['word']
-        if word in tips_data:
-            word_entry['tips'] = tips_data[word]
-            updated_count += 1
-        else:
-            # 对于没有特定tips的单词，生成通用提示
-            word_entry['tips'] = f"将'{word}'与相关场景联想，结合例句反复练习"
-    
-    # 保存更新后的JSON
-    with open(file_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    # 从读取到保存持有章节锁，不与同时运行的增强任务互相覆盖
+    with chapter_lock(file_path):
+        # 读取现有JSON
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        
+        # 为每个单词添加tips
+        updated_count = 0
+        for word_entry in data['words']:
+            if add_tip(word_entry):
+                updated_count += 1
+        
+        # 保存更新后的JSON
+        save_chapter(file_path, data)
     
     print(f"成功为 {updated_count} 个单词添加了记忆技巧")
     print(f"文件已更新: {file_path}")
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""并发、限速的AI增强后端：生成记忆技巧和例句翻译
+
+- asyncio 并发请求，令牌桶限制每秒请求数
+- 失败按指数退避重试
+- 每批单词完成后追加写入断点日志（JSONL），中断后重新运行会跳过已完成的单词
+
+接口兼容 OpenAI Chat Completions，可通过 OPENAI_BASE_URL 指向本地桩服务器（stub_chat_server.py）测试。
+既可以单独运行，也可以作为 enrich_pipeline 的批量阶段（--ai）。
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+import urllib.error
+import urllib.request
+
+from chapter_store import JSON_DIR, chapter_lock, list_chapter_files, load_chapter, save_chapter
+from enrichment_cache import CACHE_FILE, EnrichmentCache
+
+MODEL = os.environ.get("OPENAI_MODEL", "gpt-4o-mini")
+API_KEY = os.environ.get("OPENAI_API_KEY", "")
+BASE_URL = os.environ.get("OPENAI_BASE_URL", "https://api.openai.com/v1")
+JOURNAL_DIR = ".ai_journal"
+
+# 各脚本生成的通用模板技巧，视为"尚无专属技巧"
+GENERIC_TIP_MARKERS = ("拆分记忆，结合词根词缀理解其含义", "【拆分记忆】", "【基础记忆】", "【后缀记忆】",
+                       "与相关场景联想，结合例句反复练习")
+TRANSLATION_PLACEHOLDER = "[需要翻译]"
+
+class Generator:
+    """一种AI生成任务：判断哪些单词需要生成、构造提示词、写回字段"""
+
+    def __init__(self, name, field, version, needs, build_messages):
+        self.name = name
+        self.field = field
+        self.version = version
+        self.needs = needs
+        self.build_messages = build_messages
+
+def is_generic_tip(tips):
+    return not tips or any(marker in tips for marker in GENERIC_TIP_MARKERS)
+
+def build_tip_messages(word_obj):
+    """与 ai_regen_tips_openai.js 相同的提示词"""
+    system = ("你是英语词汇教练，帮中国学生记忆学术词汇。输出中文记忆技巧，2-3条，短句，每条尽量不超过28个汉字，"
+              "使用标签如【词根】/【前缀】/【后缀】/【联想】/【图像】/【谐音】。围绕该词的核心含义与构词法，"
+              "避免生僻字和长段解释。仅输出技巧本身，用中文分号连接，不要额外说明或标题。")
+    content = (f"单词: {word_obj.get('word', '')}\n词性: {word_obj.get('pos', '')}\n"
+               f"释义: {word_obj.get('meaning', '')}\n音标: {word_obj.get('phonetic', '')}\n请按要求生成记忆技巧。")
+    return [{"role": "system", "content": system}, {"role": "user", "content": content}]
+
+def build_translation_messages(word_obj):
+    system = "你是专业的英汉翻译。把用户给出的英文例句翻译成自然流畅的中文，只输出译文。"
+    content = (f"单词: {word_obj.get('word', '')}（{word_obj.get('meaning', '')}）\n"
+               f"例句: {word_obj.get('example', '')}")
+    return [{"role": "system", "content": system}, {"role": "user", "content": content}]
+
+def needs_tip(word_obj):
+    return is_generic_tip(word_obj.get("tips"))
+
+def needs_translation(word_obj):
+    return bool(word_obj.get("example")) and \
+        word_obj.get("example_translation", TRANSLATION_PLACEHOLDER) == TRANSLATION_PLACEHOLDER
+
+GENERATORS = {
+    "tips": Generator("tips", "tips", "tips-v1", needs_tip, build_tip_messages),
+    "translation": Generator("translation", "example_translation", "translation-v1",
+                             needs_translation, build_translation_messages),
+}
+
+class TokenBucket:
+    """令牌桶限速：平均每秒 rate 个请求，允许 capacity 个突发"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class ChatClient:
+    """Chat Completions 客户端，请求在线程中执行，失败按指数退避重试"""
+
+    def __init__(self, base_url=BASE_URL, api_key=API_KEY, model=MODEL, max_retries=5, timeout=60, backoff=0.5):
+        self.url = base_url.rstrip("/") + "/chat/completions"
+        self.api_key = api_key
+        self.model = model
+        self.max_retries = max_retries
+        self.timeout = timeout
+        # 第一次重试前等待的秒数，之后每次翻倍
+        self.backoff = backoff
+
+    def _post(self, messages):
+        payload = json.dumps({"model": self.model, "messages": messages, "temperature": 0.7}).encode("utf-8")
+        request = urllib.request.Request(self.url, data=payload, method="POST", headers={
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.api_key}",
+        })
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            body = json.load(response)
+        return body["choices"][0]["message"]["content"].strip()
+
+    async def complete(self, messages, bucket):
+        for attempt in range(self.max_retries + 1):
+            await bucket.acquire()
+            try:
+                return await asyncio.to_thread(self._post, messages)
+            except urllib.error.HTTPError as e:
+                # 4xx（429除外）重试也不会成功
+                if e.code < 500 and e.code != 429 or attempt == self.max_retries:
+                    raise
+            except (urllib.error.URLError, TimeoutError, ConnectionError, KeyError, ValueError):
+                if attempt == self.max_retries:
+                    raise
+            await asyncio.sleep(min(30, self.backoff * 2 ** attempt) * (0.5 + random.random()))
+
+class Journal:
+    """断点日志：每行一个已生成的结果，按 (位置, 单词输入指纹) 匹配"""
+
+    def __init__(self, path):
+        self.path = path
+        self.results = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # 崩溃时可能留下半行
+                        continue
+                    self.results[(entry["index"], entry["key"])] = entry["value"]
+
+    def get(self, index, key):
+        return self.results.get((index, key))
+
+    def append(self, entries):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                self.results[(entry["index"], entry["key"])] = entry["value"]
+            f.flush()
+            os.fsync(f.fileno())
+
+    def clear(self):
+        self.results = {}
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+def input_key(generator, word_obj):
+    """单词输入指纹：源字段加生成器版本"""
+    source = "\x1f".join(word_obj.get(field, "") for field in ("word", "pos", "meaning", "example"))
+    return hashlib.sha256(f"{generator.version}\x1f{source}".encode("utf-8")).hexdigest()[:16]
+
+class AIEnricher:
+    """对一个章节的单词批量调用模型，可作为 enrich_pipeline 的批量阶段"""
+
+    def __init__(self, generator, concurrency=8, rate=5.0, batch_size=20, journal_dir=JOURNAL_DIR,
+                 regenerate=False, client=None, cache_path=None):
+        self.generator = GENERATORS[generator] if isinstance(generator, str) else generator
+        self.concurrency = concurrency
+        self.rate = rate
+        self.batch_size = batch_size
+        self.journal_dir = journal_dir
+        self.regenerate = regenerate
+        self.client = client or ChatClient()
+        self.cache_path = cache_path
+
+    def journal_path(self, chapter_name):
+        return os.path.join(self.journal_dir, f"{chapter_name}.{self.generator.name}.jsonl")
+
+    def __call__(self, chapter_name, words):
+        return asyncio.run(self.enrich_words(chapter_name, words))
+
+    async def enrich_words(self, chapter_name, words):
+        """生成并写回字段，返回 (更新数, 失败数)"""
+        generator = self.generator
+        journal = Journal(self.journal_path(chapter_name))
+        bucket = TokenBucket(self.rate)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        cache = EnrichmentCache(self.cache_path) if self.cache_path else None
+
+        pending = []
+        updated = 0
+        for index, word_obj in enumerate(words):
+            if not (self.regenerate or generator.needs(word_obj)):
+                continue
+            key = input_key(generator, word_obj)
+            value = journal.get(index, key)
+            if value is None and cache and not self.regenerate:
+                value = cache.get(generator.name, generator.version, [key])
+            if value is not None:
+                word_obj[generator.field] = value
+                updated += 1
+            else:
+                pending.append((index, key, word_obj))
+
+        async def generate(index, key, word_obj):
+            async with semaphore:
+                text = await self.client.complete(generator.build_messages(word_obj), bucket)
+            return {"index": index, "key": key, "word": word_obj.get("word", ""),
+                    "value": " ".join(text.split())}
+
+        failed = 0
+        for start in range(0, len(pending), self.batch_size):
+            batch = pending[start:start + self.batch_size]
+            results = await asyncio.gather(*(generate(*item) for item in batch), return_exceptions=True)
+            entries = []
+            for (index, key, word_obj), result in zip(batch, results):
+                if isinstance(result, Exception) or not result["value"]:
+                    # 失败时保留原有内容
+                    failed += 1
+                    continue
+                word_obj[generator.field] = result["value"]
+                entries.append(result)
+            if entries:
+                journal.append(entries)
+                updated += len(entries)
+                if cache:
+                    for entry in entries:
+                        cache.put(generator.name, generator.version, [entry["key"]], entry["value"])
+                    cache.flush()
+            print(f"  ⏳ {chapter_name} {generator.name}: {min(start + self.batch_size, len(pending))}/{len(pending)}")
+
+        if cache:
+            cache.close()
+        return updated, failed
+
+    def chapter_saved(self, chapter_name):
+        """章节文件写入后断点日志不再需要"""
+        Journal(self.journal_path(chapter_name)).clear()
+
+def check_api_key(base_url=BASE_URL):
+    """调用 OpenAI 官方接口必须设置 OPENAI_API_KEY；指向本地桩服务器时不需要"""
+    if not API_KEY and base_url == "https://api.openai.com/v1":
+        print("❌ OPENAI_API_KEY 未设置，无法调用 OpenAI 接口")
+        raise SystemExit(2)
+
+def enrich_chapter_file(filepath, enrichers):
+    """对单个章节文件运行所有AI生成任务，完成后写入并清理断点日志"""
+    with chapter_lock(filepath):
+        data = load_chapter(filepath, tracked=True)
+        chapter_name = data["chapter"]
+
+        for enricher in enrichers:
+            updated, failed = enricher(chapter_name, data["words"])
+            print(f"  {chapter_name} {enricher.generator.name}: 更新 {updated} 条，失败 {failed} 条")
+
+        if any(word_obj.dirty for word_obj in data["words"]):
+            save_chapter(filepath, data)
+        for enricher in enrichers:
+            enricher.chapter_saved(chapter_name)
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate tips/translations with a chat completions API")
+    parser.add_argument("generators", nargs="+", choices=sorted(GENERATORS))
+    parser.add_argument("--json-dir", default=JSON_DIR)
+    parser.add_argument("--chapters", nargs="+", metavar="CHAPTER", help="only these chapters")
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--model", default=MODEL)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=5.0, help="requests per second")
+    parser.add_argument("--batch-size", type=int, default=20, help="words per journal checkpoint")
+    parser.add_argument("--journal-dir", default=JOURNAL_DIR)
+    parser.add_argument("--regenerate", action="store_true", help="regenerate even non-generic values")
+    parser.add_argument("--cache", nargs="?", const=CACHE_FILE, metavar="PATH",
+                        help=f"reuse earlier results from the enrichment cache (default: {CACHE_FILE})")
+    args = parser.parse_args()
+
+    check_api_key(args.base_url)
+
+    client = ChatClient(args.base_url, API_KEY, args.model)
+    enrichers = [AIEnricher(name, args.concurrency, args.rate, args.batch_size, args.journal_dir,
+                            args.regenerate, client, args.cache) for name in args.generators]
+
+    for filepath in list_chapter_files(args.json_dir):
+        if args.chapters and os.path.splitext(os.path.basename(filepath))[0] not in args.chapters:
+            continue
+        enrich_chapter_file(filepath, enrichers)
+
+if __name__ == "__main__":
+    main()
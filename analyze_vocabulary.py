@@ -1,87 +1,148 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
+"""Coverage statistics for the vocabulary chapters.
 
+All output formats (the emoji report, JSON and CSV) come from the same numpy
+columnar engine; install numpy with pip install -r requirements.txt.
+"""
+
+import argparse
+import csv
 import json
 import os
 import glob
-from pathlib import Path
+import sys
+
+JSON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "json_chapters")
+TRANSLATION_PLACEHOLDER = "[需要翻译]"
+TABLE_FIELDS = ("word", "pos", "meaning", "phonetic", "example", "example_translation", "tips", "note")
+# Words listed per chapter in the report's "missing" lines
+MISSING_SAMPLE = 10
+
+def has_value(field, value):
+    """Whether a field holds real content; an untranslated placeholder does not count"""
+    if not value:
+        return False
+    return field != "example_translation" or value != TRANSLATION_PLACEHOLDER
+
+class CorpusTable:
+    """Columnar view of the whole corpus.
+
+    Only what the statistics need is kept: `present[field]` is a boolean mask
+    (True where the field has real content, see has_value), `lengths[field]`
+    the int32 length of every value, `chapter` the int32 chapter code of every
+    row, indexing `chapter_names`, and `words` the headwords for listing
+    missing entries. Rows are grouped by chapter in chapter order.
+    """
+
+    def __init__(self, chapter_names, chapter, words, present, lengths):
+        self.chapter_names = chapter_names
+        self.chapter = chapter
+        self.words = words
+        self.present = present
+        self.lengths = lengths
+
+    def __len__(self):
+        return len(self.chapter)
 
-def analyze_vocabulary_data():
-    """Analyze all vocabulary JSON files and provide comprehensive statistics."""
+def load_corpus_table(json_dir=JSON_DIR):
+    """Load every chapter file into a CorpusTable in a single pass."""
+    import numpy as np
     
-    # Get all JSON files except index.json
-    json_dir = "/home/feng/code/github/learn-ielts/json_chapters"
-    json_files = glob.glob(os.path.join(json_dir, "*.json"))
-    json_files = [f for f in json_files if not f.endswith("index.json")]
-    json_files.sort()
+    json_files = sorted(f for f in glob.glob(os.path.join(json_dir, "*.json")) if not f.endswith("index.json"))
     
-    # Initialize counters
-    total_words = 0
-    total_with_phonetics = 0
-    total_with_examples = 0
-    total_with_example_translations = 0
+    chapter_names = []
+    chapter_codes = []
+    words = []
+    present = {field: [] for field in TABLE_FIELDS}
+    lengths = {field: [] for field in TABLE_FIELDS}
     
-    # Chapter analysis
-    chapters_data = []
+    for code, json_file in enumerate(json_files):
+        chapter_names.append(os.path.basename(json_file).replace(".json", ""))
+        with open(json_file, 'r', encoding='utf-8') as f:
+            chapter_words = json.load(f).get('words', [])
+        chapter_codes.extend([code] * len(chapter_words))
+        words.extend(word.get('word', 'unknown') for word in chapter_words)
+        for field in TABLE_FIELDS:
+            values = [word.get(field) or '' for word in chapter_words]
+            present[field].extend(has_value(field, value) for value in values)
+            lengths[field].extend(map(len, values))
     
-    print("=== IELTS Vocabulary Analysis Report ===\n")
+    return CorpusTable(
+        chapter_names,
+        np.array(chapter_codes, dtype=np.int32),
+        words,
+        {field: np.array(mask, dtype=np.bool_) for field, mask in present.items()},
+        {field: np.array(column, dtype=np.int32) for field, column in lengths.items()},
+    )
+
+def coverage_by_chapter(table):
+    """Phonetic, example and translation coverage per chapter as vectorized reductions."""
+    import numpy as np
     
-    for json_file in json_files:
-        chapter_name = os.path.basename(json_file).replace(".json", "")
-        
-        try:
-            with open(json_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                
-            words = data.get('words', [])
-            word_count = len(words)
-            
-            # Count words with various attributes
-            words_with_phonetics = 0
-            words_with_examples = 0
-            words_with_example_translations = 0
-            missing_phonetics = []
-            missing_examples = []
-            
-            for word in words:
-                # Check phonetics
-                if word.get('phonetic'):
-                    words_with_phonetics += 1
-                else:
-                    missing_phonetics.append(word.get('word', 'unknown'))
-                
-                # Check examples
-                if word.get('example'):
-                    words_with_examples += 1
-                    # Check if example translation exists and is not "[需要翻译]"
-                    translation = word.get('example_translation', '')
-                    if translation and translation != "[需要翻译]":
-                        words_with_example_translations += 1
-                else:
-                    missing_examples.append(word.get('word', 'unknown'))
-            
-            # Store chapter data
-            chapter_info = {
-                'name': chapter_name,
-                'total_words': word_count,
-                'with_phonetics': words_with_phonetics,
-                'with_examples': words_with_examples,
-                'with_example_translations': words_with_example_translations,
-                'missing_phonetics_count': len(missing_phonetics),
-                'missing_examples_count': len(missing_examples),
-                'missing_phonetics': missing_phonetics[:10],  # Show first 10
-                'missing_examples': missing_examples[:10]  # Show first 10
-            }
-            chapters_data.append(chapter_info)
-            
-            # Update totals
-            total_words += word_count
-            total_with_phonetics += words_with_phonetics
-            total_with_examples += words_with_examples
-            total_with_example_translations += words_with_example_translations
-            
-        except Exception as e:
-            print(f"Error processing {json_file}: {e}")
+    chapter_count = len(table.chapter_names)
+    translated = table.present['example'] & table.present['example_translation']
+    
+    def per_chapter(mask):
+        return np.bincount(table.chapter, weights=mask, minlength=chapter_count).astype(np.int64)
+    
+    totals = np.bincount(table.chapter, minlength=chapter_count)
+    with_phonetics = per_chapter(table.present['phonetic'])
+    with_examples = per_chapter(table.present['example'])
+    with_translations = per_chapter(translated)
+    
+    rows = []
+    for code, name in enumerate(table.chapter_names):
+        total = int(totals[code])
+        examples = int(with_examples[code])
+        rows.append({
+            'name': name,
+            'total_words': total,
+            'with_phonetics': int(with_phonetics[code]),
+            'with_examples': examples,
+            'with_example_translations': int(with_translations[code]),
+            'phonetics_pct': round(with_phonetics[code] / total * 100, 1) if total else 0.0,
+            'examples_pct': round(examples / total * 100, 1) if total else 0.0,
+            'translations_pct': round(with_translations[code] / examples * 100, 1) if examples else 0.0,
+        })
+    return rows
+
+def missing_by_chapter(table, field, limit=MISSING_SAMPLE):
+    """Headwords of the first `limit` rows per chapter that lack `field`."""
+    import numpy as np
+    
+    rows = np.flatnonzero(~table.present[field])
+    # Rows are grouped by chapter, so each chapter's missing rows are one slice
+    bounds = np.searchsorted(table.chapter[rows], np.arange(len(table.chapter_names) + 1))
+    return [[table.words[row] for row in rows[start:min(end, start + limit)]]
+            for start, end in zip(bounds[:-1], bounds[1:])]
+
+def write_coverage(rows, output_format, out=sys.stdout):
+    if output_format == 'json':
+        json.dump(rows, out, ensure_ascii=False, indent=2)
+        out.write("\n")
+    else:
+        writer = csv.DictWriter(out, fieldnames=list(rows[0]) if rows else [])
+        writer.writeheader()
+        writer.writerows(rows)
+
+def write_report(table):
+    """Print the emoji report from the engine's per-chapter coverage."""
+    missing_phonetics = missing_by_chapter(table, 'phonetic')
+    missing_examples = missing_by_chapter(table, 'example')
+    chapters_data = [dict(row,
+                          missing_phonetics_count=row['total_words'] - row['with_phonetics'],
+                          missing_examples_count=row['total_words'] - row['with_examples'],
+                          missing_phonetics=missing_phonetics[code],
+                          missing_examples=missing_examples[code])
+                     for code, row in enumerate(coverage_by_chapter(table))]
+    
+    total_words = sum(chapter['total_words'] for chapter in chapters_data)
+    total_with_phonetics = sum(chapter['with_phonetics'] for chapter in chapters_data)
+    total_with_examples = sum(chapter['with_examples'] for chapter in chapters_data)
+    total_with_example_translations = sum(chapter['with_example_translations'] for chapter in chapters_data)
+    
+    print("=== IELTS Vocabulary Analysis Report ===\n")
     
     # Print overall summary
     print("📊 OVERALL STATISTICS:")
@@ -143,5 +204,21 @@ def analyze_vocabulary_data():
     print(f"Examples completion: {total_with_examples/total_words*100:.1f}%")
     print(f"Translation completion: {total_with_example_translations/total_with_examples*100:.1f}% (of words with examples)")
 
+def analyze_vocabulary_data(json_dir=JSON_DIR):
+    """Analyze all vocabulary JSON files and print the emoji report."""
+    write_report(load_corpus_table(json_dir))
+
+def main():
+    parser = argparse.ArgumentParser(description="Coverage statistics for the vocabulary chapters")
+    parser.add_argument("--json-dir", default=JSON_DIR)
+    parser.add_argument("--format", choices=["report", "json", "csv"], default="report",
+                        help="report: the full emoji report; json/csv: per-chapter coverage from the columnar engine")
+    args = parser.parse_args()
+    
+    if args.format == "report":
+        analyze_vocabulary_data(args.json_dir)
+    else:
+        write_coverage(coverage_by_chapter(load_corpus_table(args.json_dir)), args.format)
+
 if __name__ == "__main__":
-    analyze_vocabulary_data()
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""热点路径基准测试：解析、保存、增强、分析和服务器取章节
+
+每个规模的语料依次运行各阶段：
+    parse    parse_vocabulary_file
+    save     save_chapters_as_json
+    enrich   complete_enhancement（与其 main 相同，逐个处理章节文件）
+    analyze  analyze_vocabulary_data
+    serve    生产模式服务器取回全部章节（首次未命中，再取一次命中缓存）
+
+1x 是真实的 vocabulary.txt，10x、100x 是 generate_vocabulary.py 生成的同等分布的合成语料
+（单词数为真实语料的相应倍数，种子固定）。
+计时运行 --repeat 次取中位数；峰值内存用 tracemalloc 单独再跑一次，不影响计时。
+结果写成JSON，--compare 与保存的基线比较，超出容差的阶段视为性能回退（退出码1）。
+"""
+
+import argparse
+import contextlib
+import functools
+import http.client
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import urllib.parse
+
+from generate_vocabulary import SEED
+from parse_vocabulary import iter_vocabulary_entries, parse_vocabulary_file, save_chapters_as_json
+
+STAGES = ("parse", "save", "enrich", "analyze", "serve")
+SCALES = (1, 10, 100)
+REPEAT = 3
+TOLERANCE = 0.2
+# 短于此时间的阶段计时噪声太大，不判断回退
+MIN_SECONDS = 0.005
+
+def write_scaled_corpus(source, factor, path, seed=SEED):
+    """生成单词数为 source 的 factor 倍的合成语料"""
+    from generate_vocabulary import write_corpus
+
+    words = sum(1 for _ in iter_vocabulary_entries(source))
+    with open(path, "w", encoding="utf-8") as f:
+        write_corpus(f, words=words * factor, seed=seed)
+    return path
+
+def run_enrich(json_dir):
+    import complete_enhancement
+    from chapter_store import list_chapter_files
+
+    return sum(complete_enhancement.process_chapter_file(filepath) for filepath in list_chapter_files(json_dir))
+
+def run_analyze(json_dir):
+    from analyze_vocabulary import analyze_vocabulary_data
+
+    analyze_vocabulary_data(json_dir)
+
+@contextlib.contextmanager
+def serving(root):
+    """在后台线程运行生产模式服务器，返回端口；启动和关闭不计入计时"""
+    import server
+
+    server.ProductionHandler.cache = server.AssetCache()
+    handler = functools.partial(server.ProductionHandler, directory=root)
+    httpd = server.http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield httpd.server_address[1]
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+def run_serve(port, json_dir):
+    """取回每个章节两次（首次未命中缓存），返回传输的字节数"""
+    total = 0
+    names = sorted(name for name in os.listdir(json_dir) if name.endswith(".json"))
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    for _ in range(2):
+        for name in names:
+            path = urllib.parse.quote(f"/{os.path.basename(json_dir)}/{name}")
+            connection.request("GET", path, headers={"Accept-Encoding": "gzip"})
+            total += len(connection.getresponse().read())
+    connection.close()
+    return total
+
+def run_pipeline(source, workdir):
+    """依次运行所有阶段，返回 {阶段: 秒数}"""
+    json_dir = os.path.join(workdir, "json_chapters")
+    timings = {}
+
+    def timed(stage, func, *args):
+        started = time.perf_counter()
+        result = func(*args)
+        timings[stage] = time.perf_counter() - started
+        return result
+
+    # 各阶段的输出和服务器的请求日志与计时无关，统一丢弃
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        chapters = timed("parse", parse_vocabulary_file, source)
+        timed("save", save_chapters_as_json, chapters, json_dir)
+        del chapters
+        timed("enrich", run_enrich, json_dir)
+        timed("analyze", run_analyze, json_dir)
+        with serving(workdir) as port:
+            timed("serve", run_serve, port, json_dir)
+    return timings
+
+def traced_peak(func, *args):
+    """func 运行期间 tracemalloc 记录的峰值（字节）"""
+    tracemalloc.start()
+    try:
+        func(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def measure_memory(source, workdir):
+    """每个阶段的峰值内存，{阶段: 字节}"""
+    json_dir = os.path.join(workdir, "json_chapters")
+    peaks = {}
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        peaks["parse"] = traced_peak(parse_vocabulary_file, source)
+        peaks["save"] = traced_peak(lambda: save_chapters_as_json(parse_vocabulary_file(source), json_dir))
+        peaks["enrich"] = traced_peak(run_enrich, json_dir)
+        peaks["analyze"] = traced_peak(run_analyze, json_dir)
+        with serving(workdir) as port:
+            peaks["serve"] = traced_peak(run_serve, port, json_dir)
+    return peaks
+
+def benchmark_scale(source, factor, repeat=REPEAT, memory=True, seed=SEED):
+    """一个规模的结果：{阶段: {"seconds", "min", "runs", "peak_bytes"}}"""
+    with tempfile.TemporaryDirectory(prefix=f"bench-{factor}x-") as workdir:
+        corpus = source if factor == 1 else write_scaled_corpus(source, factor, os.path.join(workdir, "vocabulary.txt"), seed)
+        runs = []
+        for _ in range(repeat):
+            with tempfile.TemporaryDirectory(dir=workdir) as rundir:
+                runs.append(run_pipeline(corpus, rundir))
+        peaks = {}
+        if memory:
+            with tempfile.TemporaryDirectory(dir=workdir) as rundir:
+                peaks = measure_memory(corpus, rundir)
+        word_count = sum(len(words) for words in parse_vocabulary_file(corpus).values())
+
+    results = {"words": word_count, "stages": {}}
+    for stage in STAGES:
+        seconds = [timings[stage] for timings in runs]
+        results["stages"][stage] = {
+            "seconds": round(statistics.median(seconds), 6),
+            "min": round(min(seconds), 6),
+            "runs": [round(value, 6) for value in seconds],
+            "peak_bytes": peaks.get(stage),
+        }
+    return results
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare_results(results, baseline, tolerance=TOLERANCE):
+    """与基线比较，返回 [(规模, 阶段, 指标, 基线值, 当前值, 比例), ...] 中超出容差的项"""
+    regressions = []
+    for scale, current in results["scales"].items():
+        previous = baseline.get("scales", {}).get(scale)
+        if previous is None:
+            continue
+        for stage, values in current["stages"].items():
+            old = previous["stages"].get(stage)
+            if old is None:
+                continue
+            for metric in ("seconds", "peak_bytes"):
+                before, after = old.get(metric), values.get(metric)
+                if not before or after is None:
+                    continue
+                if metric == "seconds" and max(before, after) < MIN_SECONDS:
+                    continue
+                ratio = after / before
+                if ratio > 1 + tolerance:
+                    regressions.append((scale, stage, metric, before, after, ratio))
+    return regressions
+
+def format_bytes(value):
+    return "-" if value is None else f"{value / (1024 * 1024):.1f} MB"
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the parse, enrich, analyze and serve hot paths")
+    parser.add_argument("--source", default="vocabulary.txt")
+    parser.add_argument("--scales", type=int, nargs="+", default=list(SCALES),
+                        help="corpus sizes as multiples of the source; above 1 a synthetic corpus is generated "
+                             "(default: 1 10 100)")
+    parser.add_argument("--seed", type=int, default=SEED, help="seed for the synthetic corpora")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="timed runs per scale (median is reported)")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run")
+    parser.add_argument("--output", metavar="PATH", help="write results as JSON")
+    parser.add_argument("--compare", metavar="BASELINE", help="flag regressions against a previous results file")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="allowed slowdown or memory growth before a stage counts as a regression (default: 0.2)")
+    args = parser.parse_args()
+
+    results = {
+        "meta": {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "scales": {},
+    }
+
+    for factor in args.scales:
+        scale = f"{factor}x"
+        print(f"⏱  {scale} ...", file=sys.stderr)
+        results["scales"][scale] = result = benchmark_scale(args.source, factor, args.repeat, not args.no_memory, args.seed)
+        print(f"{scale} ({result['words']} words)")
+        for stage, values in result["stages"].items():
+            print(f"  {stage:<8} {values['seconds'] * 1000:>10.1f} ms  (min {values['min'] * 1000:.1f})"
+                  f"  peak {format_bytes(values['peak_bytes'])}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\nSaved results to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_results(results, baseline, args.tolerance)
+        print(f"\nCompared with {args.compare} (revision {baseline.get('meta', {}).get('revision')}):")
+        for scale, stage, metric, before, after, ratio in regressions:
+            if metric == "seconds":
+                before, after = f"{before * 1000:.1f} ms", f"{after * 1000:.1f} ms"
+            else:
+                before, after = format_bytes(before), format_bytes(after)
+            print(f"  ❌ {scale} {stage} {metric}: {before} → {after} ({ratio:.2f}x)")
+        if regressions:
+            sys.exit(1)
+        print("  ✅ no regressions")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""紧凑的二进制语料格式，以及基于 mmap 的随机访问读取器
+
+文件布局（小端序）：
+    header      magic(8) version chapter_count word_count headword_count
+                chapters_offset words_offset headwords_offset strings_offset
+    chapters    每章16字节：name(off, len) first_word word_count
+    words       每词68字节：chapter + FIELDS 中每个字段的 (off, len)
+    headwords   每条12字节：key(off, len) word_index，按key字节序排序
+    strings     去重后的 UTF-8 字符串表
+
+按序号或词头查词都只读取定长记录和对应的字符串，不需要解析JSON。
+"""
+
+import argparse
+import mmap
+import os
+import struct
+
+from chapter_store import JSON_DIR, atomic_write, load_chapter
+from headword_index import headword_variants, normalize_headword
+from parse_vocabulary import load_index
+
+MAGIC = b"IELTSBC1"
+VERSION = 1
+FIELDS = ("word", "pos", "meaning", "phonetic", "example", "example_translation", "tips", "note")
+CORPUS_FILE = os.path.join(JSON_DIR, "corpus.bin")
+
+HEADER = struct.Struct("<8s8I")
+CHAPTER = struct.Struct("<4I")
+WORD = struct.Struct("<I" + "2I" * len(FIELDS))
+HEADWORD = struct.Struct("<3I")
+
+class StringTable:
+    """写入时使用的去重字符串表"""
+
+    def __init__(self):
+        self.data = bytearray()
+        self.offsets = {}
+
+    def add(self, text):
+        if not text:
+            return 0, 0
+        encoded = text.encode("utf-8")
+        if encoded not in self.offsets:
+            self.offsets[encoded] = len(self.data)
+            self.data += encoded
+        return self.offsets[encoded], len(encoded)
+
+def export_binary_corpus(json_dir=JSON_DIR, output_path=CORPUS_FILE):
+    """把 json_chapters 导出为二进制语料文件，返回单词数"""
+    strings = StringTable()
+    chapter_records = []
+    word_records = []
+    headwords = []
+
+    for chapter in load_index(json_dir)["chapters"]:
+        data = load_chapter(os.path.join(json_dir, chapter["file"]))
+        chapter_index = len(chapter_records)
+        chapter_records.append(CHAPTER.pack(*strings.add(chapter["name"]), len(word_records), len(data["words"])))
+
+        for word_obj in data["words"]:
+            word_index = len(word_records)
+            fields = []
+            for field in FIELDS:
+                fields.extend(strings.add(word_obj.get(field, "")))
+            word_records.append(WORD.pack(chapter_index, *fields))
+
+            for variant in headword_variants(word_obj.get("word", "")):
+                headwords.append((variant.encode("utf-8"), word_index))
+
+    headwords.sort()
+    headword_records = [HEADWORD.pack(*strings.add(key.decode("utf-8")), word_index)
+                        for key, word_index in headwords]
+
+    chapters_offset = HEADER.size
+    words_offset = chapters_offset + CHAPTER.size * len(chapter_records)
+    headwords_offset = words_offset + WORD.size * len(word_records)
+    strings_offset = headwords_offset + HEADWORD.size * len(headword_records)
+
+    # 原子替换：正在 mmap 旧文件的读者不受影响
+    atomic_write(output_path, b"".join([
+        HEADER.pack(MAGIC, VERSION, len(chapter_records), len(word_records), len(headword_records),
+                    chapters_offset, words_offset, headwords_offset, strings_offset),
+        *chapter_records, *word_records, *headword_records, strings.data,
+    ]))
+
+    print(f"Saved binary corpus: {len(word_records)} words, {os.path.getsize(output_path)} bytes to {output_path}")
+    return len(word_records)
+
+class BinaryCorpus:
+    """mmap 方式读取二进制语料，按序号或词头随机访问单词"""
+
+    def __init__(self, path=CORPUS_FILE):
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mm)
+
+        (magic, version, self.chapter_count, self.word_count, self.headword_count,
+         self._chapters_offset, self._words_offset, self._headwords_offset,
+         self._strings_offset) = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} binary corpus")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.word_count
+
+    def close(self):
+        self._view.release()
+        self._mm.close()
+        self._file.close()
+
+    def _string(self, offset, length):
+        """字符串表中的一段（memoryview，零拷贝），只在方法内部临时使用"""
+        start = self._strings_offset + offset
+        return self._view[start:start + length]
+
+    def _word_record(self, index):
+        if not 0 <= index < self.word_count:
+            raise IndexError(index)
+        return WORD.unpack_from(self._mm, self._words_offset + index * WORD.size)
+
+    def _field_string(self, index, field):
+        record = self._word_record(index)
+        position = 1 + 2 * FIELDS.index(field)
+        return self._string(record[position], record[position + 1])
+
+    def raw_field(self, index, field):
+        """字段的原始 UTF-8 字节
+
+        返回 bytes 而不是 memoryview：调用方持有的 memoryview 会让 mmap 无法关闭。
+        """
+        with self._field_string(index, field) as view:
+            return view.tobytes()
+
+    def field(self, index, field):
+        with self._field_string(index, field) as view:
+            return str(view, "utf-8")
+
+    def word(self, index):
+        """按序号读取单词，返回与章节JSON相同形式的字典"""
+        record = self._word_record(index)
+        word_obj = {}
+        for position, field in enumerate(FIELDS):
+            offset, length = record[1 + 2 * position], record[2 + 2 * position]
+            if length:
+                word_obj[field] = str(self._string(offset, length), "utf-8")
+        return word_obj
+
+    def chapter(self, index):
+        """返回 (章节名, 第一个单词序号, 单词数)"""
+        if not 0 <= index < self.chapter_count:
+            raise IndexError(index)
+        name_offset, name_length, first_word, word_count = CHAPTER.unpack_from(
+            self._mm, self._chapters_offset + index * CHAPTER.size)
+        return str(self._string(name_offset, name_length), "utf-8"), first_word, word_count
+
+    def chapter_of(self, index):
+        return self.chapter(self._word_record(index)[0])[0]
+
+    def _headword_key(self, position):
+        key_offset, key_length, _ = HEADWORD.unpack_from(self._mm, self._headwords_offset + position * HEADWORD.size)
+        start = self._strings_offset + key_offset
+        return self._mm[start:start + key_length]
+
+    def find(self, headword):
+        """按词头（含拼写变体，不区分大小写）二分查找，返回单词序号列表"""
+        key = normalize_headword(headword).encode("utf-8")
+        low, high = 0, self.headword_count
+        while low < high:
+            middle = (low + high) // 2
+            if self._headword_key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+
+        indices = []
+        while low < self.headword_count and self._headword_key(low) == key:
+            indices.append(HEADWORD.unpack_from(self._mm, self._headwords_offset + low * HEADWORD.size)[2])
+            low += 1
+        return indices
+
+    def lookup(self, headword):
+        """按词头查询，返回单词字典列表"""
+        return [self.word(index) for index in self.find(headword)]
+
+def main():
+    parser = argparse.ArgumentParser(description="Export json_chapters as a binary corpus or query one")
+    parser.add_argument("--json-dir", default=JSON_DIR)
+    parser.add_argument("--output", default=CORPUS_FILE)
+    parser.add_argument("--lookup", nargs="+", default=[], metavar="WORD",
+                        help="query an existing corpus instead of exporting")
+    args = parser.parse_args()
+
+    if not args.lookup:
+        export_binary_corpus(args.json_dir, args.output)
+        return
+
+    with BinaryCorpus(args.output) as corpus:
+        for headword in args.lookup:
+            for index in corpus.find(headword):
+                print(f"{corpus.chapter_of(index)}#{index}: {corpus.word(index)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""构建用于部署的静态网站 dist/
+
+- 章节JSON压缩为紧凑格式，文件名带内容哈希（如 交通旅行.3fa9c1d2e4.json）
+- index.json 的 file 字段改写为带哈希的文件名
+- 每个章节另有带哈希的列表文件和详情分片（见 chapter_split.py），index.json 的
+  summary 字段指向列表文件
+- 搜索索引（见 search_index.py）的分片文件名带内容哈希，meta.json 记录文件名
+- style.css 和 JS 文件同样带内容哈希，HTML 中的引用随之改写
+- 不复制 ._* 资源分叉文件和脚本、原始数据等非网站文件
+
+带哈希的文件内容不变则文件名不变，可以长期缓存；只有 HTML 和 index.json 需要重新验证。
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+
+from chapter_split import SPLIT_DIR, split_payloads
+from chapter_store import JSON_DIR, load_chapter
+from search_index import SEARCH_INDEX_DIR, build_search_index, save_search_index
+
+DIST_DIR = "dist"
+HTML_FILES = ("index.html", "chapter.html")
+HASHED_ASSETS = ("style.css", "progress.js", "anki.js", "search.js")
+HASH_LENGTH = 10
+
+def content_hash(body):
+    return hashlib.sha256(body).hexdigest()[:HASH_LENGTH]
+
+def hashed_name(filename, body):
+    """交通旅行.json -> 交通旅行.<哈希>.json"""
+    stem, ext = os.path.splitext(filename)
+    return f"{stem}.{content_hash(body)}{ext}"
+
+def minify_json(data):
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def write_file(path, body):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(body)
+
+def build_chapters(json_dir, dist_dir):
+    """写入带哈希的压缩章节文件和改写后的 index.json，返回 (原大小, 新大小)"""
+    index = load_chapter(os.path.join(json_dir, "index.json"))
+    out_dir = os.path.join(dist_dir, "json_chapters")
+    raw_size = built_size = 0
+
+    chapters = []
+    for entry in index["chapters"]:
+        source = os.path.join(json_dir, entry["file"])
+        data = load_chapter(source)
+        body = minify_json(data)
+        filename = hashed_name(entry["file"], body)
+        write_file(os.path.join(out_dir, filename), body)
+        raw_size += os.path.getsize(source)
+        built_size += len(body)
+        chapters.append({"name": entry["name"], "word_count": entry["word_count"], "file": filename,
+                         "summary": build_split(data, out_dir)})
+
+    # index.json 是入口，文件名不能变
+    write_file(os.path.join(out_dir, "index.json"),
+               minify_json({"total_chapters": len(chapters), "chapters": chapters}))
+    return raw_size, built_size
+
+def build_split(data, out_dir):
+    """写入带哈希的详情分片和列表文件，返回列表文件相对 json_chapters 的路径"""
+    chapter_name = data["chapter"]
+    summary, shards = split_payloads(chapter_name, data["words"])
+    for n, shard in enumerate(shards):
+        body = minify_json(shard)
+        summary["shards"][n] = hashed_name(summary["shards"][n], body)
+        write_file(os.path.join(out_dir, SPLIT_DIR, chapter_name, summary["shards"][n]), body)
+
+    body = minify_json(summary)
+    filename = hashed_name("summary.json", body)
+    write_file(os.path.join(out_dir, SPLIT_DIR, chapter_name, filename), body)
+    return f"{SPLIT_DIR}/{chapter_name}/{filename}"
+
+def build_assets(root, dist_dir):
+    """复制带哈希的 CSS/JS，返回 原文件名 -> 哈希文件名"""
+    names = {}
+    for filename in HASHED_ASSETS:
+        with open(os.path.join(root, filename), "rb") as f:
+            body = f.read()
+        names[filename] = hashed_name(filename, body)
+        write_file(os.path.join(dist_dir, names[filename]), body)
+    return names
+
+def build_html(root, dist_dir, asset_names):
+    """复制 HTML，把 href/src 引用改为带哈希的文件名"""
+    pattern = re.compile(r'((?:href|src)=")(%s)(")' % "|".join(re.escape(name) for name in asset_names))
+    for filename in HTML_FILES:
+        with open(os.path.join(root, filename), "r", encoding="utf-8") as f:
+            html = f.read()
+        html = pattern.sub(lambda m: m.group(1) + asset_names[m.group(2)] + m.group(3), html)
+        write_file(os.path.join(dist_dir, filename), html.encode("utf-8"))
+
+def build_site(root=".", json_dir=None, dist_dir=DIST_DIR):
+    json_dir = json_dir or os.path.join(root, JSON_DIR)
+    # 每次都从空目录开始，不留下旧哈希的文件
+    if os.path.exists(dist_dir):
+        shutil.rmtree(dist_dir)
+    os.makedirs(dist_dir)
+
+    raw_size, built_size = build_chapters(json_dir, dist_dir)
+    meta, shards = build_search_index(json_dir)
+    save_search_index(meta, shards, os.path.join(dist_dir, "json_chapters", SEARCH_INDEX_DIR), hashed=True)
+    asset_names = build_assets(root, dist_dir)
+    build_html(root, dist_dir, asset_names)
+    return raw_size, built_size, asset_names
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the content-hashed static site into dist/")
+    parser.add_argument("--json-dir", default=None, help=f"chapter JSON directory (default: {JSON_DIR})")
+    parser.add_argument("--output", default=None, help=f"output directory (default: {DIST_DIR})")
+    args = parser.parse_args()
+
+    root = os.path.dirname(os.path.abspath(__file__))
+    output = args.output or os.path.join(root, DIST_DIR)
+    raw_size, built_size, asset_names = build_site(root, args.json_dir, output)
+
+    print(f"✅ 网站已构建到 {output}/")
+    print(f"   章节JSON: {raw_size} → {built_size} 字节 ({built_size / raw_size:.0%})")
+    for source, target in asset_names.items():
+        print(f"   {source} → {target}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""把章节拆分为轻量的列表文件和按需加载的详情分片
+
+json_chapters/split/<章节>/summary.json   词头、词性、释义、音标和 id
+json_chapters/split/<章节>/detail-<n>.json 每片约32个单词的其余字段（例句、翻译、技巧、笔记）
+
+id 是单词在章节 words 中的下标，所在分片为 id // shard_size。
+页面先用 summary.json 渲染单词列表，再按需取回详情分片。
+"""
+
+import argparse
+import json
+import os
+import shutil
+
+from chapter_store import JSON_DIR, list_chapter_files, load_chapter
+
+SPLIT_DIR = "split"
+SHARD_SIZE = 32
+SUMMARY_FIELDS = ("word", "pos", "meaning", "phonetic")
+
+def summary_entry(word_id, word_obj):
+    entry = {"id": word_id}
+    for field in SUMMARY_FIELDS:
+        if field in word_obj:
+            entry[field] = word_obj[field]
+    return entry
+
+def detail_entry(word_id, word_obj):
+    entry = {"id": word_id}
+    for field, value in word_obj.items():
+        if field not in SUMMARY_FIELDS:
+            entry[field] = value
+    return entry
+
+def dump_compact(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+
+def split_payloads(chapter_name, words, shard_size=SHARD_SIZE):
+    """返回 (summary, 详情分片列表)，summary["shards"] 中是分片的默认文件名"""
+    shards = []
+    for start in range(0, len(words), shard_size):
+        shards.append({
+            "chapter": chapter_name,
+            "start": start,
+            "words": [detail_entry(start + offset, word_obj)
+                      for offset, word_obj in enumerate(words[start:start + shard_size])],
+        })
+
+    summary = {
+        "chapter": chapter_name,
+        "word_count": len(words),
+        "shard_size": shard_size,
+        "shards": [f"detail-{n}.json" for n in range(len(shards))],
+        "words": [summary_entry(word_id, word_obj) for word_id, word_obj in enumerate(words)],
+    }
+    return summary, shards
+
+def split_chapter(chapter_name, words, split_dir, shard_size=SHARD_SIZE):
+    """写入一个章节的 summary.json 和详情分片，返回分片数"""
+    chapter_dir = os.path.join(split_dir, chapter_name)
+    # 单词数减少时不留下多余的旧分片
+    if os.path.exists(chapter_dir):
+        shutil.rmtree(chapter_dir)
+    os.makedirs(chapter_dir)
+
+    summary, shards = split_payloads(chapter_name, words, shard_size)
+    for filename, shard in zip(summary["shards"], shards):
+        dump_compact(os.path.join(chapter_dir, filename), shard)
+    dump_compact(os.path.join(chapter_dir, "summary.json"), summary)
+    return len(shards)
+
+def export_split_chapters(json_dir=JSON_DIR, split_dir=None, shard_size=SHARD_SIZE):
+    """为 json_dir 中的每个章节生成列表文件和详情分片"""
+    split_dir = split_dir or os.path.join(json_dir, SPLIT_DIR)
+    os.makedirs(split_dir, exist_ok=True)
+
+    total_shards = 0
+    for filepath in list_chapter_files(json_dir):
+        data = load_chapter(filepath)
+        total_shards += split_chapter(data["chapter"], data["words"], split_dir, shard_size)
+    print(f"Saved split chapters to {split_dir} ({total_shards} detail shards)")
+    return split_dir
+
+def load_split_word(split_dir, chapter_name, word_id):
+    """按 id 合并 summary 和详情，得到完整的单词"""
+    chapter_dir = os.path.join(split_dir, chapter_name)
+    summary = load_chapter(os.path.join(chapter_dir, "summary.json"))
+    shard = load_chapter(os.path.join(chapter_dir, summary["shards"][word_id // summary["shard_size"]]))
+    word_obj = dict(summary["words"][word_id])
+    word_obj.update(shard["words"][word_id - shard["start"]])
+    del word_obj["id"]
+    return word_obj
+
+def main():
+    parser = argparse.ArgumentParser(description="Split chapters into summary files and lazily loaded detail shards")
+    parser.add_argument("--json-dir", default=JSON_DIR)
+    parser.add_argument("--output", default=None, help=f"output directory (default: <json-dir>/{SPLIT_DIR})")
+    parser.add_argument("--shard-size", type=int, default=SHARD_SIZE)
+    args = parser.parse_args()
+
+    split_dir = export_split_chapters(args.json_dir, args.output, args.shard_size)
+
+    summary_bytes = full_bytes = 0
+    for filepath in list_chapter_files(args.json_dir):
+        chapter_name = load_chapter(filepath)["chapter"]
+        summary_bytes += os.path.getsize(os.path.join(split_dir, chapter_name, "summary.json"))
+        full_bytes += os.path.getsize(filepath)
+    print(f"首屏数据: {full_bytes} → {summary_bytes} 字节 ({summary_bytes / full_bytes:.0%})")
+
+if __name__ == "__main__":
+    main()
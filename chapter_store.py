@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""章节JSON文件的公共读写工具
+
+所有写入都先写同目录下的临时文件并 fsync，再用 rename 原子替换，进程在任何时刻被
+杀掉都不会留下半个JSON文件。多个文件需要一起生效时（如全部章节加 index.json）
+使用 ChapterBatch：提交时先写入批量日志，崩溃后由 recover_batch 把剩余的替换做完。
+"""
+
+import functools
+import itertools
+import json
+import os
+import glob
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack, contextmanager
+
+import tracing
+
+try:
+    import fcntl
+except ImportError:
+    # Windows 上没有 fcntl，不加锁
+    fcntl = None
+
+JSON_DIR = "json_chapters"
+BATCH_JOURNAL = ".batch-journal.json"
+LOCK_DIR = ".locks"
+_temp_counter = itertools.count()
+
+class TrackedWord(dict):
+    """记录被修改字段的单词字典
+
+    赋值前后值相同不算修改，所以 `dirty` 只包含真正变化的字段，
+    不再需要对整个单词做 json.dumps 比较。
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.dirty = set()
+
+    def __setitem__(self, key, value):
+        if key not in self or self[key] != value:
+            self.dirty.add(key)
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.dirty.add(key)
+
+    def pop(self, key, *default):
+        if key in self:
+            self.dirty.add(key)
+        return super().pop(key, *default)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+def chapter_filename(chapter_name):
+    """章节名对应的安全文件名"""
+    safe_filename = chapter_name.replace('/', '_').replace(' ', '_')
+    return f"{safe_filename}.json"
+
+def list_chapter_files(json_dir=JSON_DIR):
+    """获取所有章节文件（排除index.json）"""
+    # 上次批量写入中途崩溃时先把它做完，读到的总是完整的一批
+    if os.path.exists(os.path.join(json_dir, BATCH_JOURNAL)):
+        recover_batch(json_dir)
+    chapter_files = glob.glob(os.path.join(json_dir, "*.json"))
+    return sorted(f for f in chapter_files if not f.endswith("index.json"))
+
+def chapter_files_in_index_order(json_dir=JSON_DIR):
+    """按 index.json（即 vocabulary.txt 源文件）的章节顺序列出章节文件，不在其中的按文件名排在最后"""
+    chapter_files = list_chapter_files(json_dir)
+    index_path = os.path.join(json_dir, "index.json")
+    if not os.path.exists(index_path):
+        return chapter_files
+    order = {entry["file"]: position for position, entry in enumerate(load_chapter(index_path)["chapters"])}
+    return sorted(chapter_files, key=lambda filepath: order.get(os.path.basename(filepath), len(order)))
+
+def load_chapter(filepath, tracked=False):
+    """读取章节文件；tracked=True 时单词包装为 TrackedWord"""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    if tracked:
+        data["words"] = [TrackedWord(word_obj) for word_obj in data["words"]]
+
+    return data
+
+def encode_json(data, indent=2):
+    """章节文件使用的JSON格式；indent=None 时为紧凑格式"""
+    if indent is None:
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return json.dumps(data, ensure_ascii=False, indent=indent).encode('utf-8')
+
+def write_temp(filepath, body):
+    """写入目标所在目录下的临时文件并 fsync，返回临时文件路径"""
+    directory, name = os.path.split(filepath)
+    os.makedirs(directory or ".", exist_ok=True)
+    temp_path = os.path.join(directory, f".{name}.{os.getpid()}-{next(_temp_counter)}.tmp")
+    with open(temp_path, 'xb') as f:
+        f.write(body)
+        f.flush()
+        os.fsync(f.fileno())
+    return temp_path
+
+def fsync_dir(directory):
+    """让 rename 本身落盘"""
+    try:
+        fd = os.open(directory or ".", os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        # 部分平台和文件系统不支持对目录 fsync
+        pass
+    finally:
+        os.close(fd)
+
+def atomic_write(filepath, body):
+    """原子替换文件内容：读者只会看到旧内容或新内容"""
+    temp_path = write_temp(filepath, body)
+    try:
+        os.replace(temp_path, filepath)
+    except OSError:
+        os.remove(temp_path)
+        raise
+    fsync_dir(os.path.dirname(filepath))
+
+def save_json(filepath, data, indent=2):
+    atomic_write(filepath, encode_json(data, indent))
+
+def save_chapter(filepath, data):
+    """保存章节文件"""
+    save_json(filepath, data)
+
+@contextmanager
+def file_lock(lock_path):
+    """基于 flock 的排他锁，进程退出时自动释放"""
+    if fcntl is None:
+        yield
+        return
+    os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+    with open(lock_path, 'a') as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+def chapter_lock(filepath):
+    """单个章节的读-改-写锁，防止并发的增强任务互相覆盖修改"""
+    directory, name = os.path.split(filepath)
+    return file_lock(os.path.join(directory, LOCK_DIR, f"{name}.lock"))
+
+def store_lock(directory=JSON_DIR):
+    """整个目录的锁：批量提交和恢复互斥"""
+    return file_lock(os.path.join(directory, LOCK_DIR, "batch.lock"))
+
+def batch_writer_lock(directory=JSON_DIR):
+    """批量写入之间互斥：每个批量持有多个章节锁，串行执行才不会以不同顺序加锁而死锁"""
+    return file_lock(os.path.join(directory, LOCK_DIR, "batch-writer.lock"))
+
+def apply_journal(directory, files):
+    """按日志把临时文件 rename 到目标位置；已经完成的项会被跳过"""
+    for temp_path, target in files:
+        temp_path = os.path.join(directory, temp_path)
+        if os.path.exists(temp_path):
+            os.replace(temp_path, os.path.join(directory, target))
+    for target_dir in {os.path.dirname(os.path.join(directory, target)) for _, target in files}:
+        fsync_dir(target_dir)
+
+def remove_orphan_temps(directory):
+    """删除已退出进程留下的临时文件（未提交的批量写入）"""
+    for root, _, filenames in os.walk(directory):
+        for filename in filenames:
+            if not (filename.startswith(".") and filename.endswith(".tmp")):
+                continue
+            pid = filename[:-len(".tmp")].rsplit(".", 1)[-1].split("-")[0]
+            if pid.isdigit() and not pid_alive(int(pid)):
+                os.remove(os.path.join(root, filename))
+
+def pid_alive(pid):
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # 进程存在但属于其他用户，或平台不支持
+        return True
+    return True
+
+def _recover_locked(directory):
+    journal_path = os.path.join(directory, BATCH_JOURNAL)
+    if os.path.exists(journal_path):
+        with open(journal_path, 'r', encoding='utf-8') as f:
+            files = json.load(f)["files"]
+        apply_journal(directory, files)
+        os.remove(journal_path)
+        fsync_dir(directory)
+    remove_orphan_temps(directory)
+
+def recover_batch(directory=JSON_DIR):
+    """完成崩溃前已提交的批量写入，清理未提交的临时文件"""
+    with store_lock(directory):
+        _recover_locked(directory)
+
+class ChapterBatch:
+    """多个文件一起生效的批量写入
+
+    文件先写成各自目录下的临时文件；commit 时把 (临时文件, 目标) 列表原子写入
+    批量日志，这是提交点，随后逐个 rename 并删除日志。提交点之前崩溃，所有目标
+    保持原样；之后崩溃，recover_batch 会完成剩余的 rename。
+
+    每个目标文件从读取（load_chapter 或 lock）或首次写入开始持有它的 chapter_lock，
+    直到提交或放弃，期间并发的增强任务不会修改它，提交也不会覆盖它们的修改。
+
+        with ChapterBatch(output_dir) as batch:
+            data = batch.load_chapter(path)
+            batch.save_chapter(path, data)
+            batch.save_json(index_path, index_data)
+    """
+
+    def __init__(self, directory=JSON_DIR):
+        self.directory = directory
+        self.staged = []
+        self._locks = ExitStack()
+        self._locked = set()
+
+    def lock(self, filepath):
+        """获取文件的章节锁并持有到提交或放弃；在读取要改写的文件之前调用"""
+        key = os.path.abspath(filepath)
+        if key in self._locked:
+            return
+        if not self._locked:
+            self._locks.enter_context(batch_writer_lock(self.directory))
+        self._locks.enter_context(chapter_lock(filepath))
+        self._locked.add(key)
+
+    def load_chapter(self, filepath, tracked=False):
+        """加锁后读取，保证提交前文件不被其他进程修改"""
+        self.lock(filepath)
+        return load_chapter(filepath, tracked)
+
+    def release(self):
+        self._locks.close()
+        self._locked = set()
+
+    def write(self, filepath, body):
+        self.lock(filepath)
+        self.staged.append((write_temp(filepath, body), filepath))
+
+    def save_json(self, filepath, data, indent=2):
+        self.write(filepath, encode_json(data, indent))
+
+    def save_chapter(self, filepath, data):
+        self.save_json(filepath, data)
+
+    def commit(self):
+        try:
+            if not self.staged:
+                return
+            files = [[os.path.relpath(temp_path, self.directory), os.path.relpath(target, self.directory)]
+                     for temp_path, target in self.staged]
+            with store_lock(self.directory):
+                _recover_locked(self.directory)
+                journal_path = os.path.join(self.directory, BATCH_JOURNAL)
+                atomic_write(journal_path, encode_json({"files": files}))
+                apply_journal(self.directory, files)
+                os.remove(journal_path)
+                fsync_dir(self.directory)
+            self.staged = []
+        finally:
+            self.release()
+
+    def discard(self):
+        for temp_path, _ in self.staged:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        self.staged = []
+        self.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.discard()
+        return False
+
+def map_chapter_files(func, chapter_files, jobs=1):
+    """对每个章节文件调用func，按输入顺序返回结果
+
+    jobs > 1 时用进程池并行处理；章节之间互不依赖，结果与串行一致。
+    func 必须是模块级函数（或其 functools.partial），以便传给子进程。
+    """
+    if jobs <= 1 or len(chapter_files) <= 1:
+        return [func(filepath) for filepath in chapter_files]
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        if not tracing.enabled():
+            return list(executor.map(func, chapter_files))
+        # 子进程记录的 span 随结果传回，合并到主进程的 trace 中
+        results = []
+        for result, events in executor.map(functools.partial(tracing.traced_call, func), chapter_files):
+            tracing.merge_events(events)
+            results.append(result)
+        return results
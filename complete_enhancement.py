@@ -1,232 +1,239 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import argparse
 import json
 import os
 import glob
 
+from chapter_store import chapter_lock, load_chapter, map_chapter_files, save_chapter
+from phonetics_store import get_phonetics_store
+from tracing import add_profile_arguments, profiling, span
+
+# 常见植物研究词汇音标（phonetics_store --from-builtin 的导入来源之一）
+PLANT_PHONETICS = {
+    "photosynthesis": "/ˌfəʊtəʊˈsɪnθəsɪs/",
+    "respire": "/rɪˈspaɪə(r)/",
+    "dioxide": "/daɪˈɒksaɪd/",
+    "chlorophyll": "/ˈklɔːrəfɪl/",
+    "cellulose": "/ˈseljʊləʊs/",
+    "glucose": "/ˈɡluːkəʊs/",
+    "starch": "/stɑːtʃ/",
+    "protein": "/ˈprəʊtiːn/",
+    "enzyme": "/ˈenzaɪm/",
+    "molecule": "/ˈmɒlɪkjuːl/",
+    "cell": "/sel/",
+    "tissue": "/ˈtɪʃuː/",
+    "organ": "/ˈɔːɡən/",
+    "organism": "/ˈɔːɡənɪzəm/",
+    "species": "/ˈspiːʃiːz/",
+    "genus": "/ˈdʒiːnəs/",
+    "family": "/ˈfæməli/",
+    "order": "/ˈɔːdə(r)/",
+    "class": "/klɑːs/",
+    "kingdom": "/ˈkɪŋdəm/",
+    "taxonomy": "/tækˈsɒnəmi/",
+    "classification": "/ˌklæsɪfɪˈkeɪʃn/",
+    "botany": "/ˈbɒtəni/",
+    "botanical": "/bəˈtænɪkl/",
+    "flora": "/ˈflɔːrə/",
+    "vegetation": "/ˌvedʒəˈteɪʃn/",
+    "foliage": "/ˈfəʊliɪdʒ/",
+    "leaf": "/liːf/",
+    "leaves": "/liːvz/",
+    "stem": "/stem/",
+    "root": "/ruːt/",
+    "branch": "/brɑːntʃ/",
+    "trunk": "/trʌŋk/",
+    "bark": "/bɑːk/",
+    "flower": "/ˈflaʊə(r)/",
+    "blossom": "/ˈblɒsəm/",
+    "bloom": "/bluːm/",
+    "petal": "/ˈpetl/",
+    "sepal": "/ˈsepəl/",
+    "stamen": "/ˈsteɪmən/",
+    "pistil": "/ˈpɪstɪl/",
+    "pollen": "/ˈpɒlən/",
+    "nectar": "/ˈnektə(r)/",
+    "seed": "/siːd/",
+    "fruit": "/fruːt/",
+    "berry": "/ˈberi/",
+    "nut": "/nʌt/",
+    "grain": "/ɡreɪn/",
+    "pod": "/pɒd/",
+    "kernel": "/ˈkɜːnl/",
+    "sprout": "/spraʊt/",
+    "germinate": "/ˈdʒɜːmɪneɪt/",
+    "cultivate": "/ˈkʌltɪveɪt/",
+    "harvest": "/ˈhɑːvɪst/",
+    "crop": "/krɒp/",
+    "agriculture": "/ˈæɡrɪkʌltʃə(r)/",
+    "horticulture": "/ˈhɔːtɪkʌltʃə(r)/",
+    "forestry": "/ˈfɒrɪstri/",
+    "plantation": "/plænˈteɪʃn/",
+    "orchard": "/ˈɔːtʃəd/",
+    "garden": "/ˈɡɑːdn/",
+    "greenhouse": "/ˈɡriːnhaʊs/",
+    "nursery": "/ˈnɜːsəri/",
+    "fertilizer": "/ˈfɜːtəlaɪzə(r)/",
+    "pesticide": "/ˈpestɪsaɪd/",
+    "herbicide": "/ˈhɜːbɪsaɪd/",
+    "irrigation": "/ˌɪrɪˈɡeɪʃn/",
+    "soil": "/sɔɪl/",
+    "compost": "/ˈkɒmpɒst/",
+    "mulch": "/mʌltʃ/",
+    "pruning": "/ˈpruːnɪŋ/",
+    "grafting": "/ˈɡrɑːftɪŋ/",
+    "transplant": "/trænsˈplɑːnt/",
+    "pollinate": "/ˈpɒləneɪt/",
+    "reproduce": "/ˌriːprəˈdjuːs/",
+    "propagate": "/ˈprɒpəɡeɪt/",
+    "hybrid": "/ˈhaɪbrɪd/",
+    "mutation": "/mjuːˈteɪʃn/",
+    "adaptation": "/ˌædæpˈteɪʃn/",
+    "evolution": "/ˌiːvəˈluːʃn/",
+    "ecology": "/iˈkɒlədʒi/",
+    "ecosystem": "/ˈiːkəʊsɪstəm/",
+    "habitat": "/ˈhæbɪtæt/",
+    "environment": "/ɪnˈvaɪrənmənt/",
+    "climate": "/ˈklaɪmət/",
+    "weather": "/ˈweðə(r)/",
+    "seasonal": "/ˈsiːznəl/",
+    "perennial": "/pəˈreniəl/",
+    "annual": "/ˈænjuəl/",
+    "biennial": "/baɪˈeniəl/",
+    "deciduous": "/dɪˈsɪdjuəs/",
+    "evergreen": "/ˈevəɡriːn/",
+    "coniferous": "/kəˈnɪfərəs/",
+    "hardwood": "/ˈhɑːdwʊd/",
+    "softwood": "/ˈsɒftwʊd/",
+    "timber": "/ˈtɪmbə(r)/",
+    "lumber": "/ˈlʌmbə(r)/",
+    "wood": "/wʊd/",
+    "woody": "/ˈwʊdi/",
+    "herbaceous": "/hɜːˈbeɪʃəs/",
+    "shrub": "/ʃrʌb/",
+    "bush": "/bʊʃ/",
+    "tree": "/triː/",
+    "grass": "/ɡrɑːs/",
+    "weed": "/wiːd/",
+    "moss": "/mɒs/",
+    "fern": "/fɜːn/",
+    "algae": "/ˈældʒiː/",
+    "fungus": "/ˈfʌŋɡəs/",
+    "fungi": "/ˈfʌŋɡaɪ/",
+    "mushroom": "/ˈmʌʃruːm/",
+    "lichen": "/ˈlaɪkən/",
+    "vine": "/vaɪn/",
+    "climber": "/ˈklaɪmə(r)/",
+    "creeper": "/ˈkriːpə(r)/",
+    "cactus": "/ˈkæktəs/",
+    "succulent": "/ˈsʌkjələnt/",
+    "herb": "/hɜːb/",
+    "spice": "/spaɪs/",
+    "medicinal": "/məˈdɪsɪnl/",
+    "aromatic": "/ˌærəˈmætɪk/",
+    "fragrant": "/ˈfreɪɡrənt/",
+    "scent": "/sent/",
+    "aroma": "/əˈrəʊmə/",
+    "perfume": "/ˈpɜːfjuːm/",
+    "toxic": "/ˈtɒksɪk/",
+    "poisonous": "/ˈpɔɪzənəs/",
+    "edible": "/ˈedəbl/",
+    "nutritious": "/njuːˈtrɪʃəs/",
+    "vitamin": "/ˈvɪtəmɪn/",
+    "mineral": "/ˈmɪnərəl/",
+    "fiber": "/ˈfaɪbə(r)/",
+    "fibre": "/ˈfaɪbə(r)/",
+    "carbohydrate": "/ˌkɑːbəʊˈhaɪdreɪt/",
+    "fat": "/fæt/",
+    "oil": "/ɔɪl/",
+    "resin": "/ˈrezɪn/",
+    "sap": "/sæp/",
+    "latex": "/ˈleɪteks/",
+    "rubber": "/ˈrʌbə(r)/",
+    "cotton": "/ˈkɒtn/",
+    "linen": "/ˈlɪnən/",
+    "hemp": "/hemp/",
+    "bamboo": "/bæmˈbuː/",
+    "palm": "/pɑːm/",
+    "pine": "/paɪn/",
+    "oak": "/əʊk/",
+    "maple": "/ˈmeɪpl/",
+    "willow": "/ˈwɪləʊ/",
+    "birch": "/bɜːtʃ/",
+    "cedar": "/ˈsiːdə(r)/",
+    "cherry": "/ˈtʃeri/",
+    "apple": "/ˈæpl/",
+    "orange": "/ˈɒrɪndʒ/",
+    "lemon": "/ˈlemən/",
+    "banana": "/bəˈnɑːnə/",
+    "grape": "/ɡreɪp/",
+    "strawberry": "/ˈstrɔːbəri/",
+    "tomato": "/təˈmɑːtəʊ/",
+    "potato": "/pəˈteɪtəʊ/",
+    "carrot": "/ˈkærət/",
+    "onion": "/ˈʌnjən/",
+    "garlic": "/ˈɡɑːlɪk/",
+    "lettuce": "/ˈletɪs/",
+    "cabbage": "/ˈkæbɪdʒ/",
+    "spinach": "/ˈspɪnɪtʃ/",
+    "broccoli": "/ˈbrɒkəli/",
+    "cauliflower": "/ˈkɒliˌflaʊə(r)/",
+    "cucumber": "/ˈkjuːkʌmbə(r)/",
+    "pepper": "/ˈpepə(r)/",
+    "corn": "/kɔːn/",
+    "wheat": "/wiːt/",
+    "rice": "/raɪs/",
+    "barley": "/ˈbɑːli/",
+    "oats": "/əʊts/",
+    "rye": "/raɪ/",
+    "bean": "/biːn/",
+    "pea": "/piː/",
+    "lentil": "/ˈlentɪl/",
+    "soybean": "/ˈsɔɪbiːn/",
+    "sunflower": "/ˈsʌnflaʊə(r)/",
+    "rose": "/rəʊz/",
+    "tulip": "/ˈtuːlɪp/",
+    "daisy": "/ˈdeɪzi/",
+    "lily": "/ˈlɪli/",
+    "orchid": "/ˈɔːkɪd/",
+    "jasmine": "/ˈdʒæzmɪn/",
+    "lavender": "/ˈlævəndə(r)/",
+    "mint": "/mɪnt/",
+    "basil": "/ˈbæzl/",
+    "thyme": "/taɪm/",
+    "rosemary": "/ˈrəʊzməri/",
+    "parsley": "/ˈpɑːsli/",
+    "sage": "/seɪdʒ/",
+    "oregano": "/ɒrɪˈɡɑːnəʊ/",
+    "coriander": "/ˌkɒriˈændə(r)/",
+    "cilantro": "/sɪˈlæntrəʊ/",
+    "dill": "/dɪl/",
+    "fennel": "/ˈfenl/",
+    "ginger": "/ˈdʒɪndʒə(r)/",
+    "turmeric": "/ˈtɜːmərɪk/",
+    "cinnamon": "/ˈsɪnəmən/",
+    "clove": "/kləʊv/",
+    "nutmeg": "/ˈnʌtmeɡ/",
+    "vanilla": "/vəˈnɪlə/",
+    "cocoa": "/ˈkəʊkəʊ/",
+    "coffee": "/ˈkɒfi/",
+    "tea": "/tiː/",
+    "sugar": "/ˈʃʊɡə(r)/",
+    "honey": "/ˈhʌni/",
+    "syrup": "/ˈsɪrəp/",
+    "nectar": "/ˈnektə(r)/"
+}
+
 def add_phonetic_if_missing(word_obj):
     """为缺少音标的单词添加音标"""
     word = word_obj.get("word", "").strip()
     
-    # 常见植物研究词汇音标
-    plant_phonetics = {
-        "photosynthesis": "/ˌfəʊtəʊˈsɪnθəsɪs/",
-        "respire": "/rɪˈspaɪə(r)/",
-        "dioxide": "/daɪˈɒksaɪd/",
-        "chlorophyll": "/ˈklɔːrəfɪl/",
-        "cellulose": "/ˈseljʊləʊs/",
-        "glucose": "/ˈɡluːkəʊs/",
-        "starch": "/stɑːtʃ/",
-        "protein": "/ˈprəʊtiːn/",
-        "enzyme": "/ˈenzaɪm/",
-        "molecule": "/ˈmɒlɪkjuːl/",
-        "cell": "/sel/",
-        "tissue": "/ˈtɪʃuː/",
-        "organ": "/ˈɔːɡən/",
-        "organism": "/ˈɔːɡənɪzəm/",
-        "species": "/ˈspiːʃiːz/",
-        "genus": "/ˈdʒiːnəs/",
-        "family": "/ˈfæməli/",
-        "order": "/ˈɔːdə(r)/",
-        "class": "/klɑːs/",
-        "kingdom": "/ˈkɪŋdəm/",
-        "taxonomy": "/tækˈsɒnəmi/",
-        "classification": "/ˌklæsɪfɪˈkeɪʃn/",
-        "botany": "/ˈbɒtəni/",
-        "botanical": "/bəˈtænɪkl/",
-        "flora": "/ˈflɔːrə/",
-        "vegetation": "/ˌvedʒəˈteɪʃn/",
-        "foliage": "/ˈfəʊliɪdʒ/",
-        "leaf": "/liːf/",
-        "leaves": "/liːvz/",
-        "stem": "/stem/",
-        "root": "/ruːt/",
-        "branch": "/brɑːntʃ/",
-        "trunk": "/trʌŋk/",
-        "bark": "/bɑːk/",
-        "flower": "/ˈflaʊə(r)/",
-        "blossom": "/ˈblɒsəm/",
-        "bloom": "/bluːm/",
-        "petal": "/ˈpetl/",
-        "sepal": "/ˈsepəl/",
-        "stamen": "/ˈsteɪmən/",
-        "pistil": "/ˈpɪstɪl/",
-        "pollen": "/ˈpɒlən/",
-        "nectar": "/ˈnektə(r)/",
-        "seed": "/siːd/",
-        "fruit": "/fruːt/",
-        "berry": "/ˈberi/",
-        "nut": "/nʌt/",
-        "grain": "/ɡreɪn/",
-        "pod": "/pɒd/",
-        "kernel": "/ˈkɜːnl/",
-        "sprout": "/spraʊt/",
-        "germinate": "/ˈdʒɜːmɪneɪt/",
-        "cultivate": "/ˈkʌltɪveɪt/",
-        "harvest": "/ˈhɑːvɪst/",
-        "crop": "/krɒp/",
-        "agriculture": "/ˈæɡrɪkʌltʃə(r)/",
-        "horticulture": "/ˈhɔːtɪkʌltʃə(r)/",
-        "forestry": "/ˈfɒrɪstri/",
-        "plantation": "/plænˈteɪʃn/",
-        "orchard": "/ˈɔːtʃəd/",
-        "garden": "/ˈɡɑːdn/",
-        "greenhouse": "/ˈɡriːnhaʊs/",
-        "nursery": "/ˈnɜːsəri/",
-        "fertilizer": "/ˈfɜːtəlaɪzə(r)/",
-        "pesticide": "/ˈpestɪsaɪd/",
-        "herbicide": "/ˈhɜːbɪsaɪd/",
-        "irrigation": "/ˌɪrɪˈɡeɪʃn/",
-        "soil": "/sɔɪl/",
-        "compost": "/ˈkɒmpɒst/",
-        "mulch": "/mʌltʃ/",
-        "pruning": "/ˈpruːnɪŋ/",
-        "grafting": "/ˈɡrɑːftɪŋ/",
-        "transplant": "/trænsˈplɑːnt/",
-        "pollinate": "/ˈpɒləneɪt/",
-        "reproduce": "/ˌriːprəˈdjuːs/",
-        "propagate": "/ˈprɒpəɡeɪt/",
-        "hybrid": "/ˈhaɪbrɪd/",
-        "mutation": "/mjuːˈteɪʃn/",
-        "adaptation": "/ˌædæpˈteɪʃn/",
-        "evolution": "/ˌiːvəˈluːʃn/",
-        "ecology": "/iˈkɒlədʒi/",
-        "ecosystem": "/ˈiːkəʊsɪstəm/",
-        "habitat": "/ˈhæbɪtæt/",
-        "environment": "/ɪnˈvaɪrənmənt/",
-        "climate": "/ˈklaɪmət/",
-        "weather": "/ˈweðə(r)/",
-        "seasonal": "/ˈsiːznəl/",
-        "perennial": "/pəˈreniəl/",
-        "annual": "/ˈænjuəl/",
-        "biennial": "/baɪˈeniəl/",
-        "deciduous": "/dɪˈsɪdjuəs/",
-        "evergreen": "/ˈevəɡriːn/",
-        "coniferous": "/kəˈnɪfərəs/",
-        "hardwood": "/ˈhɑːdwʊd/",
-        "softwood": "/ˈsɒftwʊd/",
-        "timber": "/ˈtɪmbə(r)/",
-        "lumber": "/ˈlʌmbə(r)/",
-        "wood": "/wʊd/",
-        "woody": "/ˈwʊdi/",
-        "herbaceous": "/hɜːˈbeɪʃəs/",
-        "shrub": "/ʃrʌb/",
-        "bush": "/bʊʃ/",
-        "tree": "/triː/",
-        "grass": "/ɡrɑːs/",
-        "weed": "/wiːd/",
-        "moss": "/mɒs/",
-        "fern": "/fɜːn/",
-        "algae": "/ˈældʒiː/",
-        "fungus": "/ˈfʌŋɡəs/",
-        "fungi": "/ˈfʌŋɡaɪ/",
-        "mushroom": "/ˈmʌʃruːm/",
-        "lichen": "/ˈlaɪkən/",
-        "vine": "/vaɪn/",
-        "climber": "/ˈklaɪmə(r)/",
-        "creeper": "/ˈkriːpə(r)/",
-        "cactus": "/ˈkæktəs/",
-        "succulent": "/ˈsʌkjələnt/",
-        "herb": "/hɜːb/",
-        "spice": "/spaɪs/",
-        "medicinal": "/məˈdɪsɪnl/",
-        "aromatic": "/ˌærəˈmætɪk/",
-        "fragrant": "/ˈfreɪɡrənt/",
-        "scent": "/sent/",
-        "aroma": "/əˈrəʊmə/",
-        "perfume": "/ˈpɜːfjuːm/",
-        "toxic": "/ˈtɒksɪk/",
-        "poisonous": "/ˈpɔɪzənəs/",
-        "edible": "/ˈedəbl/",
-        "nutritious": "/njuːˈtrɪʃəs/",
-        "vitamin": "/ˈvɪtəmɪn/",
-        "mineral": "/ˈmɪnərəl/",
-        "fiber": "/ˈfaɪbə(r)/",
-        "fibre": "/ˈfaɪbə(r)/",
-        "carbohydrate": "/ˌkɑːbəʊˈhaɪdreɪt/",
-        "fat": "/fæt/",
-        "oil": "/ɔɪl/",
-        "resin": "/ˈrezɪn/",
-        "sap": "/sæp/",
-        "latex": "/ˈleɪteks/",
-        "rubber": "/ˈrʌbə(r)/",
-        "cotton": "/ˈkɒtn/",
-        "linen": "/ˈlɪnən/",
-        "hemp": "/hemp/",
-        "bamboo": "/bæmˈbuː/",
-        "palm": "/pɑːm/",
-        "pine": "/paɪn/",
-        "oak": "/əʊk/",
-        "maple": "/ˈmeɪpl/",
-        "willow": "/ˈwɪləʊ/",
-        "birch": "/bɜːtʃ/",
-        "cedar": "/ˈsiːdə(r)/",
-        "cherry": "/ˈtʃeri/",
-        "apple": "/ˈæpl/",
-        "orange": "/ˈɒrɪndʒ/",
-        "lemon": "/ˈlemən/",
-        "banana": "/bəˈnɑːnə/",
-        "grape": "/ɡreɪp/",
-        "strawberry": "/ˈstrɔːbəri/",
-        "tomato": "/təˈmɑːtəʊ/",
-        "potato": "/pəˈteɪtəʊ/",
-        "carrot": "/ˈkærət/",
-        "onion": "/ˈʌnjən/",
-        "garlic": "/ˈɡɑːlɪk/",
-        "lettuce": "/ˈletɪs/",
-        "cabbage": "/ˈkæbɪdʒ/",
-        "spinach": "/ˈspɪnɪtʃ/",
-        "broccoli": "/ˈbrɒkəli/",
-        "cauliflower": "/ˈkɒliˌflaʊə(r)/",
-        "cucumber": "/ˈkjuːkʌmbə(r)/",
-        "pepper": "/ˈpepə(r)/",
-        "corn": "/kɔːn/",
-        "wheat": "/wiːt/",
-        "rice": "/raɪs/",
-        "barley": "/ˈbɑːli/",
-        "oats": "/əʊts/",
-        "rye": "/raɪ/",
-        "bean": "/biːn/",
-        "pea": "/piː/",
-        "lentil": "/ˈlentɪl/",
-        "soybean": "/ˈsɔɪbiːn/",
-        "sunflower": "/ˈsʌnflaʊə(r)/",
-        "rose": "/rəʊz/",
-        "tulip": "/ˈtuːlɪp/",
-        "daisy": "/ˈdeɪzi/",
-        "lily": "/ˈlɪli/",
-        "orchid": "/ˈɔːkɪd/",
-        "jasmine": "/ˈdʒæzmɪn/",
-        "lavender": "/ˈlævəndə(r)/",
-        "mint": "/mɪnt/",
-        "basil": "/ˈbæzl/",
-        "thyme": "/taɪm/",
-        "rosemary": "/ˈrəʊzməri/",
-        "parsley": "/ˈpɑːsli/",
-        "sage": "/seɪdʒ/",
-        "oregano": "/ɒrɪˈɡɑːnəʊ/",
-        "coriander": "/ˌkɒriˈændə(r)/",
-        "cilantro": "/sɪˈlæntrəʊ/",
-        "dill": "/dɪl/",
-        "fennel": "/ˈfenl/",
-        "ginger": "/ˈdʒɪndʒə(r)/",
-        "turmeric": "/ˈtɜːmərɪk/",
-        "cinnamon": "/ˈsɪnəmən/",
-        "clove": "/kləʊv/",
-        "nutmeg": "/ˈnʌtmeɡ/",
-        "vanilla": "/vəˈnɪlə/",
-        "cocoa": "/ˈkəʊkəʊ/",
-        "coffee": "/ˈkɒfi/",
-        "tea": "/tiː/",
-        "sugar": "/ˈʃʊɡə(r)/",
-        "honey": "/ˈhʌni/",
-        "syrup": "/ˈsɪrəp/",
-        "nectar": "/ˈnektə(r)/"
-    }
-    
-    if "phonetic" not in word_obj and word in plant_phonetics:
-        word_obj["phonetic"] = plant_phonetics[word]
+    if "phonetic" not in word_obj:
+        phonetic = get_phonetics_store().lookup(word)
+        if phonetic:
+            word_obj["phonetic"] = phonetic
     
     return word_obj
 
@@ -354,34 +361,38 @@ def process_word(word_obj):
 
 def process_chapter_file(filepath):
     """处理单个章节文件"""
-    print(f"Processing: {filepath}")
+    with chapter_lock(filepath):
+        print(f"Processing: {filepath}")
     
-    with open(filepath, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+        with span("load", file=filepath):
+            data = load_chapter(filepath, tracked=True)
     
-    updated_count = 0
+        with span("enrich", file=filepath):
+            for word_obj in data["words"]:
+                process_word(word_obj)
     
-    for i, word_obj in enumerate(data["words"]):
-        original = json.dumps(word_obj, sort_keys=True)
-        enhanced = process_word(word_obj)
-        if json.dumps(enhanced, sort_keys=True) != original:
-            data["words"][i] = enhanced
-            updated_count += 1
+        with span("diff", file=filepath):
+            updated_count = sum(1 for word_obj in data["words"] if word_obj.dirty)
     
-    # 保存更新后的文件
-    if updated_count > 0:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        print(f"  Enhanced {updated_count} words")
-    else:
-        print(f"  No enhancements needed")
+        # 保存更新后的文件
+        if updated_count > 0:
+            with span("write", file=filepath):
+                save_chapter(filepath, data)
+            print(f"  Enhanced {updated_count} words")
+        else:
+            print(f"  No enhancements needed")
     
-    return updated_count
+        return updated_count
 
 def main():
     """主函数：处理所有章节文件"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="number of worker processes for chapter files (default: 1)")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    
     json_dir = "json_chapters"
-    total_updated = 0
     
     # 获取所有章节文件（排除index.json）
     chapter_files = glob.glob(os.path.join(json_dir, "*.json"))
@@ -389,9 +400,12 @@ def main():
     
     print(f"Found {len(chapter_files)} chapter files to enhance\n")
     
-    for filepath in chapter_files:
-        updated = process_chapter_file(filepath)
-        total_updated += updated
+    with profiling(args.profile, args.profile_stacks):
+        updated_counts = map_chapter_files(process_chapter_file, chapter_files, args.jobs)
+    if args.jobs > 1:
+        for filepath, updated in zip(chapter_files, updated_counts):
+            print(f"  {os.path.basename(filepath)}: {updated}")
+    total_updated = sum(updated_counts)
     
     print(f"\nTotal enhancements: {total_updated} words enhanced")
     print("Complete enhancement finished!")
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""整个语料的 SQLite 存储（json_chapters 之外的另一种存储引擎）
+
+- chapters：章节名、顺序、文件名和 source_hash
+- words：每个单词一行，vocabulary.txt 中的原始字段各占一列，fields 记录字段顺序
+- enrichments：音标、记忆技巧、例句翻译等增强字段，每个 (单词, 字段) 一行
+- headwords：规整后的词头及 / 拼写变体 → 单词，用于按词头查询
+
+修改一个字段只写一行（按主键 O(log n)），不再重写整个章节文件。数据库使用 WAL 模式，
+读取不占用事务，写入集中在短的 BEGIN IMMEDIATE 事务里，多个增强进程可以同时写入。
+可以从 json_chapters 导入，也可以导出回同样格式的章节文件。
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import time
+
+from chapter_store import JSON_DIR, ChapterBatch, TrackedWord, chapter_filename, list_chapter_files, load_chapter
+from headword_index import add_chapter_to_index, headword_variants, new_headword_index, save_headword_index
+
+CORPUS_DB = "corpus.sqlite"
+# 与 parse_vocabulary.SOURCE_FIELDS 相同，其余字段都存入 enrichments
+SOURCE_FIELDS = ("word", "pos", "meaning", "example", "note")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chapters (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    position INTEGER NOT NULL,
+    file TEXT NOT NULL,
+    source_hash TEXT
+);
+CREATE TABLE IF NOT EXISTS words (
+    id INTEGER PRIMARY KEY,
+    chapter_id INTEGER NOT NULL REFERENCES chapters (id),
+    position INTEGER NOT NULL,
+    fields TEXT NOT NULL,
+    word TEXT,
+    pos TEXT,
+    meaning TEXT,
+    example TEXT,
+    note TEXT,
+    updated_at REAL NOT NULL,
+    UNIQUE (chapter_id, position)
+);
+CREATE TABLE IF NOT EXISTS enrichments (
+    word_id INTEGER NOT NULL REFERENCES words (id),
+    field TEXT NOT NULL,
+    value TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (word_id, field)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS enrichments_field ON enrichments (field);
+CREATE TABLE IF NOT EXISTS headwords (
+    headword TEXT NOT NULL,
+    word_id INTEGER NOT NULL REFERENCES words (id),
+    PRIMARY KEY (headword, word_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS headwords_word ON headwords (word_id);
+"""
+
+# upsert_enrichments 中表示删除字段的值
+DELETE = object()
+
+class CorpusDB:
+    """语料数据库，多个进程可以各自打开同一个文件并发读写"""
+
+    def __init__(self, path=CORPUS_DB):
+        self.path = path
+        # 与 EnrichmentCache 相同：自动提交模式，写入只在显式的短事务里进行
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _write(self, func, *args):
+        """在 BEGIN IMMEDIATE 事务中执行 func(*args)"""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = func(*args)
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return result
+
+    # 导入和导出
+
+    def import_json(self, json_dir=JSON_DIR):
+        """用 json_chapters 的内容替换数据库中的全部章节，返回导入的单词数"""
+        index_path = os.path.join(json_dir, "index.json")
+        index_entries = {}
+        if os.path.exists(index_path):
+            index_entries = {entry["name"]: entry for entry in load_chapter(index_path)["chapters"]}
+
+        chapters = [load_chapter(filepath) for filepath in list_chapter_files(json_dir)]
+        # 按 index.json 的顺序排列，不在其中的章节放在最后
+        order = {name: position for position, name in enumerate(index_entries)}
+        chapters.sort(key=lambda data: order.get(data["chapter"], len(order)))
+        return self._write(self._import_chapters, chapters, index_entries)
+
+    def _import_chapters(self, chapters, index_entries):
+        for table in ("headwords", "enrichments", "words", "chapters"):
+            self.conn.execute(f"DELETE FROM {table}")
+
+        now = time.time()
+        total = 0
+        for chapter_position, data in enumerate(chapters):
+            name = data["chapter"]
+            entry = index_entries.get(name, {})
+            chapter_id = self.conn.execute(
+                "INSERT INTO chapters (name, position, file, source_hash) VALUES (?, ?, ?, ?)",
+                (name, chapter_position, entry.get("file", chapter_filename(name)), entry.get("source_hash"))).lastrowid
+            for position, word_obj in enumerate(data["words"]):
+                self._insert_word(chapter_id, position, word_obj, now)
+            total += len(data["words"])
+        return total
+
+    def _insert_word(self, chapter_id, position, word_obj, now):
+        word_id = self.conn.execute(
+            "INSERT INTO words (chapter_id, position, fields, word, pos, meaning, example, note, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (chapter_id, position, json.dumps(list(word_obj), ensure_ascii=False),
+             *(word_obj.get(field) for field in SOURCE_FIELDS), now)).lastrowid
+        self.conn.executemany(
+            "INSERT INTO enrichments (word_id, field, value, updated_at) VALUES (?, ?, ?, ?)",
+            ((word_id, field, json.dumps(value, ensure_ascii=False), now)
+             for field, value in word_obj.items() if field not in SOURCE_FIELDS))
+        self._index_headword(word_id, word_obj.get("word") or "")
+        return word_id
+
+    def _index_headword(self, word_id, word):
+        self.conn.execute("DELETE FROM headwords WHERE word_id = ?", (word_id,))
+        self.conn.executemany("INSERT OR IGNORE INTO headwords (headword, word_id) VALUES (?, ?)",
+                              ((variant, word_id) for variant in headword_variants(word) if variant))
+
+    def export_json(self, json_dir=JSON_DIR):
+        """把全部章节、index.json 和词头索引作为一批写回 json_dir，返回章节数
+
+        写入的每个文件从暂存到提交都持有章节锁，不会与增强任务的读-改-写交错。
+        """
+        index_chapters = []
+        # 与 save_chapters_as_json 相同，词头索引按 index.json 的章节顺序编号
+        headword_index = new_headword_index()
+        with ChapterBatch(json_dir) as batch:
+            for chapter in self.chapters():
+                words = self.chapter_words(chapter["name"])
+                batch.save_chapter(os.path.join(json_dir, chapter["file"]),
+                                   {"chapter": chapter["name"], "word_count": len(words), "words": words})
+                entry = {"name": chapter["name"], "word_count": len(words), "file": chapter["file"]}
+                if chapter["source_hash"] is not None:
+                    entry["source_hash"] = chapter["source_hash"]
+                index_chapters.append(entry)
+                add_chapter_to_index(headword_index, chapter["name"], words)
+
+            batch.save_json(os.path.join(json_dir, "index.json"),
+                            {"total_chapters": len(index_chapters), "chapters": index_chapters})
+            save_headword_index(headword_index, json_dir, batch)
+        return len(index_chapters)
+
+    # 查询
+
+    def chapters(self):
+        rows = self.conn.execute("SELECT id, name, file, source_hash FROM chapters ORDER BY position").fetchall()
+        return [{"id": chapter_id, "name": name, "file": file, "source_hash": source_hash}
+                for chapter_id, name, file, source_hash in rows]
+
+    def _chapter_id(self, chapter_name):
+        row = self.conn.execute("SELECT id FROM chapters WHERE name = ?", (chapter_name,)).fetchone()
+        if row is None:
+            raise KeyError(f"Unknown chapter: {chapter_name}")
+        return row[0]
+
+    def _load_words(self, where, params):
+        """按条件读取单词，返回 [(单词id, 章节id, 位置, 单词字典), ...]，字段顺序与导入时相同"""
+        rows = self.conn.execute(
+            f"SELECT id, chapter_id, position, fields, word, pos, meaning, example, note FROM words WHERE {where} "
+            "ORDER BY chapter_id, position", params).fetchall()
+        if not rows:
+            return []
+
+        enrichments = {}
+        placeholders = ",".join("?" * len(rows))
+        for word_id, field, value in self.conn.execute(
+                f"SELECT word_id, field, value FROM enrichments WHERE word_id IN ({placeholders})",
+                [row[0] for row in rows]):
+            enrichments.setdefault(word_id, {})[field] = json.loads(value)
+
+        results = []
+        for word_id, chapter_id, position, fields, *source in rows:
+            values = {field: value for field, value in zip(SOURCE_FIELDS, source) if value is not None}
+            values.update(enrichments.get(word_id, {}))
+            word_obj = {field: values[field] for field in json.loads(fields) if field in values}
+            results.append((word_id, chapter_id, position, word_obj))
+        return results
+
+    def chapter_rows(self, chapter_name, tracked=False):
+        """章节的 [(单词id, 单词字典), ...]；tracked=True 时单词包装为 TrackedWord"""
+        rows = self._load_words("chapter_id = ?", (self._chapter_id(chapter_name),))
+        wrap = TrackedWord if tracked else dict
+        return [(word_id, wrap(word_obj)) for word_id, _, _, word_obj in rows]
+
+    def chapter_words(self, chapter_name):
+        return [word_obj for _, word_obj in self.chapter_rows(chapter_name)]
+
+    def get_word(self, word_id):
+        rows = self._load_words("id = ?", (word_id,))
+        return rows[0][3] if rows else None
+
+    def lookup(self, word):
+        """按词头（含 / 拼写变体）查询，返回 [(章节名, 位置, 单词字典), ...]"""
+        variant = headword_variants(word)[0]
+        rows = self._load_words("id IN (SELECT word_id FROM headwords WHERE headword = ?)", (variant,))
+        names = {chapter["id"]: chapter["name"] for chapter in self.chapters()}
+        return [(names[chapter_id], position, word_obj) for _, chapter_id, position, word_obj in rows]
+
+    def missing(self, field, chapter_name=None):
+        """缺少某个增强字段的单词id"""
+        query = "SELECT id FROM words WHERE NOT EXISTS (SELECT 1 FROM enrichments WHERE word_id = words.id AND field = ?)"
+        params = [field]
+        if chapter_name is not None:
+            query += " AND chapter_id = ?"
+            params.append(self._chapter_id(chapter_name))
+        return [word_id for word_id, in self.conn.execute(query + " ORDER BY id", params)]
+
+    # 批量写入
+
+    def upsert_enrichments(self, rows):
+        """批量写入字段，rows 为 (单词id, 字段, 值) 的可迭代对象，返回写入的行数
+
+        值为 DELETE 时删除该字段。原始字段（word、pos 等）同样可以写入，新字段排在
+        单词已有字段之后。全部行在一个事务中提交。
+        """
+        updates = {}
+        for word_id, field, value in rows:
+            updates.setdefault(word_id, {})[field] = value
+        if not updates:
+            return 0
+        return self._write(self._apply_updates, updates, {})
+
+    def update_words(self, words):
+        """写回被修改的字段，words 为 (单词id, TrackedWord) 的可迭代对象，返回更新的单词数
+
+        只写 dirty 中的字段（已删除的字段随之删除），字段顺序与单词字典一致。
+        """
+        updates, orders = {}, {}
+        for word_id, word_obj in words:
+            if word_obj.dirty:
+                updates[word_id] = {field: word_obj.get(field, DELETE) for field in word_obj.dirty}
+                orders[word_id] = list(word_obj)
+        if not updates:
+            return 0
+        self._write(self._apply_updates, updates, orders)
+        return len(updates)
+
+    def _apply_updates(self, updates, orders):
+        now = time.time()
+        written = 0
+        for word_id, fields in updates.items():
+            row = self.conn.execute("SELECT fields FROM words WHERE id = ?", (word_id,)).fetchone()
+            if row is None:
+                raise KeyError(f"Unknown word id: {word_id}")
+
+            order = orders.get(word_id)
+            if order is None:
+                order = json.loads(row[0])
+                order += [field for field, value in fields.items() if value is not DELETE and field not in order]
+                order = [field for field in order if fields.get(field) is not DELETE]
+
+            source = {field: value for field, value in fields.items() if field in SOURCE_FIELDS}
+            if source:
+                assignments = ", ".join(f"{field} = ?" for field in source)
+                self.conn.execute(f"UPDATE words SET {assignments} WHERE id = ?",
+                                  [None if value is DELETE else value for value in source.values()] + [word_id])
+                if "word" in source:
+                    self._index_headword(word_id, "" if source["word"] is DELETE else source["word"])
+
+            for field, value in fields.items():
+                if field in SOURCE_FIELDS:
+                    continue
+                if value is DELETE:
+                    self.conn.execute("DELETE FROM enrichments WHERE word_id = ? AND field = ?", (word_id, field))
+                else:
+                    self.conn.execute(
+                        "INSERT INTO enrichments (word_id, field, value, updated_at) VALUES (?, ?, ?, ?) "
+                        "ON CONFLICT (word_id, field) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at",
+                        (word_id, field, json.dumps(value, ensure_ascii=False), now))
+            self.conn.execute("UPDATE words SET fields = ?, updated_at = ? WHERE id = ?",
+                              (json.dumps(order, ensure_ascii=False), now, word_id))
+            written += len(fields)
+        return written
+
+    def stats(self):
+        rows = self.conn.execute(
+            "SELECT c.name, COUNT(w.id), (SELECT COUNT(*) FROM enrichments e JOIN words x ON x.id = e.word_id "
+            "WHERE x.chapter_id = c.id) FROM chapters c LEFT JOIN words w ON w.chapter_id = c.id "
+            "GROUP BY c.id ORDER BY c.position").fetchall()
+        return [{"chapter": name, "words": words, "enrichments": enrichments} for name, words, enrichments in rows]
+
+    def close(self):
+        self.conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite storage engine for the whole corpus")
+    parser.add_argument("--db", default=CORPUS_DB)
+    parser.add_argument("--json-dir", default=JSON_DIR)
+    parser.add_argument("--import", dest="import_json", action="store_true",
+                        help="replace the database contents with the chapter files")
+    parser.add_argument("--export", action="store_true", help="write the chapter files back from the database")
+    parser.add_argument("--lookup", nargs="+", default=[], metavar="WORD")
+    args = parser.parse_args()
+
+    with CorpusDB(args.db) as db:
+        if args.import_json:
+            started = time.perf_counter()
+            total = db.import_json(args.json_dir)
+            print(f"Imported {total} words from {args.json_dir} into {args.db} in {time.perf_counter() - started:.2f}s")
+        if args.export:
+            count = db.export_json(args.json_dir)
+            print(f"Exported {count} chapters from {args.db} to {args.json_dir}")
+
+        for word in args.lookup:
+            matches = db.lookup(word)
+            print(f"{word}: " + ("; ".join(f"{chapter}#{position} {word_obj.get('meaning', '')}"
+                                          for chapter, position, word_obj in matches) or "-"))
+
+        if not (args.import_json or args.export or args.lookup):
+            for row in db.stats():
+                print(f"{row['chapter']:<12} {row['words']:>6} words {row['enrichments']:>8} enrichment fields")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""跨章节的近似重复条目检测：MinHash 签名 + LSH 分带
+
+每个条目的特征集合由词头（含 / 拼写变体）的字母三元组和释义的相邻两字组成。
+MinHash 签名按列向量化计算，LSH 把签名分成若干带，任一带完全相同的条目成为候选对，
+候选对再用精确 Jaccard 相似度确认，最后用并查集合并成簇。整体耗时与条目数近似线性，
+不需要两两比较。
+
+可以只报告重复簇，也可以用 --merge 在簇内互相补全音标、记忆技巧和例句翻译。
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import zlib
+from collections import defaultdict
+
+from ai_enrichment import TRANSLATION_PLACEHOLDER, is_generic_tip
+from chapter_store import JSON_DIR, ChapterBatch, list_chapter_files, load_chapter
+from headword_index import headword_variants
+
+NUM_PERM = 128
+BANDS = 32
+THRESHOLD = 0.5
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+ENRICHMENT_FIELDS = ("phonetic", "tips", "example_translation")
+# 释义按义项切开，标点和空白不参与相似度
+MEANING_SEPARATORS_RE = re.compile(r"[\s；;，,、/（）()\[\]。.]+")
+
+def shingles(word_obj):
+    """词头三元组（w:）和释义两字组（m:）的集合"""
+    features = set()
+    variants = headword_variants(word_obj.get("word", ""))
+    # vapour/vapor 只取两个拼写，完整形式会稀释相似度
+    for variant in variants[1:] or variants:
+        padded = f"^{variant}$"
+        features.update(f"w:{padded[i:i + 3]}" for i in range(len(padded) - 2))
+    for sense in MEANING_SEPARATORS_RE.split(word_obj.get("meaning", "")):
+        if len(sense) == 1:
+            features.add(f"m:{sense}")
+        features.update(f"m:{sense[i:i + 2]}" for i in range(len(sense) - 1))
+    return features
+
+def meaning_senses(meaning):
+    """释义中的中文义项集合（英文、音标等不算）"""
+    return {sense for sense in MEANING_SEPARATORS_RE.split(meaning or "") if sense and not sense.isascii()}
+
+def same_meaning(a, b):
+    """两个条目至少有一个相同的义项"""
+    return bool(meaning_senses(a.get("meaning")) & meaning_senses(b.get("meaning")))
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+def minhash_signatures(feature_sets, num_perm=NUM_PERM, seed=1):
+    """所有条目的 MinHash 签名，形状为 (条目数, num_perm)
+
+    特征先用 crc32 映射为整数，再用 num_perm 个 (a*x + b) mod p 的哈希函数取最小值；
+    所有条目的特征拼接成一个数组，按排列逐列计算并用 reduceat 求每个条目的最小值。
+    """
+    import numpy as np
+
+    rng = np.random.RandomState(seed)
+    a = rng.randint(1, 1 << 30, size=num_perm).astype(np.uint64)
+    b = rng.randint(0, 1 << 30, size=num_perm).astype(np.uint64)
+
+    lengths = np.array([len(features) for features in feature_sets], dtype=np.int64)
+    hashed = np.fromiter((zlib.crc32(feature.encode("utf-8")) for features in feature_sets for feature in features),
+                         dtype=np.uint64, count=int(lengths.sum()))
+    signatures = np.full((len(feature_sets), num_perm), MAX_HASH, dtype=np.uint64)
+    nonempty = lengths > 0
+    if not hashed.size:
+        return signatures
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))[nonempty]
+
+    for i in range(num_perm):
+        # a、b < 2^30，x < 2^32，乘积不会溢出 uint64
+        values = (a[i] * hashed + b[i]) % MERSENNE_PRIME & MAX_HASH
+        signatures[nonempty, i] = np.minimum.reduceat(values, starts)
+    return signatures
+
+def lsh_candidates(signatures, bands=BANDS, seed=2):
+    """任一带完全相同的条目对，返回 (左, 右) 两个下标数组
+
+    每带的几行签名先合成一个64位键，排序后相同键的条目连续排列，
+    每组内其余条目都与第一个配对（之后由并查集传递），全程向量化。
+    """
+    import numpy as np
+
+    rows = signatures.shape[1] // bands
+    multipliers = np.random.RandomState(seed).randint(1, 1 << 62, size=rows, dtype=np.int64).astype(np.uint64)
+    left, right = [], []
+    for band in range(bands):
+        # uint64 乘加按 2^64 回绕，键相同的偶然碰撞由后续的 Jaccard 确认排除
+        keys = (signatures[:, band * rows:(band + 1) * rows] * multipliers).sum(axis=1)
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        group_start = np.concatenate(([True], sorted_keys[1:] != sorted_keys[:-1]))
+        first = order[group_start][np.cumsum(group_start) - 1]
+        left.append(first[~group_start])
+        right.append(order[~group_start])
+
+    left, right = np.concatenate(left), np.concatenate(right)
+    unique = np.unique(left.astype(np.int64) * len(signatures) + right)
+    return unique // len(signatures), unique % len(signatures)
+
+def cluster_pairs(count, pairs):
+    """并查集合并，返回多于一个成员的簇（按首个成员排序）"""
+    parent = list(range(count))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for x, y in pairs:
+        root_x, root_y = find(x), find(y)
+        if root_x != root_y:
+            parent[max(root_x, root_y)] = min(root_x, root_y)
+
+    clusters = defaultdict(list)
+    for x in range(count):
+        clusters[find(x)].append(x)
+    return [members for _, members in sorted(clusters.items()) if len(members) > 1]
+
+def find_duplicate_clusters(entries, threshold=THRESHOLD, num_perm=NUM_PERM, bands=BANDS):
+    """entries 为单词字典列表，返回簇列表（每个簇是条目下标列表）
+
+    LSH 候选对的精确 Jaccard 相似度不低于 threshold 才视为重复；
+    有共同拼写（含 / 拼写变体）的词头无论释义如何都视为重复。
+    """
+    feature_sets = [shingles(word_obj) for word_obj in entries]
+    signatures = minhash_signatures(feature_sets, num_perm)
+
+    pairs = set()
+    for x, y in zip(*(ids.tolist() for ids in lsh_candidates(signatures, bands))):
+        if jaccard(feature_sets[x], feature_sets[y]) >= threshold:
+            pairs.add((x, y))
+
+    by_spelling = defaultdict(list)
+    for entry_id, word_obj in enumerate(entries):
+        for variant in headword_variants(word_obj.get("word", "")):
+            by_spelling[variant].append(entry_id)
+    for members in by_spelling.values():
+        pairs.update((members[0], other) for other in members[1:])
+
+    return cluster_pairs(len(entries), pairs)
+
+def has_value(field, value):
+    if not value:
+        return False
+    if field == "tips":
+        return not is_generic_tip(value)
+    if field == "example_translation":
+        return value != TRANSLATION_PLACEHOLDER
+    return True
+
+def homograph_pairs(words):
+    """簇内拼写相同但没有相同义项的成员对 [(下标, 下标), ...]，如 tap（龙头）与 tap（轻拍）"""
+    variants = [set(headword_variants(word_obj.get("word", ""))) for word_obj in words]
+    return [(x, y) for x in range(len(words)) for y in range(x + 1, len(words))
+            if variants[x] & variants[y] and not same_meaning(words[x], words[y])]
+
+def merge_cluster(words):
+    """在簇内用其他成员的值补全缺失（或只有模板/占位内容）的增强字段
+
+    只在有共同拼写且至少有一个相同义项的成员之间补全（如 vapour/vapor 与 vapor）：
+    LSH 簇里也会有 selective/elective 这样拼写和释义都相近的不同单词，拼写相同的
+    也可能是 tap（龙头）与 tap（轻拍）这样的同形异义词，由 homograph_pairs 报告。
+    例句翻译只在例句相同时共用。返回被补全的成员下标集合。
+    """
+    variants = [set(headword_variants(word_obj.get("word", ""))) for word_obj in words]
+    changed = set()
+    for field in ENRICHMENT_FIELDS:
+        for position, word_obj in enumerate(words):
+            if has_value(field, word_obj.get(field)):
+                continue
+            for donor_position, donor in enumerate(words):
+                if donor is word_obj or not has_value(field, donor.get(field)):
+                    continue
+                if not variants[position] & variants[donor_position] or not same_meaning(word_obj, donor):
+                    continue
+                if field == "example_translation" and donor.get("example") != word_obj.get("example"):
+                    continue
+                word_obj[field] = donor[field]
+                changed.add(position)
+                break
+    return changed
+
+def load_entries(json_dir=JSON_DIR, batch=None):
+    """所有章节的条目，返回 (章节数据列表, [(章节下标, 位置, 单词字典), ...])
+
+    传入 ChapterBatch 时通过它读取，章节在提交前一直加锁。
+    """
+    chapters, entries = [], []
+    for filepath in list_chapter_files(json_dir):
+        data = batch.load_chapter(filepath) if batch else load_chapter(filepath)
+        chapters.append((filepath, data))
+        entries.extend((len(chapters) - 1, position, word_obj) for position, word_obj in enumerate(data["words"]))
+    return chapters, entries
+
+def main():
+    parser = argparse.ArgumentParser(description="Find near-duplicate entries across chapters with MinHash/LSH")
+    parser.add_argument("--json-dir", default=JSON_DIR)
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="minimum Jaccard similarity")
+    parser.add_argument("--num-perm", type=int, default=NUM_PERM)
+    parser.add_argument("--bands", type=int, default=BANDS)
+    parser.add_argument("--merge", action="store_true",
+                        help="fill missing phonetics, tips and translations from other cluster members")
+    parser.add_argument("--format", choices=["text", "json"], default="text")
+    args = parser.parse_args()
+
+    if args.num_perm % args.bands:
+        parser.error("--num-perm must be a multiple of --bands")
+
+    started = time.perf_counter()
+    # 合并时从读取到提交都持有章节锁，并发的增强任务的修改不会被覆盖
+    batch = ChapterBatch(args.json_dir) if args.merge else None
+    chapters, entries = load_entries(args.json_dir, batch)
+    clusters = find_duplicate_clusters([word_obj for _, _, word_obj in entries],
+                                       args.threshold, args.num_perm, args.bands)
+    elapsed = time.perf_counter() - started
+
+    def report_entry(m):
+        return {"chapter": chapters[entries[m][0]][1]["chapter"], "index": entries[m][1],
+                "word": entries[m][2].get("word"), "meaning": entries[m][2].get("meaning")}
+
+    report = [[report_entry(m) for m in members] for members in clusters]
+
+    if args.format == "json":
+        json.dump({"clusters": report}, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        for cluster in report:
+            print(" | ".join(f"{item['chapter']}#{item['index']} {item['word']} {item['meaning']}" for item in cluster))
+        print(f"\n{len(report)} clusters from {len(entries)} entries in {elapsed:.2f}s", file=sys.stderr)
+
+    if args.merge:
+        changed = set()
+        filled = 0
+        homographs = []
+        for members in clusters:
+            words = [entries[m][2] for m in members]
+            for position in merge_cluster(words):
+                filled += 1
+                changed.add(entries[members[position]][0])
+            homographs.extend((report_entry(members[x]), report_entry(members[y])) for x, y in homograph_pairs(words))
+        for pair in homographs:
+            print("⚠️  同形异义，未互相补全: " + " | ".join(f"{item['chapter']}#{item['index']} {item['word']} {item['meaning']}"
+                                                  for item in pair), file=sys.stderr)
+        # 一个簇的成员可能分布在多个章节，所有章节一起提交
+        with batch:
+            for chapter_id in sorted(changed):
+                filepath, data = chapters[chapter_id]
+                batch.save_chapter(filepath, data)
+        print(f"✅ 补全 {filled} 个单词，更新 {len(changed)} 个章节文件", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,16 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import argparse
 import json
 import os
 import glob
 
-# 音标数据库（常见雅思词汇）
+from chapter_store import chapter_lock, map_chapter_files, save_chapter
+from phonetics_store import get_phonetics_store
+from tracing import add_profile_arguments, profiling, span
+
+# 音标数据库（常见雅思词汇，phonetics_store --from-builtin 的导入来源之一）
 PHONETICS_DB = {
     # 交通旅行
     "navigate": "/ˈnævɪɡeɪt/",
@@ -190,8 +195,10 @@ def enhance_word_data(word_obj):
     word = word_obj.get("word", "")
     
     # 添加音标（如果还没有）
-    if "phonetic" not in word_obj and word in PHONETICS_DB:
-        word_obj["phonetic"] = PHONETICS_DB[word]
+    if "phonetic" not in word_obj:
+        phonetic = get_phonetics_store().lookup(word)
+        if phonetic:
+            word_obj["phonetic"] = phonetic
     
     # 更新或添加IELTS例句
     if word in IELTS_EXAMPLES:
@@ -213,37 +220,41 @@ def enhance_word_data(word_obj):
 
 def process_chapter_file(filepath):
     """处理单个章节文件"""
-    print(f"Processing: {filepath}")
+    with chapter_lock(filepath):
+        print(f"Processing: {filepath}")
     
-    with open(filepath, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+        with span("load", file=filepath):
+            with open(filepath, 'r', encoding='utf-8') as f:
+                data = json.load(f)
     
-    # 统计
-    updated_count = 0
+        # 处理每个单词
+        with span("enrich", file=filepath):
+            originals = [word_obj.copy() for word_obj in data["words"]]
+            data["words"] = [enhance_word_data(word_obj) for word_obj in data["words"]]
     
-    # 处理每个单词
-    for i, word_obj in enumerate(data["words"]):
-        original = word_obj.copy()
-        enhanced = enhance_word_data(word_obj)
-        
-        if enhanced != original:
-            data["words"][i] = enhanced
-            updated_count += 1
+        # 统计
+        with span("diff", file=filepath):
+            updated_count = sum(1 for original, enhanced in zip(originals, data["words"]) if enhanced != original)
     
-    # 保存更新后的文件
-    if updated_count > 0:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        print(f"  Updated {updated_count} words in {filepath}")
-    else:
-        print(f"  No updates needed for {filepath}")
+        # 保存更新后的文件
+        if updated_count > 0:
+            with span("write", file=filepath):
+                save_chapter(filepath, data)
+            print(f"  Updated {updated_count} words in {filepath}")
+        else:
+            print(f"  No updates needed for {filepath}")
     
-    return updated_count
+        return updated_count
 
 def main():
     """主函数：处理所有章节文件"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="number of worker processes for chapter files (default: 1)")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    
     json_dir = "json_chapters"
-    total_updated = 0
     
     # 获取所有章节文件（排除index.json）
     chapter_files = glob.glob(os.path.join(json_dir, "*.json"))
@@ -251,9 +262,12 @@ def main():
     
     print(f"Found {len(chapter_files)} chapter files to process\n")
     
-    for filepath in chapter_files:
-        updated = process_chapter_file(filepath)
-        total_updated += updated
+    with profiling(args.profile, args.profile_stacks):
+        updated_counts = map_chapter_files(process_chapter_file, chapter_files, args.jobs)
+    if args.jobs > 1:
+        for filepath, updated in zip(chapter_files, updated_counts):
+            print(f"  {os.path.basename(filepath)}: {updated}")
+    total_updated = sum(updated_counts)
     
     print(f"\nTotal updates: {total_updated} words enhanced across all chapters")
     print("\nEnhancement complete!")
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""统一的增强流水线：每个章节只读取一次，依次运行各增强阶段，最多写入一次
+
+替代分别运行 add_phonetics.py、add_tips.py、enhance_vocabulary.py、
+complete_enhancement.py 时对整个语料的四次读取和序列化。
+"""
+
+import argparse
+import functools
+
+import add_phonetics
+import add_tips
+import complete_enhancement
+import enhance_vocabulary
+from chapter_store import JSON_DIR, chapter_lock, list_chapter_files, load_chapter, map_chapter_files, save_chapter
+from corpus_db import CORPUS_DB, CorpusDB
+from enrichment_cache import CACHE_FILE, EnrichmentCache
+from phonetics_store import get_phonetics_store
+from tracing import add_profile_arguments, profiling, span
+
+class Stage:
+    """一个增强阶段
+
+    func 接收单词字典并原地修改；batch=True 时 func 一次接收 (章节名, 单词列表)，
+    用于需要并发调用外部服务的阶段。chapters 不为空时只处理这些章节。
+    on_saved 在章节文件写入后以章节名调用。
+
+    启用增强缓存时，按单词运行的阶段以 (名称, version, inputs 字段的值) 为键
+    复用上次的字段修改；inputs 必须列出 func 会读取的全部字段，version 可以是
+    返回字符串的函数。
+    """
+
+    def __init__(self, name, func, chapters=None, batch=False, on_saved=None, version="1", inputs=("word",)):
+        self.name = name
+        self.func = func
+        self.chapters = set(chapters) if chapters else None
+        self.batch = batch
+        self.on_saved = on_saved
+        self.version = version
+        self.inputs = inputs
+
+    def applies_to(self, chapter_name):
+        return self.chapters is None or chapter_name in self.chapters
+
+    def cache_version(self):
+        return self.version() if callable(self.version) else self.version
+
+def phonetics_version(stage_version):
+    """依赖音标库的阶段：音标库内容变化时缓存自动失效"""
+    return f"{stage_version}+phonetics-{get_phonetics_store().fingerprint}"
+
+# enhance/complete 会根据这些字段是否存在决定是否生成
+ENRICHED_INPUTS = ("word", "phonetic", "example", "example_translation", "tips")
+
+# 按原脚本的运行顺序排列
+STAGES = [
+    Stage("phonetics", add_phonetics.add_phonetic, chapters=["自然地理"],
+          version=functools.partial(phonetics_version, "2")),
+    Stage("tips", add_tips.add_tip, chapters=["自然地理"], version="2"),
+    Stage("enhance", enhance_vocabulary.enhance_word_data, inputs=ENRICHED_INPUTS,
+          version=functools.partial(phonetics_version, "1")),
+    Stage("complete", complete_enhancement.process_word, inputs=ENRICHED_INPUTS,
+          version=functools.partial(phonetics_version, "1")),
+]
+
+def select_stages(names=None):
+    """按名称选择阶段，保持STAGES中的顺序"""
+    if not names:
+        return list(STAGES)
+
+    known = {stage.name for stage in STAGES}
+    unknown = set(names) - known
+    if unknown:
+        raise ValueError(f"Unknown stages: {', '.join(sorted(unknown))}")
+
+    return [stage for stage in STAGES if stage.name in names]
+
+def ai_stages(generator_names, cache_path=None):
+    """AI生成阶段，放在本地阶段之后运行"""
+    from ai_enrichment import AIEnricher, check_api_key
+
+    if generator_names:
+        check_api_key()
+    stages = []
+    for name in generator_names:
+        enricher = AIEnricher(name, cache_path=cache_path)
+        stages.append(Stage(f"ai-{name}", enricher, batch=True, on_saved=enricher.chapter_saved))
+    return stages
+
+def run_word_stage(stage, word_obj, cache=None, version=None):
+    """对单个单词运行阶段，有缓存时先查缓存"""
+    if cache is None:
+        stage.func(word_obj)
+        return
+
+    values = [word_obj.get(field) for field in stage.inputs]
+    result = cache.get(stage.name, version, values)
+    if result is None:
+        stage.func(word_obj)
+        cache.put(stage.name, version, values, {field: word_obj[field] for field in word_obj.dirty if field in word_obj})
+    else:
+        for field, value in result.items():
+            word_obj[field] = value
+
+def run_stages(chapter_name, words, stages, cache=None):
+    """对一个章节的 TrackedWord 列表依次运行各阶段，返回 {阶段名: 修改的单词数}
+
+    结束后每个单词的 dirty 是所有阶段修改过的字段。
+    """
+    stage_counts = {}
+    for stage in stages:
+        if not stage.applies_to(chapter_name):
+            continue
+
+        changed_before = [word_obj.dirty for word_obj in words]
+        for word_obj in words:
+            word_obj.dirty = set()
+
+        with span(f"enrich:{stage.name}", chapter=chapter_name):
+            if stage.batch:
+                stage.func(chapter_name, words)
+            else:
+                version = stage.cache_version() if cache else None
+                for word_obj in words:
+                    run_word_stage(stage, word_obj, cache, version)
+                if cache:
+                    cache.flush()
+
+        with span("diff", chapter=chapter_name):
+            updated = 0
+            for word_obj, dirty in zip(words, changed_before):
+                if word_obj.dirty:
+                    updated += 1
+                word_obj.dirty |= dirty
+        stage_counts[stage.name] = updated
+    return stage_counts
+
+def notify_saved(chapter_name, stages):
+    for stage in stages:
+        if stage.on_saved and stage.applies_to(chapter_name):
+            stage.on_saved(chapter_name)
+
+def process_chapter_file(filepath, stages=None, cache_path=None):
+    """对单个章节运行所有阶段，返回修改的单词数"""
+    with chapter_lock(filepath):
+        stages = STAGES if stages is None else stages
+        cache = EnrichmentCache(cache_path) if cache_path else None
+        with span("load", file=filepath):
+            data = load_chapter(filepath, tracked=True)
+        chapter_name = data.get("chapter", "")
+
+        stage_counts = run_stages(chapter_name, data["words"], stages, cache)
+
+        if cache:
+            print(f"  {filepath}: cache {cache.hits} hits, {cache.misses} misses")
+            cache.close()
+
+        changed_words = sum(1 for word_obj in data["words"] if word_obj.dirty)
+        if changed_words:
+            with span("write", file=filepath):
+                save_chapter(filepath, data)
+            print(f"  {filepath}: {changed_words} words updated {stage_counts}")
+        else:
+            print(f"  {filepath}: no updates needed")
+
+        notify_saved(chapter_name, stages)
+        return changed_words
+
+def process_chapter_db(chapter_name, stages=None, cache_path=None, db_path=CORPUS_DB):
+    """与 process_chapter_file 相同，但读写语料数据库，只写回被修改的字段
+
+    每个进程使用自己的连接；写入是一个短事务，不需要章节锁。
+    """
+    stages = STAGES if stages is None else stages
+    cache = EnrichmentCache(cache_path) if cache_path else None
+    with CorpusDB(db_path) as db:
+        with span("load", chapter=chapter_name):
+            rows = db.chapter_rows(chapter_name, tracked=True)
+        words = [word_obj for _, word_obj in rows]
+
+        stage_counts = run_stages(chapter_name, words, stages, cache)
+
+        if cache:
+            print(f"  {chapter_name}: cache {cache.hits} hits, {cache.misses} misses")
+            cache.close()
+
+        with span("write", chapter=chapter_name):
+            changed_words = db.update_words(rows)
+        if changed_words:
+            print(f"  {chapter_name}: {changed_words} words updated {stage_counts}")
+        else:
+            print(f"  {chapter_name}: no updates needed")
+
+    notify_saved(chapter_name, stages)
+    return changed_words
+
+def main():
+    """主函数：对所有章节运行增强流水线"""
+    parser = argparse.ArgumentParser(description="Run all enrichment stages over json_chapters in one pass")
+    parser.add_argument("--json-dir", default=JSON_DIR)
+    parser.add_argument("--stages", nargs="+", metavar="STAGE",
+                        help=f"stages to run (default: {' '.join(stage.name for stage in STAGES)})")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="number of worker processes for chapter files (default: 1)")
+    parser.add_argument("--ai", nargs="+", default=[], metavar="GENERATOR",
+                        help="append AI generation stages (tips, translation); see ai_enrichment.py")
+    parser.add_argument("--cache", nargs="?", const=CACHE_FILE, metavar="PATH",
+                        help=f"reuse results from the enrichment cache (default: {CACHE_FILE})")
+    parser.add_argument("--db", nargs="?", const=CORPUS_DB, metavar="PATH",
+                        help=f"read and write the corpus database instead of --json-dir (default: {CORPUS_DB}); "
+                             "see corpus_db.py")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    stages = select_stages(args.stages) + ai_stages(args.ai, args.cache)
+    if args.db:
+        with CorpusDB(args.db) as db:
+            chapters = [chapter["name"] for chapter in db.chapters()]
+        worker = functools.partial(process_chapter_db, stages=stages, cache_path=args.cache, db_path=args.db)
+    else:
+        chapters = list_chapter_files(args.json_dir)
+        worker = functools.partial(process_chapter_file, stages=stages, cache_path=args.cache)
+    print(f"Running stages [{', '.join(stage.name for stage in stages)}] over {len(chapters)} chapters\n")
+
+    with profiling(args.profile, args.profile_stacks):
+        total_updated = sum(map_chapter_files(worker, chapters, args.jobs))
+
+    print(f"\nTotal: {total_updated} words updated")
+
+if __name__ == "__main__":
+    main()
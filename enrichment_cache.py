@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""持久化的增强结果缓存（SQLite）
+
+键由生成器名、生成器/提示词版本和单词输入字段的内容哈希组成，值是该阶段对单词
+所做的字段修改。输入不变时直接复用结果，不再重复计算或调用模型。
+缓存按总字节数淘汰最久未用的条目，可以按生成器或单个版本整体失效。
+"""
+
+import argparse
+import hashlib
+import json
+import sqlite3
+import time
+
+CACHE_FILE = ".enrichment_cache.sqlite"
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    generator TEXT NOT NULL,
+    version TEXT NOT NULL,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_generator ON results (generator, version);
+CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used);
+"""
+
+def cache_key(generator, version, values):
+    """(生成器, 版本, 输入字段值) 的内容哈希"""
+    payload = json.dumps([generator, version, values], ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class EnrichmentCache:
+    """以SQLite文件保存的增强结果缓存，多个进程可以同时使用"""
+
+    def __init__(self, path=CACHE_FILE, max_bytes=CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        # 自动提交模式：读取不占用事务，写入集中在 flush 的短事务里，
+        # 多个进程并发使用时不会长时间持有写锁
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.hits = 0
+        self.misses = 0
+        self._used = []
+        self._pending = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def get(self, generator, version, values):
+        """返回缓存的结果，未命中返回None"""
+        key = cache_key(generator, version, values)
+        row = self.conn.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._used.append(key)
+        return json.loads(row[0])
+
+    def put(self, generator, version, values, result):
+        """记录结果，调用 flush 时写入"""
+        value = json.dumps(result, ensure_ascii=False)
+        self._pending.append((cache_key(generator, version, values), generator, version, value,
+                              len(value.encode("utf-8"))))
+
+    def flush(self):
+        """在一个短事务中写入新结果和命中时间，超出容量时淘汰"""
+        if not self._pending and not self._used:
+            return
+
+        now = time.time()
+        written = bool(self._pending)
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO results (key, generator, version, value, size, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+                (row + (now,) for row in self._pending))
+            self.conn.executemany("UPDATE results SET last_used = ? WHERE key = ?", ((now, key) for key in self._used))
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self._pending = []
+        self._used = []
+
+        if written:
+            self.evict()
+
+    def evict(self, max_bytes=None):
+        """按最久未用淘汰到容量的90%以下，返回淘汰的条目数"""
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= max_bytes:
+            return 0
+
+        target = int(max_bytes * 0.9)
+        doomed = []
+        for key, size in self.conn.execute("SELECT key, size FROM results ORDER BY last_used"):
+            if total <= target:
+                break
+            doomed.append((key,))
+            total -= size
+        self.conn.execute("BEGIN IMMEDIATE")
+        self.conn.executemany("DELETE FROM results WHERE key = ?", doomed)
+        self.conn.execute("COMMIT")
+        return len(doomed)
+
+    def invalidate(self, generator, version=None):
+        """删除某个生成器（或其某个版本）的全部结果，返回删除的条目数"""
+        if version is None:
+            cursor = self.conn.execute("DELETE FROM results WHERE generator = ?", (generator,))
+        else:
+            cursor = self.conn.execute("DELETE FROM results WHERE generator = ? AND version = ?", (generator, version))
+        return cursor.rowcount
+
+    def stats(self):
+        rows = self.conn.execute(
+            "SELECT generator, version, COUNT(*), SUM(size) FROM results GROUP BY generator, version ORDER BY generator, version"
+        ).fetchall()
+        return [{"generator": generator, "version": version, "entries": count, "bytes": size}
+                for generator, version, count, size in rows]
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or maintain the enrichment result cache")
+    parser.add_argument("--cache", default=CACHE_FILE)
+    parser.add_argument("--invalidate", nargs="+", metavar=("GENERATOR", "VERSION"),
+                        help="drop all results of a generator, or of one of its versions")
+    parser.add_argument("--max-mb", type=int, help="evict least recently used entries down to this size")
+    args = parser.parse_args()
+
+    with EnrichmentCache(args.cache) as cache:
+        if args.invalidate:
+            removed = cache.invalidate(*args.invalidate[:2])
+            print(f"Removed {removed} cached results for {' '.join(args.invalidate[:2])}")
+        if args.max_mb is not None:
+            print(f"Evicted {cache.evict(args.max_mb * 1024 * 1024)} cached results")
+        for row in cache.stats():
+            print(f"{row['generator']:<16} {row['version']:<40} {row['entries']:>8} entries {row['bytes']:>10} bytes")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""近似词头匹配：对称删除（SymSpell）索引
+
+建索引时为每个词生成删去最多 max_distance 个字母的所有变体；查询时生成查询词
+的删除变体，在字典中找到的候选再用 Damerau-Levenshtein 距离确认。编辑距离≤2
+的查询只需几十次字典查找。
+
+编辑距离相近的往往是另一个词（effect/affect、quite/quiet），所以只用于提供
+"您是不是要找"的建议。增强脚本找不到精确匹配时用 spelling_variants 回退，
+它只做读音不变的规整：大小写、/ 拼写变体、英美拼写。去掉复数和动词词尾
+（inflection_stems）得到的原形读音不同（mountains/mountain），有时还是另一个词
+（evening/even），同样只用于建议。
+"""
+
+import argparse
+import time
+from functools import lru_cache
+
+from chapter_store import JSON_DIR
+from headword_index import headword_variants, normalize_headword
+
+MAX_DISTANCE = 2
+# 短于此长度的词不去词尾、不换拼写（如 four → for）
+MIN_VARIANT_LENGTH = 5
+# 复数和动词变化的词尾 → 原形词尾，按顺序尝试
+INFLECTION_ENDINGS = (("ies", "y"), ("ied", "y"), ("ves", "f"), ("ves", "fe"), ("es", ""), ("s", ""),
+                      ("ed", "e"), ("ed", ""), ("ing", "e"), ("ing", ""))
+# 以这些字母结尾的 s 不是复数词尾（glass、virus、analysis）
+NON_PLURAL_S = ("ss", "us", "is")
+# 英式/美式拼写的对应词尾，两个方向都尝试
+SPELLING_ENDINGS = (("isation", "ization"), ("ise", "ize"), ("yse", "yze"), ("our", "or"), ("tre", "ter"),
+                    ("ogue", "og"), ("ence", "ense"))
+
+def strip_inflection(word):
+    """去掉复数或动词词尾后可能的原形，按可能性排列"""
+    if len(word) < MIN_VARIANT_LENGTH:
+        return []
+    stems = []
+    for ending, replacement in INFLECTION_ENDINGS:
+        if not word.endswith(ending) or (ending == "s" and word.endswith(NON_PLURAL_S)):
+            continue
+        stem = word[:len(word) - len(ending)] + replacement
+        stems.append(stem)
+        # stopped → stop、planning → plan
+        if not replacement and ending in ("ed", "ing") and len(stem) > 2 and stem[-1] == stem[-2]:
+            stems.append(stem[:-1])
+    return stems
+
+def swap_spelling(word):
+    """英式拼写 ↔ 美式拼写（colour/color、centre/center、analyse/analyze）"""
+    if len(word) < MIN_VARIANT_LENGTH:
+        return []
+    swapped = []
+    for british, american in SPELLING_ENDINGS:
+        for old, new in ((british, american), (american, british)):
+            if word.endswith(old):
+                swapped.append(word[:len(word) - len(old)] + new)
+    return swapped
+
+def spelling_variants(word):
+    """同一个词读音相同的其他写法，依次为：规整形式和 / 拼写、换英美拼写
+
+    这些变换不改变词和读音，增强脚本可以放心地按顺序查找第一个命中的并写入语料。
+    """
+    variants = list(headword_variants(word))
+    for form in list(variants):
+        variants.extend(swap_spelling(form))
+    return list(dict.fromkeys(variants))
+
+def inflection_stems(word):
+    """去掉复数和动词词尾后可能的原形（不含词本身），只用于建议，不能把原形的音标或技巧写入语料"""
+    forms = headword_variants(word)
+    stems = [stem for form in forms for stem in strip_inflection(form)]
+    return [stem for stem in dict.fromkeys(stems) if stem not in forms]
+
+def edit_distance(a, b, max_distance=MAX_DISTANCE):
+    """Damerau-Levenshtein 距离（相邻字母交换算一次编辑），超过 max_distance 时返回 max_distance + 1"""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous2, previous = previous, current
+    return min(previous[-1], max_distance + 1)
+
+def deletes(word, max_distance):
+    """删去最多 max_distance 个字母得到的所有变体（含原词）"""
+    results = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {variant[:i] + variant[i + 1:] for variant in frontier for i in range(len(variant))} - results
+        results |= frontier
+    return results
+
+def is_close_match(query, distance):
+    """closest 默认的阈值：短词拼写相近往往是不同的词
+
+    4个字母以下只接受规整后相同的词，8个字母以下最多差1个字母。
+    """
+    length = len(normalize_headword(query))
+    if distance == 0:
+        return True
+    if length < 5:
+        return False
+    return distance <= (1 if length < 8 else 2)
+
+class SymSpellIndex:
+    """对称删除索引：词 → 值，支持编辑距离≤max_distance 的查询"""
+
+    def __init__(self, max_distance=MAX_DISTANCE):
+        self.max_distance = max_distance
+        self.terms = {}
+        self._deletes = {}
+
+    def __len__(self):
+        return len(self.terms)
+
+    def add(self, term, value=None):
+        key = normalize_headword(term)
+        if not key or key in self.terms:
+            return
+        self.terms[key] = term if value is None else value
+        for variant in deletes(key, self.max_distance):
+            self._deletes.setdefault(variant, []).append(key)
+
+    def lookup(self, query, max_distance=None, limit=5):
+        """返回 [(词, 值, 距离), ...]，按距离、再按词排序"""
+        max_distance = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+        query = normalize_headword(query)
+        if query in self.terms:
+            exact = [(query, self.terms[query], 0)]
+            if max_distance == 0 or limit == 1:
+                return exact
+
+        candidates = set()
+        for variant in deletes(query, max_distance):
+            candidates.update(self._deletes.get(variant, ()))
+
+        matches = []
+        for key in candidates:
+            distance = edit_distance(query, key, max_distance)
+            if distance <= max_distance:
+                matches.append((distance, key))
+        matches.sort()
+        return [(key, self.terms[key], distance) for distance, key in matches[:limit]]
+
+    def closest(self, query, accept=is_close_match):
+        """最相近且满足 accept(查询, 距离) 的 (词, 值, 距离)，没有时返回None"""
+        for key, value, distance in self.lookup(query, limit=1):
+            if accept(query, distance):
+                return key, value, distance
+        return None
+
+@lru_cache(maxsize=None)
+def headword_matcher(json_dir=JSON_DIR):
+    """全部章节词头（含 / 拼写变体）的索引"""
+    from headword_index import HeadwordIndex
+
+    index = SymSpellIndex()
+    for headword in HeadwordIndex(json_dir).headwords:
+        index.add(headword)
+    return index
+
+def did_you_mean(word, limit=5, json_dir=JSON_DIR):
+    """拼写相近的词头建议，不包括词本身"""
+    query = normalize_headword(word)
+    return [key for key, _, distance in headword_matcher(json_dir).lookup(word, limit=limit + 1) if key != query][:limit]
+
+def main():
+    parser = argparse.ArgumentParser(description="Approximate headword matching (edit distance <= 2)")
+    parser.add_argument("words", nargs="+")
+    parser.add_argument("--source", choices=["headwords", "phonetics", "tips"], default="headwords")
+    parser.add_argument("--limit", type=int, default=5)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.source == "headwords":
+        index = headword_matcher()
+    elif args.source == "phonetics":
+        from phonetics_store import get_phonetics_store
+        index = get_phonetics_store().fuzzy_index()
+    else:
+        from add_tips import tips_fuzzy_index
+        index = tips_fuzzy_index()
+    print(f"Indexed {len(index)} terms in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    for word in args.words:
+        started = time.perf_counter()
+        matches = index.lookup(word, limit=args.limit)
+        elapsed = (time.perf_counter() - started) * 1e6
+        print(f"{word} ({elapsed:.0f} µs): " + (", ".join(f"{key} [{distance}]" for key, _, distance in matches) or "-"))
+
+if __name__ == "__main__":
+    main()
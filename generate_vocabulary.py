@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""生成任意大小的 vocabulary.txt 格式合成语料，用于测试解析、增强和服务器的扩展性
+
+格式与真实语料相同：章节标题后接 +++，每组单词之间用 --- 分隔，章节之间用 ===，
+每行为 word|pos|meaning|example||note。字段长度、词性、释义义项数、/ 拼写变体、
+多词词头、例句和笔记的比例都按真实的 vocabulary.txt 统计得到。
+
+同一个种子总是生成完全相同的文件。内容逐组写入，生成数GB的语料也只占用很少内存。
+"""
+
+import argparse
+import bisect
+import itertools
+import os
+import random
+import re
+import sys
+import time
+
+from parse_vocabulary import CHAPTER_NAMES
+
+SEED = 42
+
+# 以下分布统计自 vocabulary.txt（3657个单词，958组）
+GROUP_SIZES = {2: 4, 3: 472, 4: 301, 5: 182, 6: 13, 7: 3, 8: 3, 10: 1}
+POS_WEIGHTS = {
+    "n.": 1796, "v.": 673, "adj.": 443, "n./v.": 306, "v./n.": 218, "n./adj.": 87, "adj./n.": 58,
+    "adj./v.": 14, "adv.": 14, "v./adj.": 9, "adj./adv.": 9, "adj./n./v.": 4, "n./adj./v.": 3, "num.": 2,
+    "prep.": 1, "pron./det.": 1,
+}
+SENSE_COUNTS = {1: 1319, 2: 1498, 3: 655, 4: 155, 5: 27, 6: 3}
+SENSE_LENGTHS = {1: 8, 2: 45, 3: 28, 4: 13, 5: 4, 6: 2}
+EXAMPLE_RATE = 0.112
+# 带例句的单词中约一半在例句后附短语搭配（example|phrase 中文）
+PHRASE_RATE = 0.55
+NOTE_RATE = 0.067
+VARIANT_RATE = 0.019
+MULTIWORD_RATE = 0.003
+HYPHEN_RATE = 0.005
+
+# vocabulary.txt 释义中最常用的汉字，按频率排列
+CJK_CHARS = (
+    "的使人物地大不一发行有学动事出用生子理分成心小力体进作者某对度开解合为水会上意外性重品或制在美气等主定流时口"
+    "自情装机工指要手中化明员下期于数起到保加表打英部业国车海和平反提量调得公复形可过高无道变家方食式感极声给入法通"
+    "能语球电文乐风传强视点服同引程器精线头好实长音面说然场处常利代间计论决运观相光标查议证色现失年节望应结收名身取"
+    "住伤单本天正种个向教备经受象词激日果交料护权目假难改产内是持后包全求所细义害微区多与速把报尤转别排击来金前关痛"
+    "信减准火原比争空令系统类了以布弱活记片之立严供带回件投他乱新刺设毛女治紧神围石险模思增草示具觉除问路专知接政民"
+)
+SENSE_PREFIXES = ("（使）", "（被）", "[美]", "[英]", "[~s]")
+SENSE_SEPARATORS = {"；": 3395, "，": 362, "、": 193}
+
+ONSETS = ("", "b", "c", "d", "f", "g", "h", "l", "m", "n", "p", "r", "s", "t", "v", "w", "br", "cl", "cr", "dr",
+          "fl", "gr", "pl", "pr", "sc", "sp", "st", "str", "tr", "th", "ch", "sh", "ph")
+VOWELS = ("a", "e", "i", "o", "u", "ea", "ai", "ou", "io", "y")
+CODAS = ("", "", "", "", "", "", "n", "r", "s", "t", "l", "m", "nd", "nt", "st", "ct", "ss", "ck")
+SUFFIXES = {"": 90, "tion": 8, "ment": 4, "ness": 2, "ity": 4, "ous": 3, "al": 5, "ive": 3, "ent": 3, "ant": 2,
+            "er": 4, "or": 2, "ism": 1, "ist": 1, "able": 2, "ic": 3, "ate": 3, "y": 3}
+SYLLABLES = {1: 40, 2: 40, 3: 17, 4: 3}
+# 英式/美式拼写变体的词尾
+VARIANT_ENDINGS = (("ise", "ize"), ("isation", "ization"), ("our", "or"), ("tre", "ter"), ("ogue", "og"))
+FUNCTION_WORDS = ("the", "a", "of", "to", "in", "and", "is", "was", "for", "on", "with", "that", "it", "by",
+                  "we", "they", "this", "be", "are", "has", "can", "will", "from", "at", "not", "his", "their")
+
+class WeightedChoice:
+    """按权重抽样，预先计算累计权重"""
+
+    def __init__(self, weights):
+        self.values = list(weights)
+        self.cumulative = list(itertools.accumulate(weights.values()))
+        self.total = self.cumulative[-1]
+
+    def __call__(self, rng):
+        # 与 rng.choices(k=1) 相同的抽样，省去每次调用的参数检查
+        return self.values[bisect.bisect(self.cumulative, rng.random() * self.total)]
+
+    def sample(self, rng, k):
+        return rng.choices(self.values, cum_weights=self.cumulative, k=k)
+
+class VocabularyGenerator:
+    """逐组生成词条行，所有随机性来自一个以 seed 初始化的 random.Random"""
+
+    def __init__(self, seed=SEED):
+        self.rng = random.Random(seed)
+        self.group_size = WeightedChoice(GROUP_SIZES)
+        self.pos = WeightedChoice(POS_WEIGHTS)
+        self.sense_count = WeightedChoice(SENSE_COUNTS)
+        self.sense_length = WeightedChoice(SENSE_LENGTHS)
+        self.separator = WeightedChoice(SENSE_SEPARATORS)
+        self.suffix = WeightedChoice(SUFFIXES)
+        self.syllables = WeightedChoice(SYLLABLES)
+        # 汉字按频率排名取 1/(rank+10) 的权重，近似真实语料的长尾
+        self.cjk_char = WeightedChoice({char: 1 / (rank + 10) for rank, char in enumerate(CJK_CHARS)})
+
+    def stem(self):
+        rng = self.rng
+        parts = []
+        for _ in range(self.syllables(rng)):
+            parts.append(rng.choice(ONSETS) + rng.choice(VOWELS) + rng.choice(CODAS))
+        return "".join(parts)
+
+    def english_word(self):
+        return self.stem() + self.suffix(self.rng)
+
+    def headword(self):
+        rng = self.rng
+        roll = rng.random()
+        if roll < VARIANT_RATE:
+            british, american = rng.choice(VARIANT_ENDINGS)
+            stem = self.stem()
+            return f"{stem}{british}/{stem}{american}"
+        roll -= VARIANT_RATE
+        if roll < MULTIWORD_RATE:
+            return f"{self.english_word()} {self.english_word()}"
+        roll -= MULTIWORD_RATE
+        if roll < HYPHEN_RATE:
+            return f"{self.stem()}-{self.english_word()}"
+        return self.english_word()
+
+    def chinese(self, length):
+        return "".join(self.cjk_char.sample(self.rng, length))
+
+    def meaning(self, pos):
+        """义项用；等分隔；多个词性时有时按词性用 / 分开"""
+        rng = self.rng
+        groups = pos.count("/") + 1 if "/" in pos and rng.random() < 0.3 else 1
+        parts = []
+        for _ in range(groups):
+            senses = []
+            for _ in range(self.sense_count(rng)):
+                sense = self.chinese(self.sense_length(rng))
+                if rng.random() < 0.05:
+                    sense = rng.choice(SENSE_PREFIXES) + sense
+                senses.append(sense)
+            separator = self.separator(rng)
+            parts.append(separator.join(senses))
+        return "/".join(parts)
+
+    def sentence(self, headword):
+        """包含词头的英文例句，长度分布与真实例句相近（中位数约9个词）"""
+        rng = self.rng
+        length = max(4, min(24, round(rng.gauss(9, 2.3))))
+        words = [rng.choice(FUNCTION_WORDS) if rng.random() < 0.45 else self.english_word() for _ in range(length - 1)]
+        words.insert(rng.randrange(length), headword.split("/")[0])
+        words[0] = words[0].capitalize()
+        return " ".join(words)
+
+    def phrase(self, headword):
+        return f"{headword.split('/')[0]} {self.english_word()} {self.chinese(self.rng.randint(2, 6))}"
+
+    def entry(self):
+        """一行词条"""
+        rng = self.rng
+        headword = self.headword()
+        pos = self.pos(rng)
+        line = f"{headword}|{pos}|{self.meaning(pos)}"
+        if rng.random() < EXAMPLE_RATE:
+            line += "|" + self.sentence(headword)
+            if rng.random() < PHRASE_RATE:
+                line += "|" + self.phrase(headword)
+        if rng.random() < NOTE_RATE:
+            derived = f"{self.english_word()} {rng.choice(('adj.', 'n.', 'v.', 'adv.'))} {self.chinese(rng.randint(2, 5))}"
+            line += "||" + derived
+        return line
+
+    def group(self):
+        return [self.entry() for _ in range(self.group_size(self.rng))]
+
+def write_corpus(out, words=None, size=None, seed=SEED, chapter_names=CHAPTER_NAMES):
+    """写入合成语料，按单词数或字节数（UTF-8）平均分到各章节；返回 (单词数, 字节数)
+
+    只保留当前这一组在内存中。
+    """
+    if (words is None) == (size is None):
+        raise ValueError("Specify exactly one of words or size")
+
+    generator = VocabularyGenerator(seed)
+    total_words = total_bytes = 0
+
+    def emit(text):
+        nonlocal total_bytes
+        out.write(text)
+        total_bytes += len(text.encode("utf-8"))
+
+    for index, chapter_name in enumerate(chapter_names):
+        # 前面的章节多分到余数，总量正好等于目标
+        remaining_chapters = len(chapter_names) - index
+        if words is not None:
+            budget = (words - total_words + remaining_chapters - 1) // remaining_chapters
+        else:
+            budget = (size - total_bytes + remaining_chapters - 1) // remaining_chapters
+        if budget <= 0:
+            continue
+
+        # 章节之间用 ===，组之间用 ---
+        emit(f"===\n{chapter_name}\n+++\n" if total_bytes else f"{chapter_name}\n+++\n")
+        chapter_start = total_bytes
+        chapter_words = 0
+        first_group = True
+        while (chapter_words if words is not None else total_bytes - chapter_start) < budget:
+            lines = generator.group()
+            if words is not None:
+                lines = lines[:budget - chapter_words]
+            if not first_group:
+                emit("---\n")
+            emit("\n".join(lines) + "\n")
+            chapter_words += len(lines)
+            first_group = False
+        total_words += chapter_words
+
+    return total_words, total_bytes
+
+def parse_size(text):
+    """'500MB'、'2G'、'1024' 等 → 字节数"""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMG]?)B?\s*", text.upper())
+    if not match:
+        raise argparse.ArgumentTypeError(f"invalid size: {text}")
+    number, unit = match.groups()
+    return int(float(number) * 1024 ** " KMG".index(unit or " "))
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic corpus in the vocabulary.txt format")
+    amount = parser.add_mutually_exclusive_group(required=True)
+    amount.add_argument("--words", type=int, help="number of entries")
+    amount.add_argument("--size", type=parse_size, help="approximate output size, e.g. 500MB or 2GB")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--output", "-o", default="-", help="output file (default: stdout)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.output == "-":
+        try:
+            words, size = write_corpus(sys.stdout, args.words, args.size, args.seed)
+        except BrokenPipeError:
+            # 下游（如 head）提前关闭了管道；把剩余输出导向 /dev/null，避免退出时再报错
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            return
+    else:
+        with open(args.output, "w", encoding="utf-8", buffering=1024 * 1024) as f:
+            words, size = write_corpus(f, args.words, args.size, args.seed)
+    print(f"Generated {words} entries ({size} bytes) in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""全局词头索引：规整后的词头及其拼写变体 → (章节, 位置)
+
+索引保存在 json_chapters/indexes/headwords.json，随 save_chapters_as_json
+一起生成，可以不加载任何章节文件回答"某个词在哪些章节"。
+"""
+
+import argparse
+import bisect
+import json
+import os
+
+import chapter_store
+from chapter_store import JSON_DIR, chapter_filename, chapter_files_in_index_order, load_chapter
+
+HEADWORD_INDEX_FILE = os.path.join("indexes", "headwords.json")
+
+def normalize_headword(word):
+    """小写并合并词头内部的空白"""
+    return ' '.join(word.split()).lower()
+
+def headword_variants(word):
+    """词头可被查询的规整形式
+
+    jeopardise/jeopardize 会得到完整形式以及两个拼写。
+    """
+    variants = [normalize_headword(word)]
+    if '/' in word:
+        for part in word.split('/'):
+            part = normalize_headword(part)
+            if part and part not in variants:
+                variants.append(part)
+    return variants
+
+def new_headword_index():
+    return {"chapters": [], "headwords": {}}
+
+def add_chapter_to_index(index, chapter_name, words):
+    """把一个章节的单词加入索引，位置为单词在章节 words 中的下标"""
+    chapter_id = len(index["chapters"])
+    index["chapters"].append(chapter_name)
+    headwords = index["headwords"]
+    for position, word_obj in enumerate(words):
+        for variant in headword_variants(word_obj.get("word", "")):
+            headwords.setdefault(variant, []).append([chapter_id, position])
+    return index
+
+def build_headword_index(json_dir=JSON_DIR):
+    """从章节文件重建索引，章节按 index.json 的顺序编号，与 save_chapters_as_json 一致"""
+    index = new_headword_index()
+    for filepath in chapter_files_in_index_order(json_dir):
+        data = load_chapter(filepath)
+        add_chapter_to_index(index, data["chapter"], data["words"])
+    return index
+
+def save_headword_index(index, output_dir=JSON_DIR, batch=None):
+    """写入索引；传入 ChapterBatch 时随该批文件一起提交"""
+    index_path = os.path.join(output_dir, HEADWORD_INDEX_FILE)
+    (batch or chapter_store).save_json(index_path, index, indent=None)
+    return index_path
+
+class HeadwordIndex:
+    """词头索引的查询接口：精确、前缀和批量查询"""
+
+    def __init__(self, json_dir=JSON_DIR, index=None):
+        self.json_dir = json_dir
+        if index is None:
+            with open(os.path.join(json_dir, HEADWORD_INDEX_FILE), 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        self.chapters = index["chapters"]
+        self.headwords = index["headwords"]
+        self._sorted_keys = sorted(self.headwords)
+        self._chapter_cache = {}
+
+    def __contains__(self, word):
+        return normalize_headword(word) in self.headwords
+
+    def lookup(self, word):
+        """精确查询，返回 [(章节名, 位置), ...]"""
+        return [(self.chapters[chapter_id], position)
+                for chapter_id, position in self.headwords.get(normalize_headword(word), [])]
+
+    def lookup_many(self, words):
+        """批量精确查询，返回 {单词: [(章节名, 位置), ...]}"""
+        return {word: self.lookup(word) for word in words}
+
+    def prefix(self, prefix, limit=20):
+        """前缀查询，按字母序返回最多 limit 个规整后的词头"""
+        prefix = normalize_headword(prefix)
+        start = bisect.bisect_left(self._sorted_keys, prefix)
+        matches = []
+        for key in self._sorted_keys[start:]:
+            if not key.startswith(prefix) or len(matches) >= limit:
+                break
+            matches.append(key)
+        return matches
+
+    def entries(self, word):
+        """返回单词在各章节中的完整条目 [(章节名, 条目), ...]，章节文件按需加载"""
+        results = []
+        for chapter_name, position in self.lookup(word):
+            if chapter_name not in self._chapter_cache:
+                self._chapter_cache[chapter_name] = load_chapter(os.path.join(self.json_dir, chapter_filename(chapter_name)))
+            results.append((chapter_name, self._chapter_cache[chapter_name]["words"][position]))
+        return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the global headword index")
+    parser.add_argument("--json-dir", default=JSON_DIR)
+    parser.add_argument("--build", action="store_true", help="rebuild the index from the chapter files")
+    parser.add_argument("--prefix", action="store_true", help="treat queries as prefixes")
+    parser.add_argument("words", nargs="*")
+    args = parser.parse_args()
+
+    if args.build:
+        index = build_headword_index(args.json_dir)
+        index_path = save_headword_index(index, args.json_dir)
+        print(f"Saved {len(index['headwords'])} headwords to {index_path}")
+
+    if not args.words:
+        return
+
+    headword_index = HeadwordIndex(args.json_dir)
+    for word in args.words:
+        if args.prefix:
+            print(f"{word}*: {', '.join(headword_index.prefix(word))}")
+        else:
+            locations = headword_index.lookup(word)
+            print(f"{word}: {', '.join(f'{chapter}#{position}' for chapter, position in locations) or '-'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""章节数据质量检查
+
+规则在 RULES 中注册：单词规则对每个单词调用一次，章节规则对整个章节调用一次。
+每个章节只遍历一遍单词，章节之间用进程池并行。发现 error 级别问题时退出码为1，
+可以直接用于CI。
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from collections import Counter
+
+from ai_enrichment import GENERIC_TIP_MARKERS
+from chapter_store import JSON_DIR, list_chapter_files, load_chapter, map_chapter_files
+
+SEVERITIES = ("error", "warning", "info")
+TEXT_FIELDS = ("word", "pos", "meaning", "phonetic", "example", "example_translation", "tips", "note")
+
+# 各脚本留下的占位内容
+PLACEHOLDER_RE = re.compile(r"\[需要[^\]]*\]|TODO|FIXME")
+# 音标：/.../，拼写变体的音标可以写成 /.../.../，不含数字
+IPA_RE = re.compile(r"^/[^/\d]+(?:/[^/\d]+)*/$")
+
+RULES = {}
+
+class Rule:
+    def __init__(self, name, severity, scope, func, description):
+        self.name = name
+        self.severity = severity
+        self.scope = scope
+        self.func = func
+        self.description = description
+
+def rule(name, severity="error", scope="word"):
+    """注册规则：单词规则返回问题描述或None，章节规则返回 (位置, 问题描述) 序列"""
+    def register(func):
+        RULES[name] = Rule(name, severity, scope, func, (func.__doc__ or "").strip())
+        return func
+    return register
+
+@rule("placeholder")
+def check_placeholder(word_obj):
+    """字段中残留占位内容，如 [需要翻译]"""
+    fields = [field for field in TEXT_FIELDS
+              if isinstance(word_obj.get(field), str) and PLACEHOLDER_RE.search(word_obj[field])]
+    if fields:
+        return f"placeholder in {', '.join(fields)}"
+    return None
+
+@rule("template-tip", severity="warning")
+def check_template_tip(word_obj):
+    """记忆技巧是脚本生成的通用模板"""
+    tips = word_obj.get("tips") or ""
+    if any(marker in tips for marker in GENERIC_TIP_MARKERS):
+        return "generic template tip"
+    return None
+
+@rule("headword-format")
+def check_headword_format(word_obj):
+    """词头为空、首尾有空白、内部有连续空白或空的 / 变体"""
+    word = word_obj.get("word") or ""
+    if not word.strip():
+        return "empty headword"
+    if word != word.strip():
+        return "leading/trailing whitespace in headword"
+    if "  " in word or "\t" in word:
+        return "repeated whitespace in headword"
+    if "/" in word and any(not part.strip() or part != part.strip() for part in word.split("/")):
+        return "malformed '/' variant in headword"
+    return None
+
+@rule("phonetic-format")
+def check_phonetic_format(word_obj):
+    """音标不是 /.../ 形式"""
+    phonetic = word_obj.get("phonetic")
+    if phonetic is None:
+        return None
+    if not IPA_RE.match(phonetic.strip()) or phonetic != phonetic.strip():
+        return f"malformed IPA {phonetic!r}"
+    return None
+
+@rule("empty-example")
+def check_empty_example(word_obj):
+    """例句字段存在但为空"""
+    for field in ("example", "example_translation"):
+        if field in word_obj and not (word_obj[field] or "").strip():
+            return f"empty {field}"
+    return None
+
+@rule("missing-field", severity="warning")
+def check_missing_field(word_obj):
+    """缺少词性或释义"""
+    missing = [field for field in ("pos", "meaning") if not word_obj.get(field)]
+    if missing:
+        return f"missing {', '.join(missing)}"
+    return None
+
+@rule("duplicate-headword", severity="warning", scope="chapter")
+def check_duplicate_headword(data):
+    """同一章节内重复的词头"""
+    counts = Counter(word_obj.get("word", "").strip().lower() for word_obj in data["words"])
+    for position, word_obj in enumerate(data["words"]):
+        key = word_obj.get("word", "").strip().lower()
+        if counts[key] > 1:
+            yield position, f"headword {key!r} appears {counts[key]} times in chapter"
+
+@rule("word-count", scope="chapter")
+def check_word_count(data):
+    """word_count 与实际单词数不一致"""
+    if data.get("word_count") != len(data["words"]):
+        yield None, f"word_count is {data.get('word_count')} but chapter has {len(data['words'])} words"
+
+def lint_chapter_file(filepath, rule_names=None):
+    """单次遍历检查一个章节，返回问题列表"""
+    rules = [RULES[name] for name in (rule_names or RULES)]
+    word_rules = [r for r in rules if r.scope == "word"]
+    chapter_rules = [r for r in rules if r.scope == "chapter"]
+
+    try:
+        data = load_chapter(filepath)
+    except (OSError, ValueError) as e:
+        return [finding("invalid-json", "error", filepath, None, None, str(e))]
+
+    chapter = data.get("chapter") or os.path.basename(filepath)
+    words = data.get("words", [])
+    findings = []
+
+    for position, word_obj in enumerate(words):
+        for r in word_rules:
+            message = r.func(word_obj)
+            if message:
+                findings.append(finding(r.name, r.severity, chapter, position, word_obj.get("word"), message))
+
+    for r in chapter_rules:
+        for position, message in r.func(data):
+            word = words[position].get("word") if position is not None else None
+            findings.append(finding(r.name, r.severity, chapter, position, word, message))
+
+    return findings
+
+def finding(rule_name, severity, chapter, index, word, message):
+    return {"rule": rule_name, "severity": severity, "chapter": chapter,
+            "index": index, "word": word, "message": message}
+
+def lint_corpus(json_dir=JSON_DIR, rule_names=None, jobs=1):
+    """检查所有章节，返回按章节顺序排列的问题列表"""
+    import functools
+
+    worker = functools.partial(lint_chapter_file, rule_names=rule_names)
+    results = map_chapter_files(worker, list_chapter_files(json_dir), jobs)
+    return [item for findings in results for item in findings]
+
+def main():
+    parser = argparse.ArgumentParser(description="Lint json_chapters for data-quality problems")
+    parser.add_argument("--json-dir", default=JSON_DIR)
+    parser.add_argument("--rules", nargs="+", choices=sorted(RULES), help="only run these rules")
+    parser.add_argument("--disable", nargs="+", choices=sorted(RULES), default=[], help="skip these rules")
+    parser.add_argument("--jobs", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--format", choices=["text", "json"], default="text")
+    parser.add_argument("--fail-on", choices=SEVERITIES, default="error",
+                        help="lowest severity that makes the exit code non-zero (default: error)")
+    parser.add_argument("--list-rules", action="store_true")
+    args = parser.parse_args()
+
+    if args.list_rules:
+        for r in RULES.values():
+            print(f"{r.name:<20} {r.severity:<8} {r.scope:<8} {r.description}")
+        return 0
+
+    rule_names = [name for name in (args.rules or RULES) if name not in args.disable]
+    findings = lint_corpus(args.json_dir, rule_names, args.jobs)
+    counts = Counter(item["severity"] for item in findings)
+
+    if args.format == "json":
+        json.dump({"findings": findings, "counts": counts}, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        for item in findings:
+            location = item["chapter"] if item["index"] is None else f"{item['chapter']}#{item['index']} {item['word']}"
+            print(f"{item['severity']}: [{item['rule']}] {location}: {item['message']}")
+        print(f"\n{len(findings)} findings: " + ", ".join(f"{counts[s]} {s}" for s in SEVERITIES))
+
+    failing = SEVERITIES[:SEVERITIES.index(args.fail_on) + 1]
+    return 1 if any(counts[s] for s in failing) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
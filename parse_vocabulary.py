@@ -1,95 +1,159 @@
 #!/usr/bin/env python3
+import argparse
+import hashlib
 import json
 import re
 from pathlib import Path
 
-def parse_vocabulary_file(file_path):
-    chapters = {}
+from chapter_store import ChapterBatch, chapter_filename
+from headword_index import add_chapter_to_index, new_headword_index, save_headword_index
+from tracing import add_profile_arguments, profiling, span
+
+CHAPTER_NAMES = [
+    "自然地理", "植物研究", "动物保护", "太空探索", "学校教育",
+    "科技发明", "文化历史", "语言演化", "娱乐运动", "物品材料",
+    "时尚潮流", "饮食健康", "建筑场所", "交通旅行", "国家政府",
+    "社会经济", "法律法规", "沙场争锋", "社会角色", "行为动作",
+    "身心健康", "时间日期"
+]
+
+SEPARATORS = ('+++', '---', '===')
+
+def parse_entry_line(line):
+    """Parse one `word|pos|meaning|example||note` line, or return None"""
+    if '|' not in line:
+        return None
+    
+    parts = line.split('|')
+    if len(parts) < 3:
+        return None
+    
+    word = parts[0].strip()
+    pos = parts[1].strip()  # part of speech
+    meaning = parts[2].strip()
+    
+    # Get example sentence if exists
+    example = ''
+    note = ''
+    if len(parts) > 3:
+        remaining = '|'.join(parts[3:])
+        # Check if there's a note (indicated by ||)
+        if '||' in remaining:
+            example_part, note_part = remaining.split('||', 1)
+            example = example_part.strip()
+            note = note_part.strip()
+        else:
+            example = remaining.strip()
+    
+    word_entry = {
+        'word': word,
+        'pos': pos,
+        'meaning': meaning
+    }
+    
+    if example:
+        word_entry['example'] = example
+    if note:
+        word_entry['note'] = note
+    
+    return word_entry
+
+def iter_content_lines(file_path, chapter_names=CHAPTER_NAMES):
+    """Lazily yield (chapter, line) for every non-separator line of a chapter"""
     current_chapter = None
-    current_words = []
     
     with open(file_path, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-    
-    chapter_names = [
-        "自然地理", "植物研究", "动物保护", "太空探索", "学校教育",
-        "科技发明", "文化历史", "语言演化", "娱乐运动", "物品材料",
-        "时尚潮流", "饮食健康", "建筑场所", "交通旅行", "国家政府",
-        "社会经济", "法律法规", "沙场争锋", "社会角色", "行为动作",
-        "身心健康", "时间日期"
-    ]
-    
-    i = 0
-    while i < len(lines):
-        line = lines[i].strip()
+        for raw_line in f:
+            line = raw_line.strip()
+            
+            # Check if this is a chapter title
+            if line in chapter_names:
+                current_chapter = line
+                continue
+            
+            # Skip separators and empty lines
+            if line in SEPARATORS or not line:
+                continue
+            
+            # Lines before the first chapter title have nowhere to go
+            if current_chapter is None:
+                continue
+            
+            yield current_chapter, line
+
+def iter_vocabulary_entries(file_path, chapter_names=CHAPTER_NAMES):
+    """Lazily yield (chapter, entry) records from a vocabulary file"""
+    for chapter, line in iter_content_lines(file_path, chapter_names):
+        word_entry = parse_entry_line(line)
+        if word_entry is not None:
+            yield chapter, word_entry
+
+def iter_chapter_blocks(file_path, chapter_names=CHAPTER_NAMES):
+    """Yield (chapter, source_hash, words) once per chapter block"""
+    current_chapter = None
+    digest = None
+    words = []
+    
+    for chapter, line in iter_content_lines(file_path, chapter_names):
+        if chapter != current_chapter:
+            if current_chapter and words:
+                yield current_chapter, digest.hexdigest()[:16], words
+            current_chapter = chapter
+            digest = hashlib.sha256()
+            words = []
         
-        # Check if this is a chapter title
-        if line in chapter_names:
-            # Save previous chapter if exists
+        digest.update(line.encode('utf-8') + b'\n')
+        word_entry = parse_entry_line(line)
+        if word_entry is not None:
+            words.append(word_entry)
+    
+    if current_chapter and words:
+        yield current_chapter, digest.hexdigest()[:16], words
+
+def iter_chapters(records):
+    """Group consecutive (chapter, entry) records into (chapter, words) pairs"""
+    current_chapter = None
+    current_words = []
+    
+    for chapter, entry in records:
+        if chapter != current_chapter:
             if current_chapter and current_words:
-                chapters[current_chapter] = current_words
-            
-            current_chapter = line
+                yield current_chapter, current_words
+            current_chapter = chapter
             current_words = []
-            i += 1
-            continue
-        
-        # Skip separators and empty lines
-        if line in ['+++', '---', '==='] or not line:
-            i += 1
-            continue
-        
-        # Parse word entry
-        if '|' in line:
-            parts = line.split('|')
-            if len(parts) >= 3:
-                word = parts[0].strip()
-                pos = parts[1].strip()  # part of speech
-                meaning = parts[2].strip()
-                
-                # Get example sentence if exists
-                example = ''
-                note = ''
-                if len(parts) > 3:
-                    remaining = '|'.join(parts[3:])
-                    # Check if there's a note (indicated by ||)
-                    if '||' in remaining:
-                        example_part, note_part = remaining.split('||', 1)
-                        example = example_part.strip()
-                        note = note_part.strip()
-                    else:
-                        example = remaining.strip()
-                
-                word_entry = {
-                    'word': word,
-                    'pos': pos,
-                    'meaning': meaning
-                }
-                
-                if example:
-                    word_entry['example'] = example
-                if note:
-                    word_entry['note'] = note
-                    
-                current_words.append(word_entry)
-        
-        i += 1
+        current_words.append(entry)
     
-    # Save the last chapter
     if current_chapter and current_words:
-        chapters[current_chapter] = current_words
+        yield current_chapter, current_words
+
+def parse_vocabulary_file(file_path):
+    chapters = {}
+    
+    for chapter_name, words in iter_chapters(iter_vocabulary_entries(file_path)):
+        chapters[chapter_name] = words
     
     return chapters
 
-def save_chapters_as_json(chapters, output_dir='json_chapters'):
+def save_chapters_as_json(chapters, output_dir='json_chapters', stream=False):
+    """Write chapter files plus index.json.
+
+    `chapters` is a {name: words} dict, or with stream=True an iterable of
+    (chapter, entry) records such as iter_vocabulary_entries() yields; each
+    chapter is then written as soon as the next one starts, so only one
+    chapter is held in memory at a time.
+    """
     # Create output directory
     Path(output_dir).mkdir(exist_ok=True)
     
+    chapter_items = iter_chapters(chapters) if stream else chapters.items()
+    index_chapters = []
+    headword_index = new_headword_index()
+    # Chapters, index.json and the headword index become visible together
+    batch = ChapterBatch(output_dir)
+    
     # Save each chapter as a separate JSON file
-    for chapter_name, words in chapters.items():
-        # Create safe filename
-        safe_filename = chapter_name.replace('/', '_').replace(' ', '_')
-        file_path = Path(output_dir) / f"{safe_filename}.json"
+    for chapter_name, words in chapter_items:
+        file_path = Path(output_dir) / chapter_filename(chapter_name)
         
         chapter_data = {
             'chapter': chapter_name,
@@ -97,35 +161,194 @@ def save_chapters_as_json(chapters, output_dir='json_chapters'):
             'words': words
         }
         
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(chapter_data, f, ensure_ascii=False, indent=2)
+        with span('write', chapter=chapter_name):
+            batch.save_chapter(file_path, chapter_data)
+        
+        index_chapters.append({
+            'name': chapter_name,
+            'word_count': len(words),
+            'file': chapter_filename(chapter_name)
+        })
+        with span('index', chapter=chapter_name):
+            add_chapter_to_index(headword_index, chapter_name, words)
         
         print(f"Saved {chapter_name}: {len(words)} words to {file_path}")
     
     # Also save a master index file
     index_data = {
-        'total_chapters': len(chapters),
-        'chapters': [
-            {
-                'name': chapter_name,
-                'word_count': len(words),
-                'file': f"{chapter_name.replace('/', '_').replace(' ', '_')}.json"
-            }
-            for chapter_name, words in chapters.items()
-        ]
+        'total_chapters': len(index_chapters),
+        'chapters': index_chapters
     }
     
     index_path = Path(output_dir) / 'index.json'
-    with open(index_path, 'w', encoding='utf-8') as f:
-        json.dump(index_data, f, ensure_ascii=False, indent=2)
+    with span('commit'):
+        batch.save_json(index_path, index_data)
+        headword_index_path = save_headword_index(headword_index, output_dir, batch)
+        batch.commit()
     
     print(f"\nSaved index file to {index_path}")
-    print(f"Total chapters: {len(chapters)}")
-    print(f"Total words: {sum(len(words) for words in chapters.values())}")
+    print(f"Saved headword index to {headword_index_path}")
+    print(f"Total chapters: {len(index_chapters)}")
+    print(f"Total words: {sum(chapter['word_count'] for chapter in index_chapters)}")
 
-if __name__ == "__main__":
-    # Parse the vocabulary file
-    chapters = parse_vocabulary_file('vocabulary.txt')
+# Fields that come straight from vocabulary.txt; everything else in a chapter
+# file (phonetic, tips, example_translation, ...) is added by enrichment scripts
+SOURCE_FIELDS = ('word', 'pos', 'meaning', 'example', 'note')
+
+def merge_source_entry(source_entry, enriched_entry):
+    """Apply a freshly parsed source entry on top of an existing enriched one"""
+    merged = dict(enriched_entry)
+    
+    for field in ('word', 'pos', 'meaning', 'note'):
+        if field in source_entry:
+            merged[field] = source_entry[field]
+        else:
+            merged.pop(field, None)
+    
+    # An edited source example wins, and the translation of the old sentence
+    # goes with it; enrichers add a fresh one (or re-apply curated examples)
+    # on their next run
+    if 'example' in source_entry and merged.get('example') != source_entry['example']:
+        merged['example'] = source_entry['example']
+        merged.pop('example_translation', None)
+    
+    return merged
+
+def merge_chapter_words(source_words, enriched_words):
+    """Merge a chapter's source entries into its enriched words, matched by headword"""
+    by_word = {}
+    for entry in enriched_words:
+        by_word.setdefault(entry.get('word'), []).append(entry)
     
-    # Save as JSON files
-    save_chapters_as_json(chapters)
\ No newline at end of file
+    merged_words = []
+    for source_entry in source_words:
+        candidates = by_word.get(source_entry['word'])
+        if candidates:
+            merged_words.append(merge_source_entry(source_entry, candidates.pop(0)))
+        else:
+            merged_words.append(source_entry)
+    
+    return merged_words
+
+def load_index(output_dir='json_chapters'):
+    index_path = Path(output_dir) / 'index.json'
+    if not index_path.exists():
+        return {'total_chapters': 0, 'chapters': []}
+    
+    with open(index_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def build_incremental(file_path, output_dir='json_chapters'):
+    """Rewrite only the chapters whose source block hash changed.
+
+    Each chapter's hash is stored in index.json as `source_hash`. Words that
+    survive an edit keep their phonetics, tips and translations; only their
+    source fields are refreshed. Returns the names of rewritten chapters.
+    """
+    Path(output_dir).mkdir(exist_ok=True)
+    
+    # The batch holds the lock of every file it reads until the commit, so
+    # enrichment jobs running meanwhile cannot have their updates overwritten
+    batch = ChapterBatch(output_dir)
+    batch.lock(Path(output_dir) / 'index.json')
+    old_index = load_index(output_dir)
+    old_entries = {chapter['name']: chapter for chapter in old_index.get('chapters', [])}
+    
+    index_chapters = []
+    rebuilt = []
+    # Merging keeps source order, so positions can be indexed from the source
+    headword_index = new_headword_index()
+    
+    for chapter_name, source_hash, source_words in iter_chapter_blocks(file_path):
+        file_path_out = Path(output_dir) / chapter_filename(chapter_name)
+        old_entry = old_entries.get(chapter_name)
+        add_chapter_to_index(headword_index, chapter_name, source_words)
+        
+        if old_entry and old_entry.get('source_hash') == source_hash and file_path_out.exists():
+            index_chapters.append(old_entry)
+            continue
+        
+        enriched_words = []
+        batch.lock(file_path_out)
+        if file_path_out.exists():
+            with span('load', chapter=chapter_name):
+                with open(file_path_out, 'r', encoding='utf-8') as f:
+                    enriched_words = json.load(f).get('words', [])
+        
+        with span('merge', chapter=chapter_name):
+            words = merge_chapter_words(source_words, enriched_words)
+        chapter_data = {
+            'chapter': chapter_name,
+            'word_count': len(words),
+            'words': words
+        }
+        
+        with span('write', chapter=chapter_name):
+            batch.save_chapter(file_path_out, chapter_data)
+        
+        index_chapters.append({
+            'name': chapter_name,
+            'word_count': len(words),
+            'file': chapter_filename(chapter_name),
+            'source_hash': source_hash
+        })
+        rebuilt.append(chapter_name)
+        print(f"Rebuilt {chapter_name}: {len(words)} words to {file_path_out}")
+    
+    index_data = {
+        'total_chapters': len(index_chapters),
+        'chapters': index_chapters
+    }
+    
+    with span('commit'):
+        if index_data != old_index:
+            batch.save_json(Path(output_dir) / 'index.json', index_data)
+        save_headword_index(headword_index, output_dir, batch)
+        batch.commit()
+    
+    print(f"Incremental build: {len(rebuilt)} of {len(index_chapters)} chapters rebuilt")
+    return rebuilt
+
+def build(args):
+    """Run the conversion selected by the command-line options"""
+    if args.incremental:
+        build_incremental(args.source, args.output_dir)
+    elif args.stream:
+        save_chapters_as_json(iter_vocabulary_entries(args.source), args.output_dir, stream=True)
+    else:
+        # Parse the vocabulary file
+        with span('parse'):
+            chapters = parse_vocabulary_file(args.source)
+        
+        # Save as JSON files
+        save_chapters_as_json(chapters, args.output_dir)
+    
+    if args.binary is not None:
+        # Imported here because binary_corpus itself builds on this module
+        from binary_corpus import export_binary_corpus
+        export_binary_corpus(args.output_dir, args.binary or str(Path(args.output_dir) / 'corpus.bin'))
+    
+    if args.split:
+        from chapter_split import export_split_chapters
+        export_split_chapters(args.output_dir)
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert vocabulary.txt into json_chapters/')
+    parser.add_argument('source', nargs='?', default='vocabulary.txt')
+    parser.add_argument('--output-dir', default='json_chapters')
+    parser.add_argument('--stream', action='store_true',
+                        help='write each chapter as soon as it is parsed instead of loading the whole file')
+    parser.add_argument('--incremental', action='store_true',
+                        help='only rewrite chapters whose source changed, keeping enriched fields')
+    parser.add_argument('--binary', nargs='?', const='', metavar='PATH',
+                        help='also export a binary corpus (default: <output-dir>/corpus.bin)')
+    parser.add_argument('--split', action='store_true',
+                        help='also write per-chapter summary files and detail shards to <output-dir>/split')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    
+    with profiling(args.profile, args.profile_stacks):
+        build(args)
+
+if __name__ == "__main__":
+    main()
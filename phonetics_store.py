@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""统一的音标库：音标保存在 phonetics.json，加载一次后按单词O(1)查询
+
+查询不区分大小写，多词短语的空白会被规整，带 / 的拼写变体
+（如 jeopardise/jeopardize）可以用任一拼写查到。
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from functools import lru_cache
+
+from chapter_store import JSON_DIR, list_chapter_files, load_chapter, save_json
+from headword_index import headword_variants
+
+PHONETICS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "phonetics.json")
+
+class PhoneticsStore:
+    """以 phonetics.json 为后端的音标库"""
+
+    def __init__(self, path=PHONETICS_FILE):
+        self.path = path
+        self.entries = {}
+        self._index = {}
+        self._fuzzy = None
+        # 文件内容哈希，供增强缓存作为版本的一部分
+        self.fingerprint = "empty"
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                raw = f.read()
+            self.fingerprint = hashlib.sha256(raw).hexdigest()[:12]
+            for word, phonetic in json.loads(raw).items():
+                self.add(word, phonetic)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, word):
+        return self.lookup(word) is not None
+
+    def add(self, word, phonetic, overwrite=False):
+        """添加一个音标，已存在且 overwrite=False 时保留原值；返回是否写入"""
+        word = word.strip()
+        if not word or not phonetic:
+            return False
+        if word in self.entries and not overwrite:
+            return False
+
+        self.entries[word] = phonetic
+        for variant in headword_variants(word):
+            if overwrite or variant not in self._index:
+                self._index[variant] = phonetic
+        self._fuzzy = None
+        return True
+
+    def lookup(self, word):
+        """查询单词音标，找不到返回None"""
+        for variant in headword_variants(word):
+            phonetic = self._index.get(variant)
+            if phonetic:
+                return phonetic
+        return None
+
+    def fuzzy_index(self):
+        """所有可查询形式的近似匹配索引，首次使用时建立"""
+        if self._fuzzy is None:
+            from fuzzy_match import SymSpellIndex
+
+            self._fuzzy = SymSpellIndex()
+            for variant, phonetic in self._index.items():
+                self._fuzzy.add(variant, phonetic)
+        return self._fuzzy
+
+    def lookup_close(self, word):
+        """精确查询失败时回退到读音相同的其他写法（大小写、英美拼写），
+        返回 (音标, 匹配的词) 或None
+
+        不使用编辑距离，也不去掉词尾：拼写相近的往往是另一个词（effect/affect），
+        原形的读音也与变化形式不同（mountain/mountains），它们的音标不能写入语料，
+        见 suggestions。
+        """
+        from fuzzy_match import spelling_variants
+
+        for variant in spelling_variants(word):
+            phonetic = self._index.get(variant)
+            if phonetic:
+                return phonetic, variant
+        return None
+
+    def suggestions(self, word, limit=3):
+        """找不到音标时提示的相关词：音标库中的原形（去掉复数和动词词尾），再加拼写相近的词"""
+        from fuzzy_match import inflection_stems
+
+        words = [stem for stem in inflection_stems(word) if stem in self._index]
+        words += [key for key, _, _ in self.fuzzy_index().lookup(word, limit=limit)]
+        return list(dict.fromkeys(words))[:limit]
+
+    def bulk_import(self, items, overwrite=False):
+        """批量导入 {单词: 音标} 字典或 (单词, 音标) 序列，返回新增数量"""
+        if isinstance(items, dict):
+            items = items.items()
+        return sum(1 for word, phonetic in items if self.add(word, phonetic, overwrite))
+
+    def save(self, path=None):
+        save_json(path or self.path, dict(sorted(self.entries.items())))
+
+@lru_cache(maxsize=None)
+def get_phonetics_store(path=PHONETICS_FILE):
+    """进程内共享的音标库，只加载一次"""
+    return PhoneticsStore(path)
+
+def builtin_phonetics():
+    """各脚本中内置的音标字典"""
+    import add_phonetics
+    import complete_enhancement
+    import enhance_vocabulary
+
+    return [enhance_vocabulary.PHONETICS_DB, add_phonetics.phonetics_data, complete_enhancement.PLANT_PHONETICS]
+
+def chapter_phonetics(json_dir=JSON_DIR):
+    """章节文件中已有的音标"""
+    for filepath in list_chapter_files(json_dir):
+        for word_obj in load_chapter(filepath)["words"]:
+            if word_obj.get("phonetic"):
+                yield word_obj["word"], word_obj["phonetic"]
+
+def read_phonetics_file(filepath):
+    """读取导入文件：JSON对象，或每行 `单词<TAB>音标` 的文本"""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        if filepath.endswith(".json"):
+            return json.load(f)
+        return [line.rstrip("\n").split("\t", 1) for line in f if "\t" in line]
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the shared phonetics.json store")
+    parser.add_argument("--store", default=PHONETICS_FILE)
+    parser.add_argument("--from-builtin", action="store_true", help="import the dicts built into the enrichment scripts")
+    parser.add_argument("--from-chapters", action="store_true", help="import phonetics already present in json_chapters")
+    parser.add_argument("--import", dest="import_files", nargs="+", default=[], metavar="FILE",
+                        help="import JSON objects or word<TAB>phonetic files")
+    parser.add_argument("--overwrite", action="store_true", help="replace existing entries")
+    parser.add_argument("--lookup", nargs="+", default=[], metavar="WORD")
+    parser.add_argument("--fuzzy", action="store_true",
+                        help="fall back to British/American spellings for --lookup and suggest related words")
+    args = parser.parse_args()
+
+    store = PhoneticsStore(args.store)
+    imported = 0
+    if args.from_builtin:
+        for phonetics in builtin_phonetics():
+            imported += store.bulk_import(phonetics, args.overwrite)
+    if args.from_chapters:
+        imported += store.bulk_import(chapter_phonetics(), args.overwrite)
+    for filepath in args.import_files:
+        imported += store.bulk_import(read_phonetics_file(filepath), args.overwrite)
+
+    if imported:
+        store.save()
+        print(f"Imported {imported} phonetics, {len(store)} entries in {store.path}")
+
+    for word in args.lookup:
+        if args.fuzzy:
+            match = store.lookup_close(word)
+            if match:
+                print(f"{word}: {match[0]} ({match[1]})")
+            else:
+                suggestions = store.suggestions(word)
+                print(f"{word}: -" + (f" (did you mean: {', '.join(suggestions)})" if suggestions else ""))
+        else:
+            print(f"{word}: {store.lookup(word) or '-'}")
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,36 @@
-// Progress management using GitHub Gist
+// Progress management: delta sync with the local server (server.py /__sync),
+// falling back to GitHub Gist when the page is served without it
+const SYNC_URL = '/__sync';
+// Edits made within this window are uploaded together in one request
+const SYNC_DELAY_MS = 1000;
+
 class ProgressManager {
     constructor() {
         this.gistId = null;
         this.token = null;
         this.localProgress = this.loadLocalProgress();
+
+        // Per-word version vectors {device: counter} and words not yet uploaded,
+        // both keyed by JSON.stringify([chapter, word])
+        this.syncAvailable = false;
+        this.syncUser = localStorage.getItem('sync_user') || 'default';
+        this.syncToken = localStorage.getItem('sync_token');
+        this.deviceId = localStorage.getItem('sync_device') || this.createDeviceId();
+        this.syncSince = parseInt(localStorage.getItem('sync_since') || '0', 10);
+        this.clocks = JSON.parse(localStorage.getItem('sync_clocks') || '{}');
+        this.pending = JSON.parse(localStorage.getItem('sync_pending') || '{}');
+        this.syncTimer = null;
+        this.syncing = false;
+
         this.init();
     }
 
+    createDeviceId() {
+        const id = Math.random().toString(36).slice(2, 10) + Date.now().toString(36);
+        localStorage.setItem('sync_device', id);
+        return id;
+    }
+
     loadLocalProgress() {
         // Migrate old format to new format if needed
         const oldFormat = localStorage.getItem('masteredWords');
@@ -43,9 +67,175 @@ class ProgressManager {
         const urlParams = new URLSearchParams(window.location.search);
         this.token = urlParams.get('token') || localStorage.getItem('github_token');
         this.gistId = urlParams.get('gist') || localStorage.getItem('gist_id');
-        
-        if (this.token && this.gistId) {
-            this.loadFromGist();
+        if (urlParams.get('user')) {
+            this.syncUser = urlParams.get('user');
+            localStorage.setItem('sync_user', this.syncUser);
+        }
+        // Shared token for servers started with --sync-token (needed from other devices)
+        if (urlParams.get('sync_token')) {
+            this.syncToken = urlParams.get('sync_token');
+            localStorage.setItem('sync_token', this.syncToken);
+        }
+
+        // The local sync server takes precedence over the Gist
+        this.ready = this.connectSyncServer().then(available => {
+            if (!available && this.token && this.gistId) {
+                this.loadFromGist();
+            }
+        });
+    }
+
+    async connectSyncServer() {
+        try {
+            const response = await fetch(`${SYNC_URL}?user=${encodeURIComponent(this.syncUser)}&since=${this.syncSince}`, {
+                headers: this.syncHeaders()
+            });
+            if (!response.ok) {
+                return false;
+            }
+            this.syncAvailable = true;
+
+            // First sync on this device: upload everything recorded locally so far
+            if (!localStorage.getItem('sync_since')) {
+                const words = [];
+                for (const chapter in this.localProgress) {
+                    for (const word in this.localProgress[chapter]) {
+                        words.push([chapter, word]);
+                    }
+                }
+                this.markChanged(words);
+            }
+
+            const data = await response.json();
+            this.applyRemoteChanges(data);
+            await this.syncNow();
+            return true;
+        } catch (error) {
+            return false;
+        }
+    }
+
+    syncHeaders() {
+        return this.syncToken ? { 'Authorization': `Bearer ${this.syncToken}` } : {};
+    }
+
+    // Save after a local edit; changedWords is a list of [chapter, word]
+    saveProgress(learningProgress, changedWords) {
+        this.localProgress = learningProgress;
+        localStorage.setItem('learningProgress', JSON.stringify(learningProgress));
+
+        if (!this.syncAvailable) {
+            this.saveToGist(learningProgress);
+            return;
+        }
+
+        this.markChanged(changedWords);
+        clearTimeout(this.syncTimer);
+        this.syncTimer = setTimeout(() => this.syncNow(), SYNC_DELAY_MS);
+    }
+
+    markChanged(changedWords) {
+        changedWords.forEach(([chapter, word]) => {
+            const key = JSON.stringify([chapter, word]);
+            const clock = this.clocks[key] || {};
+            clock[this.deviceId] = (clock[this.deviceId] || 0) + 1;
+            this.clocks[key] = clock;
+            this.pending[key] = true;
+        });
+        this.saveSyncState();
+    }
+
+    saveSyncState() {
+        localStorage.setItem('sync_clocks', JSON.stringify(this.clocks));
+        localStorage.setItem('sync_pending', JSON.stringify(this.pending));
+        localStorage.setItem('sync_since', String(this.syncSince));
+    }
+
+    // Upload pending words and download other devices' changes in one request
+    async syncNow() {
+        if (this.syncing) {
+            this.syncAgain = true;
+            return;
+        }
+        this.syncing = true;
+        this.syncAgain = false;
+
+        const sent = {};
+        const changes = Object.keys(this.pending).map(key => {
+            const [chapter, word] = JSON.parse(key);
+            const state = (this.localProgress[chapter] || {})[word] || null;
+            sent[key] = JSON.stringify(this.clocks[key]);
+            return { chapter, word, state, clock: this.clocks[key] };
+        });
+
+        try {
+            const response = await fetch(SYNC_URL, {
+                method: 'POST',
+                headers: { ...this.syncHeaders(), 'Content-Type': 'application/json' },
+                body: JSON.stringify({ user: this.syncUser, since: this.syncSince, changes })
+            });
+            if (!response.ok) {
+                throw new Error('Failed to sync progress');
+            }
+
+            // Words edited again while the request was in flight stay pending
+            for (const key in sent) {
+                if (JSON.stringify(this.clocks[key]) === sent[key]) {
+                    delete this.pending[key];
+                }
+            }
+            const data = await response.json();
+            this.applyRemoteChanges(data);
+            if (data.more) {
+                this.syncAgain = true;
+            }
+            if (changes.length) {
+                this.showSyncStatus('✅ 已同步');
+            }
+        } catch (error) {
+            console.error('Error syncing progress:', error);
+            this.showSyncStatus('❌ 同步失败');
+        } finally {
+            this.syncing = false;
+            if (this.syncAgain) {
+                this.syncNow();
+            }
+        }
+    }
+
+    // Adopt remote words whose version vector includes ours; concurrent local
+    // edits stay pending and are merged by the server on the next upload
+    applyRemoteChanges(data) {
+        let updated = false;
+        data.changes.forEach(({ chapter, word, state, clock }) => {
+            const key = JSON.stringify([chapter, word]);
+            const local = this.clocks[key] || {};
+            const includesLocal = Object.keys(local).every(device => local[device] <= (clock[device] || 0));
+            if (this.pending[key] && !includesLocal) {
+                return;
+            }
+
+            this.clocks[key] = clock;
+            delete this.pending[key];
+            if (state) {
+                this.localProgress[chapter] = this.localProgress[chapter] || {};
+                this.localProgress[chapter][word] = state;
+            } else if (this.localProgress[chapter]) {
+                delete this.localProgress[chapter][word];
+                if (Object.keys(this.localProgress[chapter]).length === 0) {
+                    delete this.localProgress[chapter];
+                }
+            }
+            updated = true;
+        });
+
+        this.syncSince = data.seq;
+        this.saveSyncState();
+        if (updated) {
+            localStorage.setItem('learningProgress', JSON.stringify(this.localProgress));
+            if (window.updateUIFromProgress) {
+                window.updateUIFromProgress();
+            }
         }
     }
 
@@ -220,7 +410,9 @@ class ProgressManager {
         setTimeout(() => status.remove(), 3000);
     }
 
-    setupUI() {
+    async setupUI() {
+        await this.ready;
+
         // Add sync controls to the page
         const syncControl = document.createElement('div');
         syncControl.className = 'sync-control';
@@ -236,7 +428,13 @@ class ProgressManager {
             z-index: 1000;
         `;
 
-        if (!this.token || !this.gistId) {
+        if (this.syncAvailable) {
+            syncControl.innerHTML = `
+                <h4 style="margin: 0 0 10px 0;">本地同步</h4>
+                <p style="margin: 5px 0; font-size: 14px;">✅ 已连接（${this.syncUser}）</p>
+                <button onclick="progressManager.syncNow()" style="padding: 5px 10px;">立即同步</button>
+            `;
+        } else if (!this.token || !this.gistId) {
             syncControl.innerHTML = `
                 <h4 style="margin: 0 0 10px 0;">云端同步设置</h4>
                 <input type="password" id="github-token" placeholder="GitHub Token" style="width: 200px; padding: 5px; margin-bottom: 10px;">
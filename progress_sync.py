@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""学习进度的增量同步（SQLite），替代把整个 learningProgress 写入 Gist
+
+每个 (用户, 章节, 单词) 一行，保存进度状态和版本向量 {设备: 计数}。设备每修改一个单词
+就把该单词版本向量中自己的计数加一，同步时只上传改动过的单词：
+    - 上传的版本向量比已存的新：直接替换
+    - 已存的版本相同或更新：忽略
+    - 两者并发（不同设备各自修改过）：按 merge_states 合并，版本向量取逐项最大值
+删除（重置章节）保存为 state 为 NULL 的墓碑，同样参与比较。
+
+每次写入的行都分配用户内递增的 seq，下载只返回 seq 大于客户端上次看到的值的行，
+一次同步的开销与改动的单词数成正比，与学习历史的长度无关。
+一次上传的所有改动在一个 BEGIN IMMEDIATE 短事务中批量写入。
+"""
+
+import argparse
+import json
+import sqlite3
+import threading
+
+SYNC_DB = ".progress_sync.sqlite"
+# 一次下载最多返回的行数，超出时响应中 more 为 true，客户端继续请求
+DOWNLOAD_LIMIT = 5000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS progress (
+    user TEXT NOT NULL,
+    chapter TEXT NOT NULL,
+    word TEXT NOT NULL,
+    state TEXT,
+    clock TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    PRIMARY KEY (user, chapter, word)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS progress_seq ON progress (user, seq);
+CREATE TABLE IF NOT EXISTS users (
+    user TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+# compare_clocks 的结果
+EQUAL, BEFORE, AFTER, CONCURRENT = "equal", "before", "after", "concurrent"
+
+def compare_clocks(a, b):
+    """版本向量 a 相对于 b：EQUAL、BEFORE（b 包含 a）、AFTER（a 包含 b）或 CONCURRENT"""
+    a_newer = any(count > b.get(device, 0) for device, count in a.items())
+    b_newer = any(count > a.get(device, 0) for device, count in b.items())
+    if a_newer and b_newer:
+        return CONCURRENT
+    if a_newer:
+        return AFTER
+    if b_newer:
+        return BEFORE
+    return EQUAL
+
+def merge_clocks(a, b):
+    return {device: max(a.get(device, 0), b.get(device, 0)) for device in a.keys() | b.keys()}
+
+def merge_states(a, b):
+    """合并两个并发修改的单词状态，结果与参数顺序无关
+
+    删除与修改并发时保留修改；都是修改时取 lastReview 较晚的一方（与 toISOString
+    格式相同的字符串可以直接比较），相同时按内容决定，保证各设备得到同样的结果。
+    """
+    if a is None or b is None:
+        return a if b is None else b
+    def order(state):
+        return (state.get("lastReview") or "", json.dumps(state, sort_keys=True, ensure_ascii=False))
+    return max(a, b, key=order)
+
+def validate_change(change):
+    """检查上传的一项改动，返回 (章节, 单词, 状态, 版本向量)，格式错误时抛出 ValueError
+
+    state 必须出现：只有明确的 "state": null 表示删除，缺少该键（如截断的请求）不算。
+    """
+    try:
+        chapter, word, clock, state = change["chapter"], change["word"], change["clock"], change["state"]
+    except (KeyError, TypeError):
+        raise ValueError(f"Malformed change: {change!r}")
+    if not isinstance(chapter, str) or not isinstance(word, str):
+        raise ValueError(f"Malformed change: {change!r}")
+    if state is not None and not isinstance(state, dict):
+        raise ValueError(f"State must be an object or null: {change!r}")
+    if not isinstance(clock, dict) or not clock or not all(
+            isinstance(device, str) and isinstance(count, int) and count > 0 for device, count in clock.items()):
+        raise ValueError(f"Clock must map device ids to positive counters: {change!r}")
+    return chapter, word, state, clock
+
+class ProgressSync:
+    """学习进度的同步存储，可在多线程服务器中共用一个实例"""
+
+    def __init__(self, path=SYNC_DB):
+        self.path = path
+        # 与 CorpusDB 相同：自动提交模式，写入只在显式的短事务里进行
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def sync(self, user, changes=(), since=0, limit=DOWNLOAD_LIMIT):
+        """上传改动并下载 seq > since 的行
+
+        返回 {"seq", "more", "changes": [{"chapter", "word", "state", "clock"}, ...]}。
+        与本次上传完全相同的行不再返回；下次同步时把 seq 作为 since 传回。
+        """
+        changes = [validate_change(change) for change in changes]
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                accepted = self._apply(user, changes)
+                rows = self.conn.execute(
+                    "SELECT chapter, word, state, clock, seq FROM progress WHERE user = ? AND seq > ? "
+                    "ORDER BY seq LIMIT ?", (user, since, limit + 1)).fetchall()
+                seq = self._user_seq(user)
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+        more = len(rows) > limit
+        if more:
+            rows = rows[:limit]
+            seq = rows[-1][4]
+        return {
+            "seq": seq,
+            "more": more,
+            "changes": [{"chapter": chapter, "word": word, "state": json.loads(state) if state else None,
+                         "clock": json.loads(clock)}
+                        for chapter, word, state, clock, row_seq in rows
+                        if accepted.get((chapter, word)) != row_seq],
+        }
+
+    def _user_seq(self, user):
+        row = self.conn.execute("SELECT seq FROM users WHERE user = ?", (user,)).fetchone()
+        return row[0] if row else 0
+
+    def _apply(self, user, changes):
+        """合并并写入改动，返回 {(章节, 单词): seq}，其中是原样保存了上传内容的行"""
+        seq = self._user_seq(user)
+        current = {}
+        accepted = {}
+        writes = []
+        for chapter, word, state, clock in changes:
+            key = (chapter, word)
+            if key not in current:
+                row = self.conn.execute("SELECT state, clock FROM progress WHERE user = ? AND chapter = ? AND word = ?",
+                                        (user, chapter, word)).fetchone()
+                current[key] = (json.loads(row[0]) if row[0] else None, json.loads(row[1])) if row else None
+
+            stored = current[key]
+            order = AFTER if stored is None else compare_clocks(clock, stored[1])
+            if order in (EQUAL, BEFORE):
+                continue
+            if order == CONCURRENT:
+                state, clock = merge_states(state, stored[0]), merge_clocks(clock, stored[1])
+                accepted.pop(key, None)
+            else:
+                accepted[key] = seq + 1
+            seq += 1
+            current[key] = (state, clock)
+            writes.append((user, chapter, word, None if state is None else json.dumps(state, ensure_ascii=False),
+                           json.dumps(clock, sort_keys=True), seq))
+
+        if writes:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO progress (user, chapter, word, state, clock, seq) VALUES (?, ?, ?, ?, ?, ?)",
+                writes)
+            self.conn.execute("INSERT OR REPLACE INTO users (user, seq) VALUES (?, ?)", (user, seq))
+        return accepted
+
+    def progress(self, user):
+        """用户当前的完整进度（learningProgress 格式，不含墓碑）"""
+        result = {}
+        for chapter, word, state in self.conn.execute(
+                "SELECT chapter, word, state FROM progress WHERE user = ? AND state IS NOT NULL ORDER BY seq", (user,)):
+            result.setdefault(chapter, {})[word] = json.loads(state)
+        return result
+
+    def stats(self):
+        rows = self.conn.execute(
+            "SELECT p.user, COUNT(*), COUNT(p.state), u.seq FROM progress p JOIN users u ON u.user = p.user "
+            "GROUP BY p.user ORDER BY p.user").fetchall()
+        return [{"user": user, "words": live, "tombstones": total - live, "seq": seq}
+                for user, total, live, seq in rows]
+
+    def close(self):
+        self.conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or export the progress sync store")
+    parser.add_argument("--db", default=SYNC_DB)
+    parser.add_argument("--export", metavar="USER", help="print a user's learningProgress as JSON")
+    args = parser.parse_args()
+
+    with ProgressSync(args.db) as store:
+        if args.export:
+            print(json.dumps({"learningProgress": store.progress(args.export)}, ensure_ascii=False, indent=2))
+            return
+        for row in store.stats():
+            print(f"{row['user']:<20} {row['words']:>6} words {row['tombstones']:>6} deleted  seq {row['seq']}")
+
+if __name__ == "__main__":
+    main()
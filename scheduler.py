@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""服务器端的间隔重复调度：与 anki.js 的 AnkiAlgorithm 相同的间隔和优先级
+
+学习进度与浏览器中的 learningProgress 格式相同：
+    {章节: {单词: {"mastered", "reviewCount", "lastReview", "nextReview"}}}
+
+anki.js 的优先级为 overdue*10 + (10 - min(reviewCount, 10))（overdue 以小时计），
+等价于按 nextReview - (10 - min(reviewCount, 10)) * 0.1 小时 升序排列，与当前时间无关。
+所以每个学习者的单词可以放进一个以它为键的最小堆，取前k个待复习单词只需 O(k log n)，
+不必像 sortByAnki 那样每次对整个章节排序。
+
+Scheduler 管理大量学习者，apply_events 批量推进复习状态，daily_queues 预先计算
+每个人的复习队列。
+"""
+
+import argparse
+import heapq
+import json
+import random
+import sys
+import time
+from datetime import datetime, timezone
+
+# 复习间隔（小时），与 anki.js 相同
+INTERVAL_HOURS = {0: 0.01, 1: 0.1, 2: 1, 3: 6, 4: 24, 5: 72, 6: 168, 7: 336, 8: 720, 9: 2160, 10: 4320}
+MAX_LEVEL = 10
+# 间隔乘以 0.9~1.1 的随机系数，避免大量单词同时到期
+JITTER = 0.1
+NEW_WORD_PRIORITY = 1000
+MASTERED_PRIORITY = -1
+# 复习次数每少一次，优先级相当于提前 0.1 小时
+LEVEL_BONUS_SECONDS = 360
+
+ACTIONS = ("review", "master", "unmaster", "relearn")
+
+def parse_time(value):
+    """ISO 时间（如 toISOString 的 2024-05-01T08:00:00.000Z）→ 秒；None 保持None"""
+    if value is None:
+        return None
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+def format_time(seconds):
+    """秒 → 与 Date.toISOString 相同的格式（毫秒精度）"""
+    whole, millis = divmod(round(seconds * 1000), 1000)
+    return datetime.fromtimestamp(whole, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.") + f"{millis:03d}Z"
+
+def review_interval_hours(review_count, rng=random):
+    """下次复习前的小时数
+
+    anki.js 用 setHours(getHours() + hours) 加上带随机系数的小数小时，setHours 会把
+    参数截断为整数，所以实际加上的是 floor(间隔 × 系数) 小时，前两级的间隔实际为0。
+    """
+    hours = INTERVAL_HOURS[min(review_count, MAX_LEVEL)] * (1 - JITTER + rng.random() * 2 * JITTER)
+    return int(hours)
+
+def next_review_time(review_count, now, rng=random):
+    """下次复习的时间（秒），与 Date 一样取到毫秒"""
+    return round(now + review_interval_hours(review_count, rng) * 3600, 3)
+
+def needs_review(state, now):
+    """与 AnkiAlgorithm.needsReview 相同：未掌握且没有 nextReview 或已到期"""
+    if not state or state.get("mastered"):
+        return False
+    next_review = state.get("nextReview")
+    return next_review is None or parse_time(next_review) <= now
+
+def priority_score(state, now):
+    """与 AnkiAlgorithm.getPriorityScore 相同，越大越优先"""
+    if not state:
+        return NEW_WORD_PRIORITY
+    if state.get("mastered"):
+        return MASTERED_PRIORITY
+    next_review = state.get("nextReview")
+    overdue = (now - parse_time(next_review)) / 3600 if next_review else 0
+    return overdue * 10 + (MAX_LEVEL - min(state.get("reviewCount") or 0, MAX_LEVEL))
+
+def new_state():
+    return {"mastered": False, "reviewCount": 0, "lastReview": None, "nextReview": None}
+
+class ReviewQueue:
+    """一个学习者的复习状态和按优先级排列的最小堆
+
+    单词键为 (章节, 单词)。堆中的旧条目不删除，取出时与 _keys 中的当前键比较后丢弃。
+    没有 nextReview 的未掌握单词（正常的进度中不会出现）按载入时间视为到期。
+    """
+
+    def __init__(self, progress=None, now=None):
+        self.states = {}
+        self._heap = []
+        self._keys = {}
+        if progress:
+            self.load(progress, now)
+
+    def __len__(self):
+        return len(self.states)
+
+    def load(self, progress, now=None):
+        """载入 learningProgress 格式的进度"""
+        now = time.time() if now is None else now
+        for chapter, words in progress.items():
+            for word, state in words.items():
+                self.set_state((chapter, word), dict(state), now)
+
+    def progress(self):
+        """导出为 learningProgress 格式"""
+        result = {}
+        for (chapter, word), state in self.states.items():
+            result.setdefault(chapter, {})[word] = state
+        return result
+
+    def set_state(self, key, state, now=None, due_at=None):
+        """设置单词状态并更新堆；due_at 为 nextReview 对应的秒数，已知时省去解析"""
+        self.states[key] = state
+        if state.get("mastered"):
+            self._keys.pop(key, None)
+            return
+        if due_at is None:
+            next_review = state.get("nextReview")
+            due_at = parse_time(next_review) if next_review else (time.time() if now is None else now)
+        heap_key = due_at - (MAX_LEVEL - min(state.get("reviewCount") or 0, MAX_LEVEL)) * LEVEL_BONUS_SECONDS
+        self._keys[key] = heap_key
+        heapq.heappush(self._heap, (heap_key, due_at, key))
+        # 旧条目过多时重建，堆的大小保持在单词数的两倍以内
+        if len(self._heap) > 2 * len(self._keys) + 64:
+            self._heap = [(k, due, item) for k, due, item in self._heap if self._keys.get(item) == k]
+            heapq.heapify(self._heap)
+
+    def state(self, key):
+        return self.states.get(key)
+
+    # 与 chapter.html 中 addReview / toggleMastered / relearnWord 相同的状态变化
+
+    def review(self, key, now, rng=random):
+        state = self.states.get(key) or new_state()
+        state["reviewCount"] = (state.get("reviewCount") or 0) + 1
+        state["lastReview"] = format_time(now)
+        due_at = next_review_time(state["reviewCount"], now, rng)
+        state["nextReview"] = format_time(due_at)
+        self.set_state(key, state, now, due_at)
+        return state
+
+    def toggle_mastered(self, key, now, rng=random):
+        state = self.states.get(key) or new_state()
+        state["mastered"] = not state.get("mastered")
+        state["lastReview"] = format_time(now)
+        if state["mastered"]:
+            state["nextReview"] = None
+        else:
+            state["nextReview"] = format_time(next_review_time(state.get("reviewCount") or 0, now, rng))
+        self.set_state(key, state, now)
+        return state
+
+    def relearn(self, key, now, rng=random):
+        state = self.states.get(key)
+        if state is None:
+            return None
+        due_at = next_review_time(0, now, rng)
+        state.update(mastered=False, reviewCount=0, lastReview=format_time(now), nextReview=format_time(due_at))
+        self.set_state(key, state, now, due_at)
+        return state
+
+    def apply(self, action, key, now, rng=random):
+        """按动作名推进状态：review、master、unmaster、relearn"""
+        if action == "review":
+            return self.review(key, now, rng)
+        if action == "relearn":
+            return self.relearn(key, now, rng)
+        if action in ("master", "unmaster"):
+            state = self.states.get(key)
+            if bool(state and state.get("mastered")) != (action == "master"):
+                return self.toggle_mastered(key, now, rng)
+            return state
+        raise ValueError(f"Unknown action: {action}")
+
+    def due(self, now, limit=20):
+        """优先级最高的 limit 个待复习单词 [(键, 优先级), ...]，顺序与 sortByAnki 相同
+
+        按堆键依次取出，跳过已失效和尚未到期的条目（键比 now 小的未到期单词最多提前
+        一小时），取完后把有效条目放回堆中。
+        """
+        taken = []
+        results = []
+        while self._heap and len(results) < limit:
+            heap_key, due_at, key = self._heap[0]
+            if heap_key > now:
+                break
+            heapq.heappop(self._heap)
+            if self._keys.get(key) != heap_key:
+                continue
+            taken.append((heap_key, due_at, key))
+            if due_at <= now:
+                results.append((key, priority_score(self.states[key], now)))
+        for entry in taken:
+            heapq.heappush(self._heap, entry)
+        return results
+
+    def due_count(self, now):
+        """待复习单词数（O(n)，用于统计）"""
+        return sum(1 for state in self.states.values() if needs_review(state, now))
+
+class Scheduler:
+    """大量学习者的复习队列
+
+    rng 用于间隔的随机系数；传入带种子的 random.Random 可以得到可重复的结果。
+    """
+
+    def __init__(self, rng=None):
+        self.queues = {}
+        self.rng = rng or random.Random()
+
+    def queue(self, user):
+        queue = self.queues.get(user)
+        if queue is None:
+            queue = self.queues[user] = ReviewQueue()
+        return queue
+
+    def load_user(self, user, progress, now=None):
+        self.queues[user] = ReviewQueue(progress, now)
+
+    def apply_events(self, events):
+        """批量推进复习状态
+
+        events 为 (用户, 章节, 单词, 动作, 时间秒) 的可迭代对象，按给定顺序应用，
+        返回处理的事件数。
+        """
+        count = 0
+        for user, chapter, word, action, timestamp in events:
+            self.queue(user).apply(action, (chapter, word), timestamp, self.rng)
+            count += 1
+        return count
+
+    def daily_queues(self, now, limit=50, users=None):
+        """每个学习者此刻的复习队列 {用户: [(章节, 单词), ...]}"""
+        users = self.queues if users is None else users
+        return {user: [key for key, _ in self.queues[user].due(now, limit)] for user in users if user in self.queues}
+
+def simulate(users, words, reviews, seed=1):
+    """生成随机的学习者和按时间排序的复习事件，返回 (Scheduler, 事件列表, 开始时间)"""
+    rng = random.Random(seed)
+    start = parse_time("2025-01-01T00:00:00.000Z")
+    scheduler = Scheduler(random.Random(seed + 1))
+    events = []
+    for user in range(users):
+        moment = start
+        for _ in range(reviews):
+            moment += rng.expovariate(1 / 3600)
+            action = "review" if rng.random() < 0.9 else rng.choice(("master", "unmaster", "relearn"))
+            events.append((f"user{user}", "sim", f"word{rng.randrange(words)}", action, moment))
+    events.sort(key=lambda event: event[4])
+    return scheduler, events, start
+
+def main():
+    parser = argparse.ArgumentParser(description="Spaced-repetition scheduling with per-learner due heaps")
+    parser.add_argument("progress", nargs="*", metavar="PROGRESS_JSON",
+                        help="learningProgress files (or Gist progress.json exports), one per learner")
+    parser.add_argument("--at", help="time to compute the queues for (ISO, default: now)")
+    parser.add_argument("--limit", type=int, default=50, help="words per learner queue")
+    parser.add_argument("--output", help="write the queues as JSON instead of printing them")
+    parser.add_argument("--simulate", type=int, metavar="USERS",
+                        help="time the batch API on random learners instead of loading files")
+    parser.add_argument("--words", type=int, default=2000, help="vocabulary size for --simulate")
+    parser.add_argument("--reviews", type=int, default=200, help="review events per learner for --simulate")
+    args = parser.parse_args()
+
+    if args.simulate:
+        scheduler, events, start = simulate(args.simulate, args.words, args.reviews)
+        started = time.perf_counter()
+        scheduler.apply_events(events)
+        applied = time.perf_counter() - started
+        now = events[-1][4] + 86400 if events else start
+        started = time.perf_counter()
+        queues = scheduler.daily_queues(now, args.limit)
+        queued = time.perf_counter() - started
+        print(f"Applied {len(events)} events for {args.simulate} learners in {applied:.2f}s "
+              f"({len(events) / applied:,.0f}/s)")
+        print(f"Computed {len(queues)} queues of up to {args.limit} words in {queued:.2f}s")
+        return
+
+    now = parse_time(args.at) if args.at else time.time()
+    scheduler = Scheduler()
+    for path in args.progress:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        scheduler.load_user(path, data.get("learningProgress", data), now)
+
+    queues = {user: [{"chapter": chapter, "word": word} for chapter, word in words]
+              for user, words in scheduler.daily_queues(now, args.limit).items()}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"at": format_time(now), "queues": queues}, f, ensure_ascii=False, indent=2)
+        print(f"Saved {len(queues)} queues to {args.output}")
+    else:
+        json.dump(queues, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+
+if __name__ == "__main__":
+    main()
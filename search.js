@@ -0,0 +1,129 @@
+// 全文搜索：读取 search_index.py 生成的分片索引，只加载查询用到的分片
+class VocabularySearch {
+    constructor(baseUrl = 'json_chapters/indexes/search/') {
+        this.baseUrl = baseUrl;
+        this.meta = null;
+        this.shards = {};
+    }
+
+    async load() {
+        if (!this.meta) {
+            this.meta = await (await fetch(`${this.baseUrl}meta.json`)).json();
+            this.stopWords = new Set(this.meta.stop_words);
+            const docs = await this.shard('docs');
+            this.chapters = docs.chapters;
+            this.docs = docs.docs;
+        }
+    }
+
+    shard(key) {
+        if (!this.shards[key]) {
+            const filename = this.meta.shards[key];
+            this.shards[key] = filename
+                ? fetch(`${this.baseUrl}${filename}`).then(response => response.json())
+                : Promise.resolve({});
+        }
+        return this.shards[key];
+    }
+
+    // 与 search_index.py 中的 english_tokens / chinese_query_tokens 保持一致
+    tokenize(query) {
+        const tokens = (query.toLowerCase().match(/[a-z]+(?:'[a-z]+)?/g) || [])
+            .filter(token => !this.stopWords.has(token));
+        for (const run of query.match(/[\u4e00-\u9fff]+/g) || []) {
+            if (run.length === 1) tokens.push(run);
+            for (let i = 0; i < run.length - 1; i++) tokens.push(run.slice(i, i + 2));
+        }
+        return tokens;
+    }
+
+    shardKey(token) {
+        if (token[0] >= 'a' && token[0] <= 'z') return `en-${token[0]}`;
+        return `zh-${String(token.charCodeAt(0) % this.meta.cjk_shards).padStart(2, '0')}`;
+    }
+
+    decode(encoded, into = new Map()) {
+        const bits = this.meta.field_bits;
+        let value = 0;
+        for (const delta of encoded) {
+            value += delta;
+            const docId = Math.floor(value / (1 << bits));
+            into.set(docId, (into.get(docId) || 0) | (value % (1 << bits)));
+        }
+        return into;
+    }
+
+    // 单个汉字也有自己的倒排表（索引同时收录单字和相邻两字）
+    async postings(token) {
+        const shard = await this.shard(this.shardKey(token));
+        return this.decode(shard[token] || []);
+    }
+
+    score(bits) {
+        let score = 0;
+        for (const field in this.meta.weights) {
+            if (bits & this.meta.fields[field]) score += this.meta.weights[field];
+        }
+        return score;
+    }
+
+    async complete(prefix, limit = 20) {
+        prefix = prefix.trim().split(/\s+/).join(' ').toLowerCase();
+        if (!prefix) return [];
+        const first = prefix[0];
+        let node = await this.shard(first >= 'a' && first <= 'z' ? `trie-${first}` : 'trie-_');
+        for (const char of prefix) {
+            node = node[char];
+            if (!node) return [];
+        }
+        const results = [];
+        const stack = [node];
+        while (stack.length && results.length < limit) {
+            node = stack.pop();
+            for (const docId of node.$ || []) {
+                if (!results.includes(docId)) results.push(docId);
+            }
+            stack.push(...Object.keys(node).filter(char => char !== '$').sort().reverse().map(char => node[char]));
+        }
+        return results.slice(0, limit);
+    }
+
+    // 所有词元都出现的单词，按字段权重排序
+    async search(query, limit = 20) {
+        await this.load();
+        let scores = null;
+        for (const token of this.tokenize(query)) {
+            const tokenScores = new Map();
+            for (const [docId, bits] of await this.postings(token)) {
+                tokenScores.set(docId, this.score(bits));
+            }
+            if (scores === null) {
+                scores = tokenScores;
+            } else {
+                for (const [docId, score] of scores) {
+                    if (tokenScores.has(docId)) scores.set(docId, score + tokenScores.get(docId));
+                    else scores.delete(docId);
+                }
+            }
+            if (!scores.size) break;
+        }
+        scores = scores || new Map();
+
+        // 单个英文片段同时做词头前缀匹配，方便边输入边搜索
+        if (/^\s*[A-Za-z][A-Za-z '-]*\s*$/.test(query)) {
+            for (const docId of await this.complete(query, limit)) {
+                scores.set(docId, (scores.get(docId) || 0) + this.meta.weights.word);
+            }
+        }
+
+        return [...scores.entries()]
+            .sort((a, b) => b[1] - a[1] || a[0] - b[0])
+            .slice(0, limit)
+            .map(([docId, score]) => {
+                const [chapterId, index, word, meaning] = this.docs[docId];
+                return { chapter: this.chapters[chapterId], index, word, meaning, score };
+            });
+    }
+}
+
+window.vocabularySearch = new VocabularySearch();
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""全文搜索索引：单词、释义、例句和记忆技巧
+
+- 英文词元来自 word 和 example，中文按单字和相邻两字（bigram）切分 meaning、
+  example_translation 和 tips；查询单个汉字时用单字，更长的查询用相邻两字
+- 倒排表按词元首字符分片，浏览器只需加载查询用到的分片
+- 词头前缀树同样按首字母分片，用于输入时的前缀补全
+
+索引保存在 json_chapters/indexes/search/，meta.json 列出所有分片文件名。
+倒排表中每一项为 (文档号 << 5) | 字段位，按升序差分编码。
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+
+from chapter_store import JSON_DIR, chapter_filename, list_chapter_files, load_chapter
+from headword_index import headword_variants
+
+SEARCH_INDEX_DIR = os.path.join("indexes", "search")
+
+# 字段位，同时决定排序权重
+FIELDS = {
+    "word": (1, 8),
+    "meaning": (2, 4),
+    "example": (4, 2),
+    "example_translation": (8, 2),
+    "tips": (16, 1),
+}
+ENGLISH_FIELDS = ("word", "example")
+CHINESE_FIELDS = ("meaning", "example_translation", "tips")
+FIELD_BITS = 5
+CJK_SHARDS = 16
+
+ENGLISH_RE = re.compile(r"[a-z]+(?:'[a-z]+)?")
+CJK_RE = re.compile(r"[\u4e00-\u9fff]+")
+STOP_WORDS = frozenset("a an and are as at be by for from in is it of on or that the to was were with".split())
+PLACEHOLDER = "[需要翻译]"
+
+def english_tokens(text):
+    return [token for token in ENGLISH_RE.findall(text.lower()) if token not in STOP_WORDS]
+
+def chinese_tokens(text):
+    """建索引用：每个汉字，以及连续汉字中相邻的两字"""
+    tokens = []
+    for run in CJK_RE.findall(text):
+        tokens.extend(run)
+        tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+def chinese_query_tokens(text):
+    """查询用：连续汉字切成相邻两字，单个汉字保留为一字"""
+    tokens = []
+    for run in CJK_RE.findall(text):
+        if len(run) == 1:
+            tokens.append(run)
+        tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+def query_tokens(query):
+    return english_tokens(query) + chinese_query_tokens(query)
+
+def shard_key(token):
+    """英文按首字母分片，中文按首字的码位取模分片"""
+    if "a" <= token[0] <= "z":
+        return f"en-{token[0]}"
+    return f"zh-{ord(token[0]) % CJK_SHARDS:02d}"
+
+def trie_key(headword):
+    first = headword[:1]
+    return f"trie-{first}" if "a" <= first <= "z" else "trie-_"
+
+def encode_postings(postings):
+    """{文档号: 字段位} -> 差分编码列表"""
+    encoded, previous = [], 0
+    for doc_id in sorted(postings):
+        value = doc_id << FIELD_BITS | postings[doc_id]
+        encoded.append(value - previous)
+        previous = value
+    return encoded
+
+def decode_postings(encoded):
+    """差分编码列表 -> {文档号: 字段位}"""
+    postings, value = {}, 0
+    for delta in encoded:
+        value += delta
+        postings[value >> FIELD_BITS] = value & ((1 << FIELD_BITS) - 1)
+    return postings
+
+def trie_insert(trie, key, doc_id):
+    node = trie
+    for char in key:
+        node = node.setdefault(char, {})
+    docs = node.setdefault("$", [])
+    if doc_id not in docs:
+        docs.append(doc_id)
+
+def trie_collect(node, limit):
+    """深度优先收集子树中的文档号（按字母序）"""
+    results = []
+    stack = [node]
+    while stack and len(results) < limit:
+        node = stack.pop()
+        for doc_id in node.get("$", []):
+            if doc_id not in results:
+                results.append(doc_id)
+        stack.extend(node[char] for char in sorted((c for c in node if c != "$"), reverse=True))
+    return results[:limit]
+
+def build_search_index(json_dir=JSON_DIR):
+    """返回 (meta, {分片名: 分片内容})"""
+    chapters, docs = [], []
+    terms, tries = {}, {}
+
+    for filepath in list_chapter_files(json_dir):
+        data = load_chapter(filepath)
+        chapter_id = len(chapters)
+        chapters.append(data["chapter"])
+
+        for position, word_obj in enumerate(data["words"]):
+            doc_id = len(docs)
+            docs.append([chapter_id, position, word_obj.get("word", ""), word_obj.get("meaning", "")])
+
+            for field in ENGLISH_FIELDS + CHINESE_FIELDS:
+                text = word_obj.get(field) or ""
+                if not text or text == PLACEHOLDER:
+                    continue
+                tokens = english_tokens(text) if field in ENGLISH_FIELDS else chinese_tokens(text)
+                bit = FIELDS[field][0]
+                for token in tokens:
+                    shard = terms.setdefault(shard_key(token), {})
+                    postings = shard.setdefault(token, {})
+                    postings[doc_id] = postings.get(doc_id, 0) | bit
+
+            for variant in headword_variants(word_obj.get("word", "")):
+                if variant:
+                    trie_insert(tries.setdefault(trie_key(variant), {}), variant, doc_id)
+
+    shards = {"docs": {"chapters": chapters, "docs": docs}}
+    for key, shard in terms.items():
+        shards[key] = {token: encode_postings(postings) for token, postings in sorted(shard.items())}
+    shards.update(tries)
+
+    meta = {
+        "version": 2,
+        "doc_count": len(docs),
+        "field_bits": FIELD_BITS,
+        "fields": {field: bit for field, (bit, _) in FIELDS.items()},
+        "weights": {field: weight for field, (_, weight) in FIELDS.items()},
+        "cjk_shards": CJK_SHARDS,
+        "stop_words": sorted(STOP_WORDS),
+        "shards": {},
+    }
+    return meta, shards
+
+def save_search_index(meta, shards, output_dir, hashed=False):
+    """写入分片和 meta.json；hashed=True 时分片文件名带内容哈希，可长期缓存"""
+    if os.path.exists(output_dir):
+        shutil.rmtree(output_dir)
+    os.makedirs(output_dir)
+
+    meta = dict(meta, shards={})
+    for key, shard in sorted(shards.items()):
+        body = json.dumps(shard, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        filename = f"{key}.{hashlib.sha256(body).hexdigest()[:10]}.json" if hashed else f"{key}.json"
+        with open(os.path.join(output_dir, filename), "wb") as f:
+            f.write(body)
+        meta["shards"][key] = filename
+
+    with open(os.path.join(output_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, separators=(",", ":"))
+    return output_dir
+
+class SearchIndex:
+    """搜索索引的查询接口，分片按需加载"""
+
+    def __init__(self, index_dir=None):
+        self.index_dir = index_dir or os.path.join(JSON_DIR, SEARCH_INDEX_DIR)
+        with open(os.path.join(self.index_dir, "meta.json"), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self._shards = {}
+        docs = self._shard("docs")
+        self.chapters = docs["chapters"]
+        self.docs = docs["docs"]
+
+    def _shard(self, key):
+        if key not in self._shards:
+            filename = self.meta["shards"].get(key)
+            if filename is None:
+                self._shards[key] = {}
+            else:
+                with open(os.path.join(self.index_dir, filename), "r", encoding="utf-8") as f:
+                    self._shards[key] = json.load(f)
+        return self._shards[key]
+
+    def postings(self, token):
+        """单个词元的 {文档号: 字段位}"""
+        return decode_postings(self._shard(shard_key(token)).get(token, []))
+
+    def score(self, bits):
+        return sum(weight for field, weight in self.meta["weights"].items() if bits & self.meta["fields"][field])
+
+    def complete(self, prefix, limit=20):
+        """词头前缀补全，返回文档号列表"""
+        prefix = " ".join(prefix.split()).lower()
+        if not prefix:
+            return []
+        node = self._shard(trie_key(prefix))
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return []
+        return trie_collect(node, limit)
+
+    def search(self, query, limit=20):
+        """所有词元都出现的单词，按字段权重排序
+
+        返回 [{"chapter", "file", "index", "word", "meaning", "score"}, ...]
+        """
+        scores = None
+        for token in query_tokens(query):
+            postings = self.postings(token)
+            token_scores = {doc_id: self.score(bits) for doc_id, bits in postings.items()}
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {doc_id: scores[doc_id] + token_scores[doc_id] for doc_id in scores if doc_id in token_scores}
+            if not scores:
+                break
+        scores = scores or {}
+
+        # 单个英文片段同时做词头前缀匹配，方便边输入边搜索
+        if re.fullmatch(r"\s*[A-Za-z][A-Za-z '-]*\s*", query or ""):
+            for doc_id in self.complete(query, limit):
+                scores[doc_id] = scores.get(doc_id, 0) + self.meta["weights"]["word"]
+
+        ranked = sorted(scores, key=lambda doc_id: (-scores[doc_id], doc_id))[:limit]
+        return [self.result(doc_id, scores[doc_id]) for doc_id in ranked]
+
+    def suggest(self, query, limit=5):
+        """查询没有结果时的拼写建议（只针对英文词头）"""
+        from fuzzy_match import did_you_mean
+
+        if not ENGLISH_RE.search(query.lower()):
+            return []
+        return did_you_mean(query, limit)
+
+    def result(self, doc_id, score=0):
+        chapter_id, position, word, meaning = self.docs[doc_id]
+        chapter = self.chapters[chapter_id]
+        return {"chapter": chapter, "file": chapter_filename(chapter), "index": position,
+                "word": word, "meaning": meaning, "score": score}
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the full-text search index")
+    parser.add_argument("--json-dir", default=JSON_DIR)
+    parser.add_argument("--output", default=None, help=f"index directory (default: <json-dir>/{SEARCH_INDEX_DIR})")
+    parser.add_argument("--build", action="store_true", help="rebuild the index from the chapter files")
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("queries", nargs="*")
+    args = parser.parse_args()
+
+    index_dir = args.output or os.path.join(args.json_dir, SEARCH_INDEX_DIR)
+    if args.build:
+        meta, shards = build_search_index(args.json_dir)
+        save_search_index(meta, shards, index_dir)
+        size = sum(os.path.getsize(os.path.join(index_dir, name)) for name in os.listdir(index_dir))
+        print(f"Saved search index for {meta['doc_count']} words to {index_dir} ({len(shards)} shards, {size} bytes)")
+
+    if not args.queries:
+        return
+
+    search_index = SearchIndex(index_dir)
+    for query in args.queries:
+        print(f"🔍 {query}")
+        results = search_index.search(query, args.limit)
+        for result in results:
+            print(f"  {result['chapter']}#{result['index']} {result['word']} {result['meaning']} ({result['score']})")
+        if not results:
+            suggestions = search_index.suggest(query)
+            print("  没有结果" + (f"，您是不是要找: {', '.join(suggestions)}" if suggestions else ""))
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,62 @@
 #!/usr/bin/env python3
 """
 简单的HTTP服务器，用于本地运行词汇学习网站
+
+默认使用单线程的 SimpleHTTPRequestHandler；--production 模式下使用多线程服务器，
+启动时预压缩章节JSON、CSS、JS和HTML（gzip，安装了 brotli 时还有 br）并放入
+按 mtime 失效的LRU内存缓存，支持强ETag条件请求，并为带内容哈希的文件名发送长期缓存头。
+
+--sync 时两种模式都提供 /__sync 学习进度增量同步接口（见 progress_sync.py），
+progress.js 检测到该接口时只上传改动过的单词，不再把整个进度写入 Gist。
+同步接口没有用户账号，任何能访问它的人都能读写所有人的进度：默认只接受本机
+（127.0.0.1/::1）的请求；要让局域网中的其他设备同步，用 --sync-token 设置共享令牌，
+客户端在 Authorization: Bearer <令牌> 中携带（页面地址加 ?sync_token=<令牌>）。
 """
+import argparse
+import glob
+import ipaddress
+import gzip
+import hashlib
+import hmac
 import http.server
-import socketserver
 import os
+import re
+import json
+import socketserver
+import threading
+import urllib.parse
+from collections import OrderedDict
+
+from progress_sync import SYNC_DB, ProgressSync
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 # 设置端口
 PORT = 8001
 
-# 切换到当前目录
-os.chdir(os.path.dirname(os.path.abspath(__file__)))
+# 需要预压缩的静态资源
+PRECOMPRESS_PATTERNS = [
+    'json_chapters/**/*.json',
+    '*.css',
+    '*.js',
+    '*.html',
+]
+CACHEABLE_EXTENSIONS = {'.json', '.css', '.js', '.html'}
+
+# 内存缓存上限（原文件加压缩版本的总字节数）
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+ADMIN_CACHE_PATH = '/__admin/cache'
+SYNC_PATH = '/__sync'
+# 同步请求体的大小上限
+SYNC_MAX_BYTES = 16 * 1024 * 1024
+
+# 文件名中带内容哈希（如 交通旅行.3fa9c1.json）的资源可以长期缓存
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{6,}\.[A-Za-z0-9]+$')
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'no-cache'
 
 # 创建请求处理器
 Handler = http.server.SimpleHTTPRequestHandler
@@ -20,9 +66,341 @@ Handler.extensions_map.update({
     '.json': 'application/json',
 })
 
-# 启动服务器
-with socketserver.TCPServer(("", PORT), Handler) as httpd:
-    print(f"服务器已启动！")
-    print(f"请在浏览器中访问: http://localhost:{PORT}")
-    print(f"按 Ctrl+C 停止服务器")
-    httpd.serve_forever()
\ No newline at end of file
+class StaticAsset:
+    """一个预先读入内存的静态文件及其压缩版本"""
+
+    def __init__(self, path, content_type):
+        stat = os.stat(path)
+        self.version = (stat.st_mtime_ns, stat.st_size)
+        with open(path, 'rb') as f:
+            self.body = f.read()
+
+        self.content_type = content_type
+        self.etag = hashlib.sha256(self.body).hexdigest()[:20]
+        self.cache_control = IMMUTABLE_CACHE_CONTROL if HASHED_NAME_RE.search(path) else REVALIDATE_CACHE_CONTROL
+
+        # 优先使用磁盘上已有的 .br/.gz 文件，否则在内存中压缩
+        self.encoded = {
+            'br': read_sibling(path, '.br'),
+            'gzip': read_sibling(path, '.gz'),
+        }
+        if self.encoded['gzip'] is None:
+            self.encoded['gzip'] = gzip.compress(self.body, compresslevel=9, mtime=0)
+        if self.encoded['br'] is None and brotli is not None:
+            self.encoded['br'] = brotli.compress(self.body)
+
+        # 压缩后反而更大的版本不使用
+        for encoding, body in list(self.encoded.items()):
+            if body is None or len(body) >= len(self.body):
+                del self.encoded[encoding]
+
+    @property
+    def size(self):
+        return len(self.body) + sum(len(body) for body in self.encoded.values())
+
+    def select(self, accept_encoding):
+        """根据 Accept-Encoding 选择 (编码, 内容, ETag)"""
+        accepted = parse_accept_encoding(accept_encoding)
+        for encoding in ('br', 'gzip'):
+            if encoding in self.encoded and encoding in accepted:
+                return encoding, self.encoded[encoding], f'"{self.etag}-{encoding}"'
+        return None, self.body, f'"{self.etag}"'
+
+def read_sibling(path, suffix):
+    """读取不比原文件旧的预压缩文件"""
+    sibling = path + suffix
+    if os.path.exists(sibling) and os.path.getmtime(sibling) >= os.path.getmtime(path):
+        with open(sibling, 'rb') as f:
+            return f.read()
+    return None
+
+def parse_accept_encoding(header):
+    """返回客户端接受的编码集合（忽略 q=0 的编码）"""
+    accepted = set()
+    for item in (header or '').split(','):
+        name, _, params = item.strip().partition(';')
+        if params.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        if name:
+            accepted.add(name.strip().lower())
+    return accepted
+
+class AssetCache:
+    """按总字节数限制大小的LRU缓存
+
+    每次读取都会比较文件的 mtime 和大小，增强脚本重写章节后无需重启即可生效。
+    """
+
+    def __init__(self, max_bytes=CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+        self.counters = {'hits': 0, 'misses': 0, 'invalidations': 0, 'evictions': 0}
+
+    def get(self, path):
+        """返回文件对应的 StaticAsset，文件不存在时返回None"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            with self.lock:
+                self._discard(path)
+            return None
+
+        with self.lock:
+            asset = self.entries.get(path)
+            if asset is not None and asset.version == (stat.st_mtime_ns, stat.st_size):
+                self.entries.move_to_end(path)
+                self.counters['hits'] += 1
+                return asset
+            if asset is not None:
+                self._discard(path)
+                self.counters['invalidations'] += 1
+            self.counters['misses'] += 1
+
+        # 读取和压缩在锁外进行，不阻塞其他请求
+        content_type = Handler.extensions_map.get(os.path.splitext(path)[1]) or 'application/octet-stream'
+        asset = StaticAsset(path, content_type)
+
+        with self.lock:
+            self._discard(path)
+            self.entries[path] = asset
+            self.total_bytes += asset.size
+            while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+                _, evicted = self.entries.popitem(last=False)
+                self.total_bytes -= evicted.size
+                self.counters['evictions'] += 1
+        return asset
+
+    def _discard(self, path):
+        asset = self.entries.pop(path, None)
+        if asset is not None:
+            self.total_bytes -= asset.size
+
+    def reset_stats(self):
+        with self.lock:
+            for name in self.counters:
+                self.counters[name] = 0
+
+    def stats(self):
+        with self.lock:
+            lookups = self.counters['hits'] + self.counters['misses']
+            return dict(self.counters,
+                        entries=len(self.entries),
+                        bytes=self.total_bytes,
+                        max_bytes=self.max_bytes,
+                        hit_rate=round(self.counters['hits'] / lookups, 4) if lookups else None)
+
+def warm_cache(cache, root='.'):
+    """启动时读取并压缩所有静态资源"""
+    for pattern in PRECOMPRESS_PATTERNS:
+        for path in glob.glob(os.path.join(root, pattern), recursive=True):
+            if not os.path.basename(path).startswith('._'):
+                cache.get(os.path.abspath(path))
+    # 预热产生的未命中不计入统计
+    cache.reset_stats()
+
+class SyncHandler(Handler):
+    """静态文件之外提供 /__sync 进度同步接口
+
+    POST {"user", "since", "changes": [...]} 上传改动并返回其他设备的改动；
+    GET ?user=...&since=... 只下载。sync_store 为None时不提供该接口。
+    sync_token 为None时只接受本机的请求，否则要求 Authorization: Bearer <sync_token>。
+    """
+
+    sync_store = None
+    sync_token = None
+
+    def do_GET(self):
+        if self.path.split('?', 1)[0] == SYNC_PATH:
+            self.handle_sync(None)
+        else:
+            super().do_GET()
+
+    def do_POST(self):
+        if self.path.split('?', 1)[0] != SYNC_PATH:
+            self.send_error(405)
+            return
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > SYNC_MAX_BYTES:
+            self.send_error(413)
+            return
+        self.handle_sync(self.rfile.read(length))
+
+    def handle_sync(self, body):
+        if self.sync_store is None:
+            self.send_error(404)
+            return
+        if not self.sync_authorized():
+            self.send_json(403, {'error': 'sync requires a token for non-local clients'
+                                 if self.sync_token is None else 'invalid sync token'})
+            return
+        try:
+            if body is None:
+                query = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+                request = {name: values[0] for name, values in query.items()}
+            else:
+                request = json.loads(body)
+            user = request.get('user') or 'default'
+            if not isinstance(user, str):
+                raise ValueError('user must be a string')
+            result = self.sync_store.sync(user, request.get('changes') or [], int(request.get('since') or 0))
+        except (ValueError, TypeError, AttributeError) as error:
+            self.send_json(400, {'error': str(error)})
+            return
+        self.send_json(200, result)
+
+    def sync_authorized(self):
+        if self.sync_token is None:
+            try:
+                return ipaddress.ip_address(self.client_address[0]).is_loopback
+            except ValueError:
+                return False
+        scheme, _, token = (self.headers.get('Authorization') or '').partition(' ')
+        return scheme.lower() == 'bearer' and hmac.compare_digest(token.strip().encode('utf-8'),
+                                                                  self.sync_token.encode('utf-8'))
+
+    def send_json(self, status, data):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        # 首次同步可能下载全部进度，较大时压缩
+        if len(body) > 1024 and 'gzip' in parse_accept_encoding(self.headers.get('Accept-Encoding')):
+            body = gzip.compress(body, compresslevel=6)
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_head(self):
+        # 同步数据库（及其 -wal/-shm 文件）在网站根目录下时不能作为静态文件下载
+        if self.sync_store is not None and os.path.abspath(self.translate_path(self.path)).startswith(self.sync_store.path):
+            self.send_error(404)
+            return None
+        return super().send_head()
+
+class ProductionHandler(SyncHandler):
+    """从内存缓存中的预压缩资源响应，支持ETag和304"""
+
+    cache = AssetCache()
+
+    def do_GET(self):
+        if self.path.split('?', 1)[0] == ADMIN_CACHE_PATH:
+            self.send_cache_stats()
+        elif not self.send_asset(head_only=False):
+            super().do_GET()
+
+    def do_HEAD(self):
+        if not self.send_asset(head_only=True):
+            super().do_HEAD()
+
+    def send_cache_stats(self):
+        self.send_json(200, self.cache.stats())
+
+    def send_asset(self, head_only):
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            path = os.path.join(path, 'index.html')
+        if os.path.splitext(path)[1] not in CACHEABLE_EXTENSIONS or os.path.basename(path).startswith('._'):
+            return False
+        asset = self.cache.get(path)
+        if asset is None:
+            return False
+
+        encoding, body, etag = asset.select(self.headers.get('Accept-Encoding'))
+
+        if etag_matches(self.headers.get('If-None-Match'), etag):
+            self.send_response(304)
+            self.send_validators(asset, etag)
+            self.end_headers()
+            return True
+
+        self.send_response(200)
+        self.send_header('Content-Type', asset.content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.send_validators(asset, etag)
+        self.end_headers()
+        if not head_only:
+            self.wfile.write(body)
+        return True
+
+    def send_validators(self, asset, etag):
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', asset.cache_control)
+        self.send_header('Vary', 'Accept-Encoding')
+
+def etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    return etag in (tag.strip() for tag in if_none_match.split(','))
+
+def open_sync_store(path, token=None):
+    """打开同步数据库并交给请求处理器，path 为None时不提供同步接口"""
+    if path is None:
+        return None
+    store = SyncHandler.sync_store = ProgressSync(os.path.abspath(path))
+    SyncHandler.sync_token = token
+    access = '需要令牌' if token else '仅限本机'
+    print(f"进度同步接口: {SYNC_PATH}（{access}，数据库 {store.path}）")
+    return store
+
+def serve_simple(port):
+    # 启动服务器
+    with socketserver.TCPServer(("", port), SyncHandler) as httpd:
+        print(f"服务器已启动！")
+        print(f"请在浏览器中访问: http://localhost:{port}")
+        print(f"按 Ctrl+C 停止服务器")
+        httpd.serve_forever()
+
+def serve_production(port, cache_max_bytes=CACHE_MAX_BYTES):
+    cache = ProductionHandler.cache = AssetCache(cache_max_bytes)
+    warm_cache(cache)
+    assets = list(cache.entries.values())
+    raw_size = sum(len(asset.body) for asset in assets)
+    gzip_size = sum(len(asset.encoded.get('gzip', asset.body)) for asset in assets)
+    print(f"已预压缩 {len(assets)} 个文件: {raw_size} → {gzip_size} 字节 (gzip)")
+    print(f"缓存统计: http://localhost:{port}{ADMIN_CACHE_PATH}")
+    if brotli is None:
+        print("未安装 brotli，仅提供 gzip 压缩")
+
+    with http.server.ThreadingHTTPServer(("", port), ProductionHandler) as httpd:
+        print(f"生产模式服务器已启动！")
+        print(f"请在浏览器中访问: http://localhost:{port}")
+        print(f"按 Ctrl+C 停止服务器")
+        httpd.serve_forever()
+
+def main():
+    parser = argparse.ArgumentParser(description='本地运行词汇学习网站')
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--production', action='store_true',
+                        help='多线程、预压缩、ETag和缓存头')
+    parser.add_argument('--cache-mb', type=int, default=CACHE_MAX_BYTES // (1024 * 1024),
+                        help='生产模式内存缓存上限（MB）')
+    parser.add_argument('--root', default='.',
+                        help='网站根目录，相对于脚本所在目录（如 build_site.py 生成的 dist）')
+    parser.add_argument('--sync', action='store_true',
+                        help='提供 /__sync 学习进度同步接口（默认只接受本机请求）')
+    parser.add_argument('--sync-db', default=SYNC_DB,
+                        help='学习进度同步数据库，相对于脚本所在目录')
+    parser.add_argument('--sync-token', default=os.environ.get('SYNC_TOKEN'),
+                        help='共享令牌，设置后接受任何地址带此令牌的同步请求（默认读取环境变量 SYNC_TOKEN）')
+    args = parser.parse_args()
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    open_sync_store(os.path.join(script_dir, args.sync_db) if args.sync else None, args.sync_token)
+
+    # 切换到网站根目录
+    os.chdir(os.path.join(script_dir, args.root))
+
+    if args.production:
+        serve_production(args.port, args.cache_mb * 1024 * 1024)
+    else:
+        serve_simple(args.port)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""本地的 Chat Completions 桩服务器，用于在不调用真实接口的情况下测试 ai_enrichment
+
+每个请求返回由最后一条消息推出的固定内容，可以预先安排若干次失败（如 429、500）
+来测试重试，并记录请求时间和最大并发数来检查限速。
+
+    python stub_chat_server.py --port 8765 --fail 429 500
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 python ai_enrichment.py tips --chapters 自然地理
+"""
+
+import argparse
+import http.server
+import json
+import threading
+import time
+
+class StubState:
+    """桩服务器的共享状态：待返回的失败状态码和请求记录"""
+
+    def __init__(self, failures=(), delay=0.0):
+        self.failures = list(failures)
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.requests = []
+        self.active = 0
+        self.max_active = 0
+
+    def next_failure(self):
+        with self.lock:
+            return self.failures.pop(0) if self.failures else None
+
+def reply_for(messages):
+    """由最后一条消息得到的确定回复"""
+    content = messages[-1]["content"] if messages else ""
+    return f"【桩】{content.splitlines()[0] if content else ''}"
+
+class StubHandler(http.server.BaseHTTPRequestHandler):
+    state = StubState()
+
+    def do_POST(self):
+        state = self.state
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        with state.lock:
+            state.requests.append((time.monotonic(), body))
+            state.active += 1
+            state.max_active = max(state.max_active, state.active)
+        try:
+            if state.delay:
+                time.sleep(state.delay)
+            failure = state.next_failure()
+            if not self.path.endswith("/chat/completions"):
+                self.send_json(404, {"error": {"message": "not found"}})
+            elif failure:
+                self.send_json(failure, {"error": {"message": f"stub failure {failure}"}})
+            else:
+                self.send_json(200, {"choices": [{"message": {"role": "assistant",
+                                                              "content": reply_for(body.get("messages", []))}}]})
+        finally:
+            with state.lock:
+                state.active -= 1
+
+    def send_json(self, status, data):
+        payload = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_stub_server(failures=(), delay=0.0, port=0):
+    """在后台线程启动桩服务器，返回 (服务器, 状态, base_url)；用完后调用 shutdown"""
+    state = StubState(failures, delay)
+    handler = type("BoundStubHandler", (StubHandler,), {"state": state})
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd, state, f"http://127.0.0.1:{httpd.server_address[1]}/v1"
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve canned chat completions for testing ai_enrichment.py")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fail", nargs="*", type=int, default=[], metavar="STATUS",
+                        help="status codes to return for the first requests, in order")
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds to wait before each reply")
+    args = parser.parse_args()
+
+    httpd, state, base_url = start_stub_server(args.fail, args.delay, args.port)
+    print(f"Stub chat completions at {base_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        httpd.shutdown()
+        print(f"\nServed {len(state.requests)} requests, at most {state.max_active} at once")
+
+if __name__ == "__main__":
+    main()
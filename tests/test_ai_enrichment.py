@@ -0,0 +1,72 @@
+import pytest
+
+from ai_enrichment import AIEnricher, ChatClient
+from stub_chat_server import start_stub_server
+
+def make_words(count, **extra):
+    return [dict({"word": f"word{i}", "pos": "n.", "meaning": f"释义{i}"}, **extra) for i in range(count)]
+
+@pytest.fixture
+def stub():
+    servers = []
+
+    def start(failures=(), delay=0.0):
+        httpd, state, base_url = start_stub_server(failures, delay)
+        servers.append(httpd)
+        return state, ChatClient(base_url, "test-key", "stub", max_retries=3, timeout=5, backoff=0.01)
+
+    yield start
+    for httpd in servers:
+        httpd.shutdown()
+        httpd.server_close()
+
+def test_requests_respect_rate_and_concurrency(stub, tmp_path):
+    state, client = stub(delay=0.05)
+    enricher = AIEnricher("tips", concurrency=4, rate=20, batch_size=30, journal_dir=str(tmp_path), client=client)
+    words = make_words(30)
+
+    assert enricher("章", words) == (30, 0)
+    assert all(word["tips"].startswith("【桩】单词: word") for word in words)
+    assert state.max_active <= 4
+    # 令牌桶允许20个突发，剩下10个按每秒20个发出
+    times = [moment for moment, _ in state.requests]
+    assert max(times) - min(times) >= 0.45
+
+def test_429_and_5xx_are_retried(stub, tmp_path):
+    state, client = stub(failures=[429, 500, 503])
+    enricher = AIEnricher("tips", journal_dir=str(tmp_path), client=client)
+    words = make_words(1)
+
+    assert enricher("章", words) == (1, 0)
+    assert len(state.requests) == 4
+    assert words[0]["tips"] == "【桩】单词: word0"
+
+def test_other_client_errors_fail_without_retry(stub, tmp_path):
+    state, client = stub(failures=[400])
+    enricher = AIEnricher("tips", journal_dir=str(tmp_path), client=client)
+    words = make_words(1, tips="【基础记忆】原有技巧")
+
+    assert enricher("章", words) == (0, 1)
+    assert len(state.requests) == 1
+    assert words[0]["tips"] == "【基础记忆】原有技巧"
+
+def test_rerun_resumes_from_journal(stub, tmp_path):
+    state, client = stub()
+    enricher = AIEnricher("tips", batch_size=2, journal_dir=str(tmp_path), client=client)
+    enricher("章", make_words(5))
+    assert len(state.requests) == 5
+
+    # 崩溃时留下的半行被忽略
+    with open(enricher.journal_path("章"), "a", encoding="utf-8") as f:
+        f.write('{"index": 4, "key": "trunc')
+
+    words = make_words(5)
+    words[3]["meaning"] = "改过的释义"
+    assert enricher("章", words) == (5, 0)
+    # 只有输入变化的单词重新请求
+    assert len(state.requests) == 6
+    assert words[0]["tips"] == "【桩】单词: word0"
+
+    enricher.chapter_saved("章")
+    enricher("章", make_words(5))
+    assert len(state.requests) == 11
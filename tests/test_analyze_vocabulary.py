@@ -0,0 +1,34 @@
+import numpy as np
+
+from analyze_vocabulary import (TRANSLATION_PLACEHOLDER, analyze_vocabulary_data, coverage_by_chapter,
+                                load_corpus_table, missing_by_chapter)
+from chapter_store import save_chapter
+
+def write_corpus(directory):
+    save_chapter(str(directory / "a.json"), {"chapter": "a", "words": [
+        {"word": "river", "phonetic": "/ˈrɪvə/", "example": "A river.", "example_translation": "一条河。"},
+        {"word": "lake", "example": "A lake.", "example_translation": TRANSLATION_PLACEHOLDER},
+    ]})
+    save_chapter(str(directory / "b.json"), {"chapter": "b", "words": [{"word": "hill"}]})
+
+def test_table_holds_masks_and_lengths_only(tmp_path):
+    write_corpus(tmp_path)
+    table = load_corpus_table(str(tmp_path))
+    assert table.present["phonetic"].dtype == np.bool_
+    assert table.present["example_translation"].tolist() == [True, False, False]
+    assert table.lengths["example"].dtype == np.int32
+    assert table.lengths["example"].tolist() == [8, 7, 0]
+    assert [(row["name"], row["total_words"], row["with_phonetics"], row["with_examples"],
+             row["with_example_translations"]) for row in coverage_by_chapter(table)] == [
+        ("a", 2, 1, 2, 1), ("b", 1, 0, 0, 0)]
+    assert missing_by_chapter(table, "phonetic") == [["lake"], ["hill"]]
+    assert missing_by_chapter(table, "example") == [[], ["hill"]]
+
+def test_report_formats_engine_results(tmp_path, capsys):
+    write_corpus(tmp_path)
+    analyze_vocabulary_data(str(tmp_path))
+    report = capsys.readouterr().out
+    assert "📖 Total words: 3" in report
+    assert "🌐 Words with example translations: 1 (33.3%)" in report
+    assert " 2. b: 1 missing phonetics\n    Examples: hill" in report
+    assert " 1. b: 1 missing examples\n    Examples: hill" in report
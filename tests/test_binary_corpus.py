@@ -0,0 +1,23 @@
+from binary_corpus import BinaryCorpus, export_binary_corpus
+from parse_vocabulary import save_chapters_as_json
+
+CHAPTERS = {
+    "自然地理": [{"word": "river", "pos": "n.", "meaning": "河", "example": "A river."},
+                 {"word": "jeopardise/jeopardize", "pos": "v.", "meaning": "危及"}],
+    "交通旅行": [{"word": "voyage", "pos": "n.", "meaning": "航行"}],
+}
+
+def test_lookup_and_close_after_raw_field(tmp_path):
+    save_chapters_as_json(CHAPTERS, str(tmp_path))
+    path = str(tmp_path / "corpus.bin")
+    assert export_binary_corpus(str(tmp_path), path) == 3
+
+    corpus = BinaryCorpus(path)
+    raw = corpus.raw_field(0, "meaning")
+    assert raw == "河".encode("utf-8")
+    assert corpus.field(0, "example") == "A river."
+    assert corpus.lookup("Jeopardize") == [CHAPTERS["自然地理"][1]]
+    assert [corpus.chapter_of(index) for index in corpus.find("voyage")] == ["交通旅行"]
+    # 返回的字节不引用 mmap，持有它时也能关闭
+    corpus.close()
+    assert raw.decode("utf-8") == "河"
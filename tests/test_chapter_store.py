@@ -0,0 +1,113 @@
+import fcntl
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from chapter_store import (BATCH_JOURNAL, LOCK_DIR, ChapterBatch, apply_journal, encode_json, list_chapter_files,
+                           load_chapter, recover_batch, save_chapter)
+
+def chapter(name, words):
+    return {"chapter": name, "word_count": len(words), "words": words}
+
+def is_locked(filepath):
+    """另开一个文件描述符尝试非阻塞加锁（flock 对不同的打开实例互斥）"""
+    directory, name = os.path.split(filepath)
+    with open(os.path.join(directory, LOCK_DIR, f"{name}.lock"), "a") as f:
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return True
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        return False
+
+@pytest.fixture
+def json_dir(tmp_path):
+    directory = tmp_path / "json_chapters"
+    directory.mkdir()
+    save_chapter(str(directory / "a.json"), chapter("a", [{"word": "alpha"}]))
+    save_chapter(str(directory / "b.json"), chapter("b", [{"word": "beta"}]))
+    return str(directory)
+
+def test_batch_holds_chapter_locks_from_read_until_commit(json_dir):
+    a, b = os.path.join(json_dir, "a.json"), os.path.join(json_dir, "b.json")
+    batch = ChapterBatch(json_dir)
+    data = batch.load_chapter(a)
+    assert is_locked(a) and not is_locked(b)
+    data["words"].append({"word": "alpha2"})
+    batch.save_chapter(a, data)
+    batch.save_chapter(b, chapter("b", []))
+    assert is_locked(b)
+    batch.commit()
+    assert not is_locked(a) and not is_locked(b)
+    assert len(load_chapter(a)["words"]) == 2
+
+def test_discard_releases_locks_and_keeps_files(json_dir):
+    a = os.path.join(json_dir, "a.json")
+    with pytest.raises(RuntimeError):
+        with ChapterBatch(json_dir) as batch:
+            batch.save_chapter(a, chapter("a", []))
+            raise RuntimeError
+    assert not is_locked(a)
+    assert load_chapter(a)["words"] == [{"word": "alpha"}]
+    assert not [name for name in os.listdir(json_dir) if name.endswith(".tmp")]
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+def staged_batch(json_dir):
+    """暂存两个章节和 index.json 的新内容，返回 (批量, 日志中的文件列表)"""
+    batch = ChapterBatch(json_dir)
+    batch.save_chapter(os.path.join(json_dir, "a.json"), chapter("a", [{"word": "new-a"}]))
+    batch.save_chapter(os.path.join(json_dir, "b.json"), chapter("b", [{"word": "new-b"}]))
+    batch.save_json(os.path.join(json_dir, "index.json"), {"total_chapters": 2})
+    files = [[os.path.relpath(temp_path, json_dir), os.path.relpath(target, json_dir)]
+             for temp_path, target in batch.staged]
+    return batch, files
+
+def test_recovery_finishes_a_batch_that_crashed_after_the_commit_point(json_dir):
+    batch, files = staged_batch(json_dir)
+    with open(os.path.join(json_dir, BATCH_JOURNAL), "wb") as f:
+        f.write(encode_json({"files": files}))
+    # 崩溃时只完成了第一个 rename
+    apply_journal(json_dir, files[:1])
+    batch.release()
+
+    assert load_chapter(os.path.join(json_dir, "b.json"))["words"] == [{"word": "beta"}]
+    # 读者在列出章节时先完成恢复
+    assert [os.path.basename(path) for path in list_chapter_files(json_dir)] == ["a.json", "b.json"]
+    assert load_chapter(os.path.join(json_dir, "a.json"))["words"] == [{"word": "new-a"}]
+    assert load_chapter(os.path.join(json_dir, "b.json"))["words"] == [{"word": "new-b"}]
+    assert load_chapter(os.path.join(json_dir, "index.json")) == {"total_chapters": 2}
+    assert not os.path.exists(os.path.join(json_dir, BATCH_JOURNAL))
+    assert not [name for name in os.listdir(json_dir) if name.endswith(".tmp")]
+
+def test_recovery_is_idempotent(json_dir):
+    batch, files = staged_batch(json_dir)
+    with open(os.path.join(json_dir, BATCH_JOURNAL), "wb") as f:
+        f.write(encode_json({"files": files}))
+    apply_journal(json_dir, files)
+    batch.release()
+    # 所有 rename 都已完成，只是日志还没删除
+    recover_batch(json_dir)
+    recover_batch(json_dir)
+    assert load_chapter(os.path.join(json_dir, "b.json"))["words"] == [{"word": "new-b"}]
+    assert not os.path.exists(os.path.join(json_dir, BATCH_JOURNAL))
+
+def test_recovery_drops_uncommitted_temps_of_dead_processes(json_dir):
+    orphan = os.path.join(json_dir, f".a.json.{dead_pid()}-0.tmp")
+    with open(orphan, "wb") as f:
+        f.write(encode_json(chapter("a", [])))
+    # 本进程仍在进行的批量写入不受影响
+    batch = ChapterBatch(json_dir)
+    batch.save_chapter(os.path.join(json_dir, "b.json"), chapter("b", [{"word": "new-b"}]))
+
+    recover_batch(json_dir)
+    assert not os.path.exists(orphan)
+    assert load_chapter(os.path.join(json_dir, "a.json"))["words"] == [{"word": "alpha"}]
+    batch.commit()
+    assert load_chapter(os.path.join(json_dir, "b.json"))["words"] == [{"word": "new-b"}]
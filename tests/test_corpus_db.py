@@ -0,0 +1,33 @@
+import json
+import os
+
+from corpus_db import CorpusDB
+from headword_index import HEADWORD_INDEX_FILE
+from parse_vocabulary import save_chapters_as_json
+
+CHAPTERS = {
+    "自然地理": [{"word": "river", "pos": "n.", "meaning": "河", "example": "A river."}],
+    "交通旅行": [{"word": "voyage", "pos": "n.", "meaning": "航行"}, {"word": "lake", "pos": "n.", "meaning": "湖"}],
+}
+
+def read(directory, name):
+    with open(os.path.join(directory, name), encoding="utf-8") as f:
+        return json.load(f)
+
+def test_export_round_trips_the_json_tree(tmp_path):
+    json_dir = str(tmp_path / "json_chapters")
+    save_chapters_as_json(CHAPTERS, json_dir)
+    before = {name: read(json_dir, name) for name in ("index.json", "自然地理.json", "交通旅行.json", HEADWORD_INDEX_FILE)}
+
+    with CorpusDB(str(tmp_path / "corpus.sqlite")) as db:
+        db.import_json(json_dir)
+        (word_id, _), = db.chapter_rows("自然地理")
+        db.upsert_enrichments([(word_id, "phonetic", "/ˈrɪvə/")])
+        assert db.export_json(json_dir) == 2
+
+    after = {name: read(json_dir, name) for name in before}
+    # 导出的词头索引与 parse_vocabulary 生成的章节编号相同
+    assert after[HEADWORD_INDEX_FILE] == before[HEADWORD_INDEX_FILE]
+    assert after["index.json"] == before["index.json"]
+    assert after["交通旅行.json"] == before["交通旅行.json"]
+    assert after["自然地理.json"]["words"] == [dict(CHAPTERS["自然地理"][0], phonetic="/ˈrɪvə/")]
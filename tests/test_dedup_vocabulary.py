@@ -0,0 +1,24 @@
+from dedup_vocabulary import find_duplicate_clusters, homograph_pairs, merge_cluster
+
+TIP = "【联想】拧开龙头，水流出来"
+
+def test_homographs_do_not_share_enrichments():
+    words = [{"word": "tap", "meaning": "旋塞；龙头", "phonetic": "/tæp/", "tips": TIP},
+             {"word": "tap", "meaning": "轻拍，轻扣，开发"}]
+    assert find_duplicate_clusters(words) == [[0, 1]]
+    assert merge_cluster(words) == set()
+    assert "tips" not in words[1] and "phonetic" not in words[1]
+    assert homograph_pairs(words) == [(0, 1)]
+
+def test_spelling_variants_with_a_shared_sense_are_merged():
+    words = [{"word": "vapour/vapor", "meaning": "蒸汽；水汽", "phonetic": "/ˈveɪpə/", "tips": "【联想】水汽蒸发"},
+             {"word": "vapor", "meaning": "水汽"}]
+    assert merge_cluster(words) == {1}
+    assert words[1]["phonetic"] == "/ˈveɪpə/" and words[1]["tips"] == "【联想】水汽蒸发"
+    assert homograph_pairs(words) == []
+
+def test_ipa_in_the_meaning_is_not_a_sense():
+    words = [{"word": "résumé/resume", "meaning": "UK /ˈrez.juː.meɪ/ 履历；简历", "phonetic": "/ˈrezjuːmeɪ/"},
+             {"word": "resume", "meaning": "重新开始；（中断后的）继续"}]
+    assert merge_cluster(words) == set()
+    assert "phonetic" not in words[1]
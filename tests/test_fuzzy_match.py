@@ -0,0 +1,57 @@
+import json
+
+from fuzzy_match import SymSpellIndex, inflection_stems, spelling_variants
+from phonetics_store import PhoneticsStore
+
+def make_store(tmp_path, entries):
+    path = tmp_path / "phonetics.json"
+    path.write_text(json.dumps(entries), encoding="utf-8")
+    return PhoneticsStore(str(path))
+
+def test_lookup_close_swaps_spelling_and_case(tmp_path):
+    store = make_store(tmp_path, {"colour": "/ˈkʌlə/", "jeopardise/jeopardize": "/ˈdʒepədaɪz/",
+                                  "Pacific": "/pəˈsɪfɪk/", "centre": "/ˈsentə/"})
+    assert store.lookup_close("color") == ("/ˈkʌlə/", "colour")
+    assert store.lookup_close("center") == ("/ˈsentə/", "centre")
+    assert store.lookup_close("jeopardize")[0] == "/ˈdʒepədaɪz/"
+    assert store.lookup_close("pacific")[0] == "/pəˈsɪfɪk/"
+
+def test_inflected_forms_only_suggest_the_stem(tmp_path):
+    store = make_store(tmp_path, {"river": "/ˈrɪvə/", "country": "/ˈkʌntri/"})
+    # 原形的音标不是复数形式的读音
+    assert store.lookup_close("rivers") is None
+    assert store.lookup_close("countries") is None
+    assert store.suggestions("rivers")[0] == "river"
+    assert store.suggestions("countries")[0] == "country"
+
+def test_real_store_does_not_copy_stem_phonetics():
+    store = PhoneticsStore()
+    for word in ("evening", "mountains", "ranges", "glasses", "blessing"):
+        assert store.lookup(word) is None, word
+        assert store.lookup_close(word) is None, word
+    assert store.suggestions("mountains")[0] == "mountain"
+    assert "even" in store.suggestions("evening")
+
+def test_lookup_close_never_uses_a_different_word(tmp_path):
+    store = make_store(tmp_path, {"affect": "/əˈfekt/", "implement": "/ˈɪmplɪment/", "goose": "/ɡuːs/",
+                                  "desert": "/ˈdezət/", "quiet": "/ˈkwaɪət/", "economics": "/ˌiːkəˈnɒmɪks/"})
+    for word in ("effect", "complement", "loose", "dessert", "quite", "economic"):
+        assert store.lookup_close(word) is None, word
+    # 拼写相近的词仍可作为建议
+    assert store.fuzzy_index().lookup("effect", limit=1)[0][0] == "affect"
+
+def test_spelling_variants_keep_short_words_and_inflections():
+    assert spelling_variants("four") == ["four"]
+    assert spelling_variants("analyse") == ["analyse", "analyze"]
+    assert spelling_variants("stopped") == ["stopped"]
+    assert "stop" in inflection_stems("stopped")
+    assert inflection_stems("glass") == []
+
+def test_symspell_lookup_within_distance():
+    index = SymSpellIndex()
+    for word in ("altitude", "latitude", "attitude"):
+        index.add(word)
+    assert index.lookup("altitud", max_distance=1) == [("altitude", "altitude", 1)]
+    assert index.lookup("altitudes") == [("altitude", "altitude", 1), ("attitude", "attitude", 2),
+                                         ("latitude", "latitude", 2)]
+    assert index.lookup("altitude", limit=1) == [("altitude", "altitude", 0)]
@@ -0,0 +1,24 @@
+import json
+import os
+
+from headword_index import HEADWORD_INDEX_FILE, HeadwordIndex, build_headword_index
+from parse_vocabulary import save_chapters_as_json
+
+CHAPTERS = {
+    "自然地理": [{"word": "river", "pos": "n.", "meaning": "河"}, {"word": "jeopardise/jeopardize", "pos": "v.", "meaning": "危及"}],
+    "交通旅行": [{"word": "voyage", "pos": "n.", "meaning": "航行"}, {"word": "River", "pos": "n.", "meaning": "河"}],
+}
+
+def test_rebuilt_index_numbers_chapters_in_source_order(tmp_path):
+    save_chapters_as_json(CHAPTERS, str(tmp_path))
+    with open(os.path.join(tmp_path, HEADWORD_INDEX_FILE), encoding="utf-8") as f:
+        saved = json.load(f)
+
+    # 文件名顺序（交通旅行 < 自然地理）与源文件顺序不同，重建后编号不变
+    assert build_headword_index(str(tmp_path)) == saved
+    assert saved["chapters"] == ["自然地理", "交通旅行"]
+
+    index = HeadwordIndex(str(tmp_path))
+    assert index.lookup("RIVER") == [("自然地理", 0), ("交通旅行", 1)]
+    assert index.lookup("jeopardize") == [("自然地理", 1)]
+    assert index.prefix("jeo") == ["jeopardise", "jeopardise/jeopardize", "jeopardize"]
@@ -0,0 +1,40 @@
+import json
+
+from parse_vocabulary import build_incremental, merge_source_entry
+
+def write_source(path, lines):
+    path.write_text("自然地理\n" + "\n".join(lines) + "\n", encoding="utf-8")
+
+def load_words(output_dir):
+    with open(output_dir / "自然地理.json", encoding="utf-8") as f:
+        return json.load(f)["words"]
+
+def test_unchanged_example_keeps_enrichments():
+    enriched = {"word": "river", "pos": "n.", "meaning": "河", "example": "A river.",
+                "example_translation": "一条河。", "phonetic": "/ˈrɪvə/"}
+    merged = merge_source_entry({"word": "river", "pos": "n.", "meaning": "河流", "example": "A river."}, enriched)
+    assert merged == dict(enriched, meaning="河流")
+
+def test_generated_example_survives_when_source_has_none():
+    enriched = {"word": "river", "pos": "n.", "meaning": "河", "example": "Generated.", "example_translation": "生成的。"}
+    assert merge_source_entry({"word": "river", "pos": "n.", "meaning": "河"}, enriched) == enriched
+
+def test_edited_example_replaces_translated_one(tmp_path):
+    source, output_dir = tmp_path / "vocabulary.txt", tmp_path / "json_chapters"
+    write_source(source, ["river|n.|河|The river floods.", "lake|n.|湖|The lake froze."])
+    build_incremental(str(source), str(output_dir))
+
+    words = load_words(output_dir)
+    for word_obj in words:
+        word_obj["example_translation"] = "旧译文"
+        word_obj["phonetic"] = "/x/"
+    with open(output_dir / "自然地理.json", "w", encoding="utf-8") as f:
+        json.dump({"chapter": "自然地理", "word_count": 2, "words": words}, f, ensure_ascii=False)
+
+    write_source(source, ["river|n.|河|The river dried up.", "lake|n.|湖|The lake froze."])
+    assert build_incremental(str(source), str(output_dir)) == ["自然地理"]
+
+    river, lake = load_words(output_dir)
+    assert river == {"word": "river", "pos": "n.", "meaning": "河", "example": "The river dried up.",
+                     "phonetic": "/x/"}
+    assert lake["example_translation"] == "旧译文"
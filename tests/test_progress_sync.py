@@ -0,0 +1,88 @@
+import pytest
+
+from progress_sync import (AFTER, BEFORE, CONCURRENT, EQUAL, ProgressSync, compare_clocks, merge_clocks,
+                           merge_states, validate_change)
+
+def state(last_review, count=1):
+    return {"mastered": False, "reviewCount": count, "lastReview": last_review, "nextReview": None}
+
+def change(word, value, clock, chapter="c"):
+    return {"chapter": chapter, "word": word, "state": value, "clock": clock}
+
+@pytest.fixture
+def store(tmp_path):
+    with ProgressSync(str(tmp_path / "sync.sqlite")) as store:
+        yield store
+
+def test_compare_and_merge_clocks():
+    assert compare_clocks({"A": 1}, {"A": 1}) == EQUAL
+    assert compare_clocks({"A": 1}, {"A": 2}) == BEFORE
+    assert compare_clocks({"A": 2, "B": 1}, {"A": 2}) == AFTER
+    assert compare_clocks({"A": 2}, {"A": 1, "B": 1}) == CONCURRENT
+    assert merge_clocks({"A": 2}, {"A": 1, "B": 1}) == {"A": 2, "B": 1}
+
+def test_merge_states_is_symmetric():
+    early, late = state("2025-01-01T00:00:00.000Z"), state("2025-02-01T00:00:00.000Z")
+    assert merge_states(early, late) == merge_states(late, early) == late
+    # 删除与修改并发时保留修改
+    assert merge_states(None, early) == merge_states(early, None) == early
+    tie_a, tie_b = state("2025-01-01T00:00:00.000Z", 1), state("2025-01-01T00:00:00.000Z", 2)
+    assert merge_states(tie_a, tie_b) == merge_states(tie_b, tie_a)
+
+def test_newer_uploads_replace_and_stale_ones_are_ignored(store):
+    first, second = state("2025-01-01T00:00:00.000Z"), state("2025-01-02T00:00:00.000Z", 2)
+    store.sync("u", [change("w", first, {"A": 1})])
+    store.sync("u", [change("w", second, {"A": 2})])
+    result = store.sync("u", [change("w", first, {"A": 1})], since=2)
+    assert result == {"seq": 2, "more": False, "changes": []}
+    assert store.progress("u") == {"c": {"w": second}}
+
+def test_concurrent_edits_merge_on_every_device(store):
+    a_state, b_state = state("2025-01-01T00:00:00.000Z"), state("2025-01-05T00:00:00.000Z", 3)
+    store.sync("u", [change("w", a_state, {"A": 1})])
+    result = store.sync("u", [change("w", b_state, {"B": 1})], since=0)
+    # 合并结果与两次上传都不同，所以也发回给上传的设备
+    assert result["changes"] == [change("w", b_state, {"A": 1, "B": 1})]
+    assert store.progress("u") == {"c": {"w": b_state}}
+
+def test_echoes_of_accepted_uploads_are_not_returned(store):
+    result = store.sync("u", [change("w1", state("2025-01-01T00:00:00.000Z"), {"A": 1}),
+                              change("w2", state("2025-01-01T00:00:00.000Z"), {"A": 1})])
+    assert result == {"seq": 2, "more": False, "changes": []}
+    other = store.sync("u", since=0)
+    assert [item["word"] for item in other["changes"]] == ["w1", "w2"]
+
+def test_tombstones_delete_and_sync_like_states(store):
+    store.sync("u", [change("w", state("2025-01-01T00:00:00.000Z"), {"A": 1})])
+    store.sync("u", [change("w", None, {"A": 2})])
+    assert store.progress("u") == {}
+    assert store.sync("u", since=1)["changes"] == [change("w", None, {"A": 2})]
+    assert store.stats() == [{"user": "u", "words": 0, "tombstones": 1, "seq": 2}]
+
+def test_downloads_are_paged_by_seq(store):
+    store.sync("u", [change(f"w{i}", state("2025-01-01T00:00:00.000Z"), {"A": 1}) for i in range(5)])
+    since, words = 0, []
+    while True:
+        result = store.sync("u", since=since, limit=2)
+        words += [item["word"] for item in result["changes"]]
+        since = result["seq"]
+        if not result["more"]:
+            break
+    assert words == [f"w{i}" for i in range(5)]
+    assert since == 5
+
+def test_users_are_isolated(store):
+    store.sync("u", [change("w", state("2025-01-01T00:00:00.000Z"), {"A": 1})])
+    assert store.sync("v", since=0) == {"seq": 0, "more": False, "changes": []}
+
+def test_malformed_changes_are_rejected_without_writing(store):
+    good = change("w", state("2025-01-01T00:00:00.000Z"), {"A": 1})
+    for bad in ({"chapter": "c", "word": "w", "clock": {"A": 1}},
+                change("w", "mastered", {"A": 1}),
+                change("w", None, {}),
+                change("w", None, {"A": 0})):
+        with pytest.raises(ValueError):
+            validate_change(bad)
+        with pytest.raises(ValueError):
+            store.sync("u", [good, bad])
+    assert store.progress("u") == {}
@@ -0,0 +1,65 @@
+import random
+
+import pytest
+
+from scheduler import (ReviewQueue, format_time, needs_review, parse_time, priority_score, review_interval_hours,
+                       simulate)
+
+def full_sort(queue, now, limit):
+    """与 sortByAnki 相同：对所有待复习单词按优先级排序"""
+    due = [(key, priority_score(state, now)) for key, state in queue.states.items() if needs_review(state, now)]
+    return sorted(due, key=lambda item: -item[1])[:limit]
+
+def assert_same_order(actual, expected):
+    assert [score for _, score in actual] == pytest.approx([score for _, score in expected])
+    # 优先级相同的单词顺序不定，只比较集合
+    assert {key for key, _ in actual} == {key for key, _ in expected}
+
+def test_due_matches_full_sort_for_simulated_learners():
+    scheduler, events, start = simulate(users=40, words=300, reviews=150, seed=7)
+    scheduler.apply_events(events)
+    for now in (events[len(events) // 2][4], events[-1][4], events[-1][4] + 7 * 86400):
+        for queue in scheduler.queues.values():
+            assert_same_order(queue.due(now, 30), full_sort(queue, now, 30))
+
+def test_due_is_repeatable_and_skips_mastered_and_future_words():
+    now = parse_time("2025-03-01T12:00:00.000Z")
+    progress = {"c": {
+        "overdue": {"mastered": False, "reviewCount": 3, "lastReview": None, "nextReview": format_time(now - 7200)},
+        "fresh": {"mastered": False, "reviewCount": 0, "lastReview": None, "nextReview": format_time(now - 60)},
+        # 堆键早于 now 但尚未到期
+        "soon": {"mastered": False, "reviewCount": 0, "lastReview": None, "nextReview": format_time(now + 600)},
+        "done": {"mastered": True, "reviewCount": 5, "lastReview": None, "nextReview": None},
+    }}
+    queue = ReviewQueue(progress, now)
+    first = queue.due(now)
+    assert [key for key, _ in first] == [("c", "overdue"), ("c", "fresh")]
+    assert queue.due(now) == first
+    assert [key for key, _ in queue.due(now + 3600)] == [("c", "overdue"), ("c", "fresh"), ("c", "soon")]
+
+def test_state_changes_replace_heap_entries():
+    now = parse_time("2025-03-01T12:00:00.000Z")
+    rng = random.Random(0)
+    queue = ReviewQueue()
+    for i in range(5):
+        queue.review(("c", f"w{i}"), now - 86400, rng)
+    queue.apply("master", ("c", "w0"), now, rng)
+    for _ in range(100):
+        queue.review(("c", "w1"), now - 86400, rng)
+
+    keys = [key for key, _ in queue.due(now, 10)]
+    assert ("c", "w0") not in keys
+    assert len(keys) == len(set(keys))
+    assert len(queue._heap) <= 2 * len(queue._keys) + 64
+
+    queue.apply("unmaster", ("c", "w0"), now - 86400, rng)
+    assert ("c", "w0") in [key for key, _ in queue.due(now, 10)]
+
+def test_review_intervals_truncate_to_whole_hours():
+    rng = random.Random(3)
+    assert all(review_interval_hours(level, rng) == 0 for level in (0, 1) for _ in range(20))
+    assert all(21 <= review_interval_hours(4, rng) <= 26 for _ in range(20))
+    assert all(3888 <= review_interval_hours(15, rng) <= 4752 for _ in range(20))
+
+def test_times_round_trip_in_to_iso_string_format():
+    assert format_time(parse_time("2025-01-02T03:04:05.678Z")) == "2025-01-02T03:04:05.678Z"
@@ -0,0 +1,34 @@
+import json
+
+from search_index import SearchIndex, build_search_index, save_search_index
+
+WORDS = [
+    {"word": "author", "meaning": "作者；作家"},
+    {"word": "reader", "meaning": "读者"},
+    {"word": "crew", "meaning": "全体船员"},
+    {"word": "scientist", "meaning": "科学家", "tips": "science+ist，研究科学的人"},
+]
+
+def build_index(tmp_path):
+    json_dir = tmp_path / "json_chapters"
+    json_dir.mkdir()
+    chapter = {"chapter": "人物", "word_count": len(WORDS), "words": WORDS}
+    (json_dir / "人物.json").write_text(json.dumps(chapter, ensure_ascii=False), encoding="utf-8")
+    meta, shards = build_search_index(str(json_dir))
+    return SearchIndex(save_search_index(meta, shards, str(tmp_path / "search")))
+
+def found(index, query):
+    return {result["word"] for result in index.search(query)}
+
+def test_single_character_matches_anywhere_in_a_word(tmp_path):
+    index = build_index(tmp_path)
+    # 者 在"作者"中是第二个字，在"读者"中也是
+    assert found(index, "者") == {"author", "reader"}
+    assert found(index, "员") == {"crew"}
+    assert found(index, "家") == {"author", "scientist"}
+
+def test_bigram_and_english_queries(tmp_path):
+    index = build_index(tmp_path)
+    assert found(index, "作者") == {"author"}
+    assert found(index, "科学家") == {"scientist"}
+    assert found(index, "scien") == {"scientist"}
@@ -0,0 +1,76 @@
+import functools
+import http.client
+import json
+import threading
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import server
+from progress_sync import ProgressSync
+
+@contextmanager
+def sync_server(tmp_path, token=None, enabled=True):
+    store = ProgressSync(str(tmp_path / "sync.sqlite")) if enabled else None
+    handler = type("TestSyncHandler", (server.SyncHandler,), {"sync_store": store, "sync_token": token,
+                                                              "log_message": lambda self, *args: None})
+    httpd = server.http.server.ThreadingHTTPServer(("127.0.0.1", 0),
+                                                   functools.partial(handler, directory=str(tmp_path)))
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield httpd.server_address[1], handler
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+        if store:
+            store.close()
+
+def request(port, body=None, headers=None):
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    if body is None:
+        connection.request("GET", "/__sync?user=u&since=0", headers=headers or {})
+    else:
+        connection.request("POST", "/__sync", body=json.dumps(body), headers=dict(headers or {}, **{
+            "Content-Type": "application/json"}))
+    response = connection.getresponse()
+    status, data = response.status, response.read()
+    connection.close()
+    return status, data
+
+CHANGE = {"chapter": "c", "word": "w", "state": {"mastered": True}, "clock": {"A": 1}}
+
+def test_sync_is_off_unless_enabled(tmp_path):
+    with sync_server(tmp_path, enabled=False) as (port, _):
+        assert request(port)[0] == 404
+
+def test_local_clients_need_no_token(tmp_path):
+    with sync_server(tmp_path) as (port, _):
+        status, data = request(port, {"user": "u", "since": 0, "changes": [CHANGE]})
+        assert status == 200 and json.loads(data)["seq"] == 1
+
+def test_remote_clients_are_rejected_without_token():
+    handler = SimpleNamespace(sync_token=None, client_address=("192.168.1.20", 5000), headers={})
+    assert not server.SyncHandler.sync_authorized(handler)
+    handler.client_address = ("::1", 5000)
+    assert server.SyncHandler.sync_authorized(handler)
+
+def test_token_is_required_when_configured(tmp_path):
+    with sync_server(tmp_path, token="s3cret") as (port, _):
+        assert request(port)[0] == 403
+        assert request(port, headers={"Authorization": "Bearer wrong"})[0] == 403
+        assert request(port, headers={"Authorization": "Bearer s3cret"})[0] == 200
+
+def test_change_without_state_is_rejected(tmp_path):
+    with sync_server(tmp_path) as (port, _):
+        request(port, {"user": "u", "changes": [CHANGE]})
+        truncated = {"chapter": "c", "word": "w", "clock": {"A": 2}}
+        status, data = request(port, {"user": "u", "changes": [truncated]})
+        assert status == 400
+        status, data = request(port)
+        assert json.loads(data)["changes"][0]["state"] == {"mastered": True}
+
+def test_database_is_not_served_as_a_static_file(tmp_path):
+    with sync_server(tmp_path) as (port, _):
+        connection = http.client.HTTPConnection("127.0.0.1", port)
+        connection.request("GET", "/sync.sqlite")
+        assert connection.getresponse().status == 404
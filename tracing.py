@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""轻量的阶段计时（span）和性能剖析
+
+    with span("load", chapter=name):
+        data = load_chapter(filepath)
+
+未启用时 span() 返回同一个空的上下文管理器，只多一次全局变量判断。
+启用后每个 span 记录开始时间和耗时，按名称汇总次数、总耗时和最大耗时，
+可以写成 Chrome trace JSON（chrome://tracing、Perfetto、speedscope 都能打开）。
+
+脚本通过 add_profile_arguments 加上 --profile 和 --profile-stacks，
+用 profiling(args.profile, args.profile_stacks) 包住主体即可。
+--jobs 多进程时，子进程中的 span 随结果一起传回主进程（见 map_chapter_files）。
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# 调用栈中短于此时间（秒）的分支不写入折叠栈文件
+MIN_STACK_SECONDS = 1e-5
+
+_tracer = None
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+NULL_SPAN = _NullSpan()
+
+class _Span:
+    __slots__ = ("tracer", "name", "category", "args", "start")
+
+    def __init__(self, tracer, name, category, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.record(self.name, self.category, self.start, time.perf_counter_ns() - self.start, self.args)
+        return False
+
+class Tracer:
+    """收集 span 事件：(名称, 类别, 开始ns, 耗时ns, 进程号, 线程号, 参数)"""
+
+    def __init__(self):
+        self.events = []
+        self.origin = time.perf_counter_ns()
+
+    def record(self, name, category, start, duration, args):
+        self.events.append((name, category, start, duration, os.getpid(), threading.get_ident(), args))
+
+    def merge(self, events):
+        self.events.extend(events)
+
+    def stats(self):
+        """按名称汇总：{名称: {"count", "total", "max"}}，时间单位为秒，按首次出现排序"""
+        stats = {}
+        for name, _, _, duration, _, _, _ in self.events:
+            entry = stats.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0})
+            seconds = duration / 1e9
+            entry["count"] += 1
+            entry["total"] += seconds
+            entry["max"] = max(entry["max"], seconds)
+        return stats
+
+    def chrome_trace(self):
+        """Chrome trace 格式（完整事件 ph=X，时间单位微秒）"""
+        thread_ids = {}
+        events = []
+        for name, category, start, duration, pid, tid, args in sorted(self.events, key=lambda event: event[2]):
+            events.append({
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": (start - self.origin) / 1000,
+                "dur": duration / 1000,
+                "pid": pid,
+                # 线程号很长，按出现顺序重新编号便于阅读
+                "tid": thread_ids.setdefault((pid, tid), len(thread_ids)),
+                "args": args,
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.chrome_trace(), f, ensure_ascii=False)
+
+    def print_summary(self, out=sys.stderr):
+        stats = self.stats()
+        if not stats:
+            return
+        total = stats.get("total", {}).get("total") or sum(entry["total"] for entry in stats.values())
+        print(f"\n{'span':<24} {'count':>7} {'total ms':>10} {'mean ms':>9} {'max ms':>9} {'share':>6}", file=out)
+        for name, entry in stats.items():
+            print(f"{name:<24} {entry['count']:>7} {entry['total'] * 1000:>10.1f} "
+                  f"{entry['total'] / entry['count'] * 1000:>9.2f} {entry['max'] * 1000:>9.2f} "
+                  f"{entry['total'] / total:>6.1%}", file=out)
+
+def span(name, category="stage", **args):
+    """计时区间；未启用时几乎没有开销"""
+    if _tracer is None:
+        return NULL_SPAN
+    return _Span(_tracer, name, category, args)
+
+def enabled():
+    return _tracer is not None
+
+def enable():
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer()
+    return _tracer
+
+def disable():
+    """停止记录，返回收集到的 Tracer（未启用时为None）"""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+def traced_call(func, *args):
+    """在子进程中记录 func(*args) 的 span，返回 (结果, 事件列表) 交给主进程合并"""
+    global _tracer
+    # fork 出的子进程会继承主进程已有的事件，换成新的 Tracer
+    previous, _tracer = _tracer, Tracer()
+    try:
+        return func(*args), _tracer.events
+    finally:
+        _tracer = previous
+
+def merge_events(events):
+    if _tracer is not None:
+        _tracer.merge(events)
+
+def collapsed_stacks(profiler):
+    """把 cProfile 结果转换为折叠栈 {"a;b;c": 微秒}
+
+    cProfile 只记录调用者-被调用者的边，没有完整调用栈：从没有调用者的函数出发，
+    按每条边的累计时间占被调用者总累计时间的比例向下分摊，得到近似的火焰图。
+    递归调用在栈中第二次出现时截断。
+    """
+    stats = pstats.Stats(profiler).stats
+    callees = {}
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, (_, _, _, cumulative) in callers.items():
+            callees.setdefault(caller, []).append((func, cumulative))
+
+    def label(func):
+        filename, line, name = func
+        return f"{name} ({os.path.basename(filename)}:{line})" if line else name
+
+    stacks = {}
+
+    def walk(func, stack, share):
+        _, _, own, cumulative, _ = stats[func]
+        stack = stack + [label(func)]
+        own_seconds = own * share
+        if own_seconds >= MIN_STACK_SECONDS:
+            key = ";".join(stack)
+            stacks[key] = stacks.get(key, 0) + own_seconds
+        for callee, edge_cumulative in callees.get(func, ()):
+            callee_cumulative = stats[callee][3]
+            if label(callee) in stack or not callee_cumulative:
+                continue
+            callee_share = share * edge_cumulative / callee_cumulative
+            if callee_cumulative * callee_share >= MIN_STACK_SECONDS:
+                walk(callee, stack, callee_share)
+
+    for func, (_, _, _, _, callers) in stats.items():
+        if not callers:
+            walk(func, [], 1.0)
+    return {key: round(seconds * 1e6) for key, seconds in stacks.items() if round(seconds * 1e6)}
+
+def write_collapsed_stacks(profiler, path):
+    """flamegraph.pl / speedscope 可以读取的折叠栈文件"""
+    with open(path, "w", encoding="utf-8") as f:
+        for key, micros in sorted(collapsed_stacks(profiler).items()):
+            f.write(f"{key} {micros}\n")
+
+def add_profile_arguments(parser):
+    parser.add_argument("--profile", metavar="TRACE_JSON",
+                        help="record load/enrich/diff/write spans and write them as Chrome trace JSON")
+    parser.add_argument("--profile-stacks", metavar="PATH",
+                        help="also run cProfile in the main process and write collapsed stacks for flame graphs")
+
+@contextmanager
+def profiling(trace_path=None, stacks_path=None, out=sys.stderr):
+    """两个路径都为空时什么都不做；否则记录 span（和 cProfile），结束时写文件并打印汇总"""
+    if not trace_path and not stacks_path:
+        yield None
+        return
+
+    tracer = enable()
+    profiler = cProfile.Profile() if stacks_path else None
+    if profiler:
+        profiler.enable()
+    try:
+        with span("total", "run"):
+            yield tracer
+    finally:
+        if profiler:
+            profiler.disable()
+        disable()
+        tracer.print_summary(out)
+        if trace_path:
+            tracer.write_chrome_trace(trace_path)
+            print(f"Saved {len(tracer.events)} spans to {trace_path}", file=out)
+        if stacks_path:
+            write_collapsed_stacks(profiler, stacks_path)
+            print(f"Saved collapsed stacks to {stacks_path}", file=out)